@@ -0,0 +1,156 @@
+"""
+Priority-aware admission control.
+
+Every request is assigned a priority class by path (ADMISSION_*_PATHS). Each
+class has its own concurrency limit and a bounded wait queue, so a burst of
+heavy requests (reports, exports) can only ever occupy its own slots and
+never the threads and DB connections roll call needs. A request that finds
+its class full and its queue full, or waits longer than the class allows, is
+turned away with 429 and Retry-After instead of piling up.
+
+A request holds its slot until its response has been sent. Background tasks
+it started (exports, rollup rebuilds) run after that, outside the lane, so a
+long export doesn't keep other heavy requests waiting.
+"""
+import asyncio
+import json
+from typing import Dict, List, Optional
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from core.config import settings
+
+
+class _Lane:
+    """Concurrency limit plus bounded queue for one priority class."""
+
+    def __init__(self, name: str, limit: int, queue_size: int, queue_timeout: float):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self.stats = {"admitted": 0, "queued": 0, "rejected": 0}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def acquire(self) -> bool:
+        # Created lazily so it belongs to the server's event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+        if self._semaphore.locked():
+            if self.waiting >= self.queue_size:
+                self.stats["rejected"] += 1
+                return False
+            self.stats["queued"] += 1
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.stats["rejected"] += 1
+                return False
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        self.active += 1
+        self.stats["admitted"] += 1
+        return True
+
+    def release(self):
+        self.active -= 1
+        self._semaphore.release()
+
+    def snapshot(self) -> dict:
+        return {
+            "limit": self.limit,
+            "queue_size": self.queue_size,
+            "active": self.active,
+            "waiting": self.waiting,
+            **self.stats
+        }
+
+
+def _build_lanes() -> Dict[str, _Lane]:
+    return {
+        name: _Lane(
+            name,
+            limit,
+            settings.ADMISSION_QUEUE_SIZES.get(name, 0),
+            settings.ADMISSION_QUEUE_TIMEOUT_SECONDS.get(name, 0.0)
+        )
+        for name, limit in settings.ADMISSION_LIMITS.items()
+    }
+
+
+lanes = _build_lanes()
+
+
+def admission_stats() -> Dict[str, dict]:
+    return {name: lane.snapshot() for name, lane in lanes.items()}
+
+
+def _matches(path: str, prefixes: List[str]) -> bool:
+    return any(path.startswith(prefix) for prefix in prefixes)
+
+
+def classify(path: str) -> Optional[str]:
+    """Priority class for a request path, or None if it is exempt."""
+    if settings.API_V1_PREFIX and path.startswith(settings.API_V1_PREFIX):
+        path = path[len(settings.API_V1_PREFIX):]
+    if _matches(path, settings.ADMISSION_EXEMPT_PATHS):
+        return None
+    if _matches(path, settings.ADMISSION_CRITICAL_PATHS):
+        return "critical"
+    if _matches(path, settings.ADMISSION_HEAVY_PATHS):
+        return "heavy"
+    return "default"
+
+
+class AdmissionControlMiddleware:
+    def __init__(self, app: ASGIApp, retry_after: int):
+        self.app = app
+        self.retry_after = retry_after
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+        lane = lanes.get(classify(scope["path"]))
+        if lane is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await lane.acquire():
+            await self._reject(lane, send)
+            return
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                lane.release()
+
+        async def send_and_release(message):
+            await send(message)
+            # Response complete: anything still running is a background task
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                release()
+
+        try:
+            await self.app(scope, receive, send_and_release)
+        finally:
+            release()
+
+    async def _reject(self, lane: _Lane, send: Send):
+        body = json.dumps({"detail": f"Too many {lane.name} requests in progress, retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(self.retry_after).encode())
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
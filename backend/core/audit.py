@@ -0,0 +1,327 @@
+"""
+Asynchronous audit trail for writes to teachers, classes, courses, grades
+and teacher/class course assignments.
+
+Change events are captured from SQLAlchemy session events (ORM flushes and
+bulk UPDATE/DELETE statements), held on the session until it commits, then
+stamped with the commit time and handed to a background writer that inserts
+them in batches of AUDIT_BATCH_SIZE or every AUDIT_FLUSH_INTERVAL_SECONDS,
+whichever comes first. Request handlers never wait on the audit insert; if
+the bounded queue is full, the committing request writes its own events
+instead of dropping them. Rolled back transactions leave no events. Rows
+removed by ON DELETE CASCADE are invisible to the session: handlers log them
+with log_cascade before deleting the parent. Events are written to the
+audit_logs table of the shard whose session committed them.
+"""
+import atexit
+import contextvars
+import enum
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Any, List, Optional
+from fastapi import HTTPException
+from sqlalchemy import event, insert, inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import operators, visitors
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from core.auth import verify_token
+from core.config import settings
+from core import shards as sharding
+from core.db import DEFAULT_SHARD
+
+from models.user import User
+from models.class_model import Class
+from models.course import Course
+from models.grade import Grade
+from models.teacher_course import TeacherCourse
+from models.class_course import ClassCourse
+from models.audit_log import AuditLog
+
+logger = logging.getLogger(__name__)
+
+AUDITED_MODELS = (User, Class, Course, Grade, TeacherCourse, ClassCourse)
+AUDITED_TABLES = {model.__table__.name for model in AUDITED_MODELS}
+REDACTED_FIELDS = {"password"}
+
+_PENDING_KEY = "audit_pending"
+# Routing key carried by queued rows; not a column
+_SHARD_KEY = "_shard"
+
+# (actor_id, actor_role) of the request being served, set by AuditContextMiddleware
+_actor: contextvars.ContextVar = contextvars.ContextVar("audit_actor", default=(None, None))
+
+
+def _jsonable(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def _field(key: str, value: Any) -> Any:
+    return "***" if key in REDACTED_FIELDS else _jsonable(value)
+
+
+def _event(action: str, entity: str, entity_id: Any, branch_id: Optional[int], changes: dict) -> dict:
+    actor_id, actor_role = _actor.get()
+    return {
+        "actor_id": actor_id,
+        "actor_role": actor_role,
+        "action": action,
+        "entity": entity,
+        "entity_id": None if entity_id is None else str(entity_id),
+        "branch_id": branch_id,
+        "changes": changes
+    }
+
+
+def _instance_event(action: str, obj) -> dict:
+    state = inspect(obj)
+    mapper = state.mapper
+    pk = mapper.primary_key_from_instance(obj)
+    entity_id = pk[0] if len(pk) == 1 else ",".join(str(v) for v in pk)
+
+    if action == "update":
+        changes = {}
+        for attr in state.attrs:
+            if attr.key not in mapper.column_attrs:
+                continue
+            history = attr.history
+            if history.has_changes():
+                old = history.deleted[0] if history.deleted else None
+                new = history.added[0] if history.added else None
+                changes[attr.key] = [_field(attr.key, old), _field(attr.key, new)]
+    else:
+        # Only already-loaded values: never lazy load from a row being deleted
+        changes = {
+            key: _field(key, value)
+            for key, value in state.dict.items()
+            if key in mapper.column_attrs
+        }
+    return _event(action, mapper.local_table.name, entity_id, state.dict.get("branch_id"), changes)
+
+
+def _after_flush(session, flush_context):
+    pending = session.info.setdefault(_PENDING_KEY, [])
+    for obj in session.new:
+        if isinstance(obj, AUDITED_MODELS):
+            pending.append(_instance_event("create", obj))
+    for obj in session.dirty:
+        if isinstance(obj, AUDITED_MODELS) and session.is_modified(obj, include_collections=False):
+            event_row = _instance_event("update", obj)
+            if event_row["changes"]:
+                pending.append(event_row)
+    for obj in session.deleted:
+        if isinstance(obj, AUDITED_MODELS):
+            pending.append(_instance_event("delete", obj))
+
+
+def _statement_entity_id(statement) -> Any:
+    """The primary key value if the WHERE clause pins one with `id == value`."""
+    if statement.whereclause is None:
+        return None
+    for element in visitors.iterate(statement.whereclause):
+        if (
+            isinstance(element, BinaryExpression)
+            and element.operator is operators.eq
+            and getattr(element.left, "primary_key", False)
+            and isinstance(element.right, BindParameter)
+        ):
+            return element.right.effective_value
+    return None
+
+
+def _do_orm_execute(state):
+    # Bulk UPDATE/DELETE statements never reach the flush
+    if not (state.is_update or state.is_delete):
+        return
+    table = state.statement.table
+    if getattr(table, "name", None) not in AUDITED_TABLES:
+        return
+    statement = state.statement
+    # Bound parameters cover both the SET values and the WHERE criteria
+    params = statement.compile().params
+    changes = {"params": {key: _field(key, value) for key, value in params.items()}}
+    state.session.info.setdefault(_PENDING_KEY, []).append(
+        _event("update" if state.is_update else "delete", table.name, _statement_entity_id(statement), None, changes)
+    )
+
+
+def log_cascade(db: Session, entity: str, rows, cause: str):
+    """
+    Record delete events for rows a database-side cascade is about to remove.
+
+    Relationships with passive_deletes leave ON DELETE CASCADE to the
+    database, so those rows never pass through the session. `rows` is a
+    select of (id, branch_id) for them; run it before the parent's DELETE.
+    `cause` names the parent, e.g. "courses:12".
+    """
+    if not settings.AUDIT_ENABLED:
+        return
+    pending = db.info.setdefault(_PENDING_KEY, [])
+    for entity_id, branch_id in db.execute(rows):
+        pending.append(_event("delete", entity, entity_id, branch_id, {"cascade": cause}))
+
+
+def _after_commit(session):
+    rows = session.info.pop(_PENDING_KEY, None)
+    if rows:
+        committed_at = datetime.now(timezone.utc)
+        shard = session.info.get("shard", DEFAULT_SHARD)
+        for row in rows:
+            row["occurred_at"] = committed_at
+            row[_SHARD_KEY] = shard
+        audit_writer.enqueue(rows)
+
+
+def _after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+class AuditWriter:
+    """Background thread writing queued audit rows with multi-row INSERTs."""
+
+    def __init__(self, queue_size: int, batch_size: int, interval: float):
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._exit_hook = False
+        self._stats = {"written": 0, "batches": 0, "overflow_writes": 0, "failed": 0}
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+            if not self._exit_hook:
+                atexit.register(self.stop)
+                self._exit_hook = True
+
+    def stop(self, timeout: float = 10.0):
+        """Flush everything still queued and stop the writer thread."""
+        self._stopping.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def enqueue(self, rows: List[dict]):
+        self.start()
+        for i, row in enumerate(rows):
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                # The writer is behind: apply backpressure by writing this
+                # request's remaining events ourselves rather than losing them
+                with self._lock:
+                    self._stats["overflow_writes"] += 1
+                self._write(rows[i:])
+                return
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"queued": self._queue.qsize(), **self._stats}
+
+    def _next_batch(self, wait: float) -> List[dict]:
+        """Up to batch_size rows, waiting at most `wait` seconds for the batch to fill."""
+        batch = []
+        deadline = time.monotonic() + wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._next_batch(self.interval)
+            if batch:
+                self._write(batch)
+        # Shutdown: drain whatever is left
+        while True:
+            batch = self._next_batch(0)
+            if not batch:
+                break
+            self._write(batch)
+
+    def _write(self, rows: List[dict]):
+        by_shard = defaultdict(list)
+        for row in rows:
+            row = dict(row)
+            by_shard[row.pop(_SHARD_KEY, DEFAULT_SHARD)].append(row)
+        for name, shard_rows in by_shard.items():
+            self._write_shard(name, shard_rows)
+
+    def _write_shard(self, name: str, rows: List[dict]):
+        # Core insert on the shard's engine: no session, so no audit events of its own
+        try:
+            with sharding.shards[name].bind.begin() as conn:
+                conn.execute(insert(AuditLog), rows)
+        except Exception:
+            logger.exception("Failed to write %d audit events to shard %s", len(rows), name)
+            with self._lock:
+                self._stats["failed"] += len(rows)
+            return
+        with self._lock:
+            self._stats["written"] += len(rows)
+            self._stats["batches"] += 1
+
+
+audit_writer = AuditWriter(
+    queue_size=settings.AUDIT_QUEUE_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    interval=settings.AUDIT_FLUSH_INTERVAL_SECONDS
+)
+
+
+def install_audit(session_factory):
+    """Capture audit events from every session made by session_factory."""
+    event.listen(session_factory, "after_flush", _after_flush)
+    event.listen(session_factory, "do_orm_execute", _do_orm_execute)
+    event.listen(session_factory, "after_commit", _after_commit)
+    event.listen(session_factory, "after_rollback", _after_rollback)
+
+
+class AuditContextMiddleware:
+    """Record the caller of each write request so events can name the actor."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] in ("GET", "HEAD", "OPTIONS"):
+            await self.app(scope, receive, send)
+            return
+        actor = (None, None)
+        scheme, _, token = Headers(scope=scope).get("authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and token:
+            try:
+                user = verify_token(token)
+                actor = (uuid.UUID(user.id), user.role)
+            except (HTTPException, ValueError):
+                pass
+        reset = _actor.set(actor)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _actor.reset(reset)
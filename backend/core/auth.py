@@ -1,9 +1,16 @@
+import uuid
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from typing import Optional, List
 from pydantic import BaseModel
+from sqlalchemy import select
+from core.cache import TTLCache
+from core.circuit import CircuitOpenError, unavailable
 from core.config import settings
+from core.db import SessionLocal, db_breaker, CHECKOUT_ERRORS
+
+from models.user import User
 
 # HTTP Bearer token scheme
 security = HTTPBearer()
@@ -94,7 +101,48 @@ def get_current_user(
         TokenData: Decoded token data with user information
     """
     token = credentials.credentials
-    return verify_token(token)
+    current_user = verify_token(token)
+    if not is_active_user(current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User no longer exists or was deleted"
+        )
+    return current_user
+
+
+# Tokens stay valid until they expire, so deleted users are checked for on
+# each request against the default database (which holds every user, see
+# core.shards), with the answer cached briefly per user
+_active_users = TTLCache(ttl_seconds=settings.AUTH_ACTIVE_USER_CACHE_TTL_SECONDS, max_entries=4096)
+
+
+def is_active_user(user_id: str) -> bool:
+    """True if the user exists and isn't soft-deleted."""
+    def lookup() -> bool:
+        try:
+            user_uuid = uuid.UUID(user_id)
+        except ValueError:
+            return False
+        try:
+            db_breaker.before_call()
+        except CircuitOpenError as e:
+            raise unavailable(e.retry_after)
+        try:
+            with SessionLocal() as db:
+                found = db.execute(
+                    select(User.id).where(User.id == user_uuid, User.deleted_at.is_(None))
+                ).first()
+        except CHECKOUT_ERRORS:
+            db_breaker.record_failure()
+            raise unavailable(settings.DB_BREAKER_RESET_SECONDS)
+        return found is not None
+
+    return _active_users.get_or_set(user_id, lookup)
+
+
+def forget_user(user_id) -> None:
+    """Drop the cached status of a user who was just deleted."""
+    _active_users.invalidate(str(user_id))
 
 
 def require_role(allowed_roles: List[str]):
@@ -0,0 +1,175 @@
+"""
+Run several admin write handlers in one transaction.
+
+Handlers are called directly with a BatchSession, whose commit() only
+flushes: every operation sees the rows written by the ones before it, and the
+caller commits (or rolls back) once at the end.
+"""
+import functools
+import inspect
+import re
+from typing import Any, Callable, Dict, List, Optional
+from fastapi import HTTPException
+from fastapi.params import Depends as DependsParam
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from pydantic.fields import FieldInfo
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+from core.db import is_outage
+
+# "$ref" -> id of that operation's result, "$ref.field" -> any field of it
+_REFERENCE_RE = re.compile(r"^\$(\w+)(?:\.(\w+))?$")
+_REQUIRED = object()
+
+
+class BatchOperation(BaseModel):
+    op: str
+    args: Dict[str, Any] = {}
+    ref: Optional[str] = None  # Name later operations use to reference this result
+
+
+class BatchSession:
+    """Session stand-in for handlers run inside a batch: commit() only flushes."""
+
+    def __init__(self, db: Session):
+        self._db = db
+
+    def commit(self):
+        self._db.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+
+@functools.lru_cache(maxsize=None)
+def _handler_params(handler: Callable) -> Dict[str, tuple]:
+    """Map each request parameter of a handler to (validator, default)."""
+    params = {}
+    for name, param in inspect.signature(handler).parameters.items():
+        default = param.default
+        if isinstance(default, DependsParam):
+            params[name] = (None, default)
+            continue
+        if isinstance(default, FieldInfo):
+            default = _REQUIRED if default.is_required() else default.default
+        elif default is inspect.Parameter.empty:
+            default = _REQUIRED
+        annotation = Any if param.annotation is inspect.Parameter.empty else param.annotation
+        params[name] = (TypeAdapter(annotation), default)
+    return params
+
+
+def _plain(result: Any) -> Any:
+    """ORM instances returned by handlers become dicts of their columns."""
+    state = sa_inspect(result, raiseerr=False)
+    if state is not None and hasattr(state, "mapper"):
+        return {attr.key: getattr(result, attr.key) for attr in state.mapper.column_attrs}
+    return result
+
+
+def _resolve(value: Any, results: Dict[str, Any]) -> Any:
+    if isinstance(value, str):
+        match = _REFERENCE_RE.match(value)
+        if not match:
+            return value
+        ref, field = match.group(1), match.group(2) or "id"
+        if ref not in results:
+            raise ValueError(f"Unknown reference {value}")
+        result = results[ref]
+        if not isinstance(result, dict) or field not in result:
+            raise ValueError(f"Reference {value} has no field '{field}'")
+        return result[field]
+    if isinstance(value, list):
+        return [_resolve(item, results) for item in value]
+    if isinstance(value, dict):
+        return {k: _resolve(v, results) for k, v in value.items()}
+    return value
+
+
+def _db_error(error: SQLAlchemyError) -> str:
+    """The driver's message without the SQL statement and parameters."""
+    return str(getattr(error, "orig", None) or error).splitlines()[0]
+
+
+def _call(handler: Callable, args: Dict[str, Any], db: BatchSession, current_user) -> Any:
+    kwargs = {}
+    for name, (validator, default) in _handler_params(handler).items():
+        if validator is None:
+            # Dependencies: hand over the batch session and the batch caller
+            if name == "db":
+                kwargs[name] = db
+            elif name == "current_user":
+                kwargs[name] = current_user
+            continue
+        if name in args:
+            kwargs[name] = validator.validate_python(args[name])
+        elif default is _REQUIRED:
+            raise ValueError(f"Missing argument '{name}'")
+        else:
+            kwargs[name] = default
+    unknown = set(args) - set(kwargs)
+    if unknown:
+        raise ValueError(f"Unknown arguments: {', '.join(sorted(unknown))}")
+    return handler(**kwargs)
+
+
+def run_batch(
+    db: Session,
+    operations: List[BatchOperation],
+    handlers: Dict[str, Callable],
+    current_user=None
+) -> List[dict]:
+    """
+    Run operations in order against one session and commit once.
+
+    Any failure rolls back the whole batch and raises an HTTPException whose
+    detail names the failing operation; nothing is written. Constraint
+    violations are 409, other invalid operations 400. Database outages are
+    re-raised as they are so get_db can answer 503.
+    """
+    batch_db = BatchSession(db)
+    results: Dict[str, Any] = {}
+    responses = []
+    for index, operation in enumerate(operations):
+        try:
+            handler = handlers.get(operation.op)
+            if handler is None:
+                raise ValueError(f"Unknown operation '{operation.op}'")
+            result = _plain(_call(handler, _resolve(operation.args, results), batch_db, current_user))
+        except HTTPException as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=e.status_code,
+                detail={"index": index, "op": operation.op, "detail": e.detail}
+            )
+        except (ValueError, ValidationError) as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=400,
+                detail={"index": index, "op": operation.op, "detail": str(e)}
+            )
+        except IntegrityError as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=409,
+                detail={"index": index, "op": operation.op, "detail": _db_error(e)}
+            )
+        except SQLAlchemyError as e:
+            db.rollback()
+            if is_outage(e):
+                raise
+            raise HTTPException(
+                status_code=400,
+                detail={"index": index, "op": operation.op, "detail": _db_error(e)}
+            )
+        except Exception:
+            db.rollback()
+            raise
+
+        if operation.ref:
+            results[operation.ref] = result
+        responses.append({"index": index, "op": operation.op, "ref": operation.ref, "result": result})
+
+    db.commit()
+    return responses
@@ -0,0 +1,88 @@
+import threading
+import time
+from typing import Optional
+from fastapi import HTTPException
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of touching a dependency whose circuit is open."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Circuit open, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed     normal operation; failure_threshold failures in a row open it.
+    open       calls are rejected immediately for reset_seconds.
+    half_open  one trial call is let through; success closes the circuit,
+               failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._stats = {"opened": 0, "rejected": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        # Caller holds the lock
+        if self._state == "open" and time.monotonic() - self._opened_at >= self.reset_seconds:
+            self._state = "half_open"
+            self._trial_running = False
+        return self._state
+
+    def before_call(self):
+        """Raise CircuitOpenError if the call must not be attempted."""
+        with self._lock:
+            state = self._current_state()
+            if state == "closed":
+                return
+            if state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return
+            self._stats["rejected"] += 1
+            retry_after = max(self.reset_seconds - (time.monotonic() - self._opened_at), 1.0)
+            raise CircuitOpenError(retry_after)
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._state = "closed"
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == "half_open" or self._failures >= self.failure_threshold:
+                if self._state != "open":
+                    self._stats["opened"] += 1
+                self._state = "open"
+                self._opened_at = time.monotonic()
+                self._trial_running = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "consecutive_failures": self._failures,
+                **self._stats
+            }
+
+
+def unavailable(retry_after: Optional[float] = None, detail: str = "Database unavailable") -> HTTPException:
+    """503 telling the client when to retry."""
+    headers = {"Retry-After": str(int(retry_after))} if retry_after else None
+    return HTTPException(status_code=503, detail=detail, headers=headers)
@@ -0,0 +1,129 @@
+import functools
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+from sqlalchemy.orm import Session
+from core.config import settings
+from core.db import LazySession
+
+
+class _Call:
+    """One in-flight computation that concurrent identical requests wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one execution.
+
+    The first caller (the leader) runs the function; callers arriving while it
+    runs wait for its result instead of repeating the work. Waiting is bounded:
+    a follower that times out runs the function itself.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, name: str, field: str):
+        with self._lock:
+            stats = self._stats.setdefault(name, {"executed": 0, "collapsed": 0, "timeouts": 0})
+            stats[field] += 1
+
+    def do(self, name: str, key: Hashable, fn: Callable[[], Any], timeout: float) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if leader:
+            try:
+                call.result = fn()
+                return call.result
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.done.set()
+                self._count(name, "executed")
+
+        if not call.done.wait(timeout):
+            self._count(name, "timeouts")
+            return fn()
+
+        self._count(name, "collapsed")
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+
+single_flight = SingleFlight()
+
+# Argument types that identify a request
+_KEY_TYPES = (int, float, str, bool, type(None))
+
+
+def _request_key(kwargs: Dict[str, Any]) -> Optional[tuple]:
+    """
+    Key the handler's parameters, ignoring the DB session and caller.
+    Returns None if a parameter can't be keyed safely.
+    """
+    params = []
+    for k, v in sorted(kwargs.items()):
+        if k == "current_user" or isinstance(v, (Session, LazySession)):
+            continue
+        if isinstance(v, (list, tuple)) and all(isinstance(item, _KEY_TYPES) for item in v):
+            v = tuple(v)
+        elif not isinstance(v, _KEY_TYPES):
+            return None
+        params.append((k, v))
+    return tuple(params)
+
+
+def coalesced(name: str, timeout: Optional[float] = None):
+    """
+    Opt a sync GET handler into request coalescing.
+
+    Concurrent calls with the same path/query parameters share one execution
+    and its result. Waiting calls never touch their (lazily opened) DB
+    session, so they hold no pool connection. Only use this on read-only
+    handlers whose response is built from plain data (not live ORM objects).
+
+    The caller is part of the key only through current_user's role: a handler
+    whose response depends on who is asking must take current_user and vary
+    by role alone. Handlers without current_user answer every caller alike.
+    The session's shard is part of the key too, since the same ids name
+    different rows on different shards.
+
+    Usage:
+        @router.get("/teacher_details/{branch_id}")
+        @coalesced("teacher_details")
+        def get_teacher_details(branch_id: int, db: Session = Depends(get_db)):
+            ...
+    """
+    wait = settings.COALESCE_MAX_WAIT_SECONDS if timeout is None else timeout
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            params = _request_key(kwargs)
+            if args or params is None:
+                return func(*args, **kwargs)
+            role = getattr(kwargs.get("current_user"), "role", None)
+            shard = next((v.shard for v in kwargs.values() if isinstance(v, LazySession)), None)
+            key = (name, shard, params, role)
+            return single_flight.do(name, key, lambda: func(*args, **kwargs), wait)
+        return wrapper
+
+    return decorator
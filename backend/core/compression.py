@@ -0,0 +1,170 @@
+import zlib
+from typing import Optional, Tuple
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+
+# Already-compressed or stream-sensitive payloads are passed through untouched
+EXCLUDED_MEDIA_TYPES = ("image/", "video/", "audio/", "application/zip", "application/gzip", "text/event-stream")
+
+
+def _parse_accept_encoding(header: str) -> dict:
+    """Map each offered coding to its q-value ("gzip;q=0.5, br" -> {"gzip": 0.5, "br": 1.0})."""
+    codings = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        codings[name] = q
+    return codings
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick br over gzip when the client accepts both and brotli is installed."""
+    codings = _parse_accept_encoding(accept_encoding)
+    wildcard = codings.get("*", 0.0)
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    best, best_q = None, 0.0
+    for coding in candidates:
+        q = codings.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._impl = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31 writes a gzip header and trailer
+            self._impl = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress a chunk and flush it so streamed chunks reach the client promptly."""
+        if self.encoding == "br":
+            return self._impl.process(data) + self._impl.flush()
+        return self._impl.compress(data) + self._impl.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._impl.process(data) + self._impl.finish()
+        return self._impl.compress(data) + self._impl.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    """
+    Negotiated brotli/gzip response compression.
+
+    Bodies smaller than minimum_size are sent as-is: for tiny JSON the header
+    and CPU overhead outweigh the savings. Streaming responses are compressed
+    chunk by chunk, flushing after each one.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        excluded_media_types: Tuple[str, ...] = EXCLUDED_MEDIA_TYPES
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.excluded_media_types = excluded_media_types
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.downstream = send
+        self.start_message: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    def _should_skip(self, headers: Headers) -> bool:
+        if "content-encoding" in headers:
+            return True
+        content_type = headers.get("content-type", "")
+        return content_type.startswith(self.middleware.excluded_media_types)
+
+    def _set_headers(self, content_length: Optional[int]):
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if content_length is None:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(content_length)
+
+    async def send(self, message: Message):
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            # Hold the start message until the first body chunk tells us the size
+            self.start_message = message
+            self.passthrough = self._should_skip(Headers(raw=message["headers"]))
+            if self.passthrough:
+                await self.downstream(message)
+            return
+
+        if message_type != "http.response.body" or self.passthrough:
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            if not more_body:
+                # Whole body in one message: compress only if it is worth it
+                if len(body) < self.middleware.minimum_size:
+                    self.passthrough = True
+                    await self.downstream(self.start_message)
+                    await self.downstream(message)
+                    return
+                compressor = _Compressor(self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality)
+                compressed = compressor.finish(body)
+                self._set_headers(len(compressed))
+                await self.downstream(self.start_message)
+                await self.downstream({"type": "http.response.body", "body": compressed})
+                return
+
+            # Streaming response: size unknown, compress every chunk
+            self.compressor = _Compressor(self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality)
+            self._set_headers(None)
+            await self.downstream(self.start_message)
+
+        if more_body:
+            chunk = self.compressor.compress(body)
+        else:
+            chunk = self.compressor.finish(body)
+        await self.downstream({"type": "http.response.body", "body": chunk, "more_body": more_body})
@@ -1,10 +1,46 @@
 from pydantic_settings import BaseSettings
-from typing import Optional, List
+from typing import Optional, List, Dict
 
 
 class Settings(BaseSettings):
     # Database settings
     DATABASE_URL: str
+    DB_WARMUP_CONNECTIONS: int = 5  # Pool connections opened at startup (capped at pool size)
+    DB_POOL_TIMEOUT_SECONDS: float = 10.0  # Max wait for a free pool connection
+    DB_CONNECT_TIMEOUT_SECONDS: int = 5  # Max wait for a new Postgres connection
+    
+    # Branch sharding: branch_id -> database URL, or "schema:<name>" for a schema of
+    # DATABASE_URL. Unmapped branches stay on DATABASE_URL.
+    BRANCH_SHARDS: Dict[int, str] = {}
+    SHARD_FANOUT_WORKERS: int = 8  # Shards queried concurrently by super_admin fan-out
+    
+    # DB circuit breaker: opens after this many consecutive failed or slow checkouts
+    DB_BREAKER_FAILURE_THRESHOLD: int = 5
+    DB_BREAKER_RESET_SECONDS: float = 15.0  # How long to fail fast before trying again
+    DB_BREAKER_SLOW_CHECKOUT_SECONDS: float = 2.0  # A checkout slower than this counts as a failure
+    
+    # Last good responses of @stale_on_outage endpoints, served while the DB is down
+    STALE_RESPONSE_MAX_AGE_SECONDS: int = 3600
+    STALE_RESPONSE_MAX_ENTRIES: int = 2048
+    
+    # Admission control: concurrent requests per priority class, and how many may
+    # wait for a slot (and for how long) before getting 429 + Retry-After
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_LIMITS: Dict[str, int] = {"critical": 20, "default": 10, "heavy": 3}
+    ADMISSION_QUEUE_SIZES: Dict[str, int] = {"critical": 200, "default": 50, "heavy": 5}
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: Dict[str, float] = {"critical": 15.0, "default": 5.0, "heavy": 1.0}
+    ADMISSION_RETRY_AFTER_SECONDS: int = 10
+    # Path prefixes (after API_V1_PREFIX) per class; anything else is "default"
+    ADMISSION_CRITICAL_PATHS: List[str] = ["/teacher/"]
+    ADMISSION_HEAVY_PATHS: List[str] = [
+        "/admin/generate_report",
+        "/admin/exports",
+        "/admin/teacher_details",
+        "/admin/rollups",
+        "/admin/workload",
+        "/admin/batch",
+    ]
+    ADMISSION_EXEMPT_PATHS: List[str] = ["/health"]
     
     # API settings
     API_V1_PREFIX: str = ""
@@ -15,10 +51,63 @@ class Settings(BaseSettings):
     NEXTAUTH_SECRET: Optional[str] = None  # Secret used by NextAuth to sign JWT tokens
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    AUTH_ACTIVE_USER_CACHE_TTL_SECONDS: int = 30  # How long "this user still exists" is trusted per token
     
     # CORS settings
     CORS_ORIGINS: List[str] = ["https://localhost:3000", "http://localhost:3000"]
     
+    # Response compression (brotli is used when the package is installed)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # Bytes; smaller bodies are sent uncompressed
+    GZIP_COMPRESSION_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4
+    
+    # On-demand profiling: super_admin requests carrying PROFILE_HEADER are profiled
+    PROFILING_ENABLED: bool = False
+    PROFILE_HEADER: str = "X-Profile"
+    PROFILE_DIR: str = "profiles"
+    PROFILE_SAMPLE_INTERVAL_MS: float = 2.0
+    
+    # Soft-delete teachers by default instead of removing the row
+    TEACHER_SOFT_DELETE: bool = False
+    
+    # Delta sync settings
+    SYNC_PAGE_SIZE: int = 1000  # Max rows per entity per /sync call
+    SYNC_SAFETY_LAG_SECONDS: int = 5  # Hold back rows this fresh so late commits are not skipped
+    
+    # Request coalescing: how long a duplicate request waits for the in-flight one
+    COALESCE_MAX_WAIT_SECONDS: float = 10.0
+    
+    # /admin/batch: max operations accepted in one request
+    BATCH_MAX_OPERATIONS: int = 50
+    
+    # Rollups: branches rebuilt concurrently (each uses one pool connection)
+    ROLLUP_WORKERS: int = 4
+    
+    # At-risk student detection job
+    AT_RISK_WINDOW_DAYS: int = 28  # Attendance window for the rolling rate and streaks
+    AT_RISK_ATTENDANCE_THRESHOLD: float = 0.75  # Flag below this attendance rate
+    AT_RISK_ABSENCE_STREAK: int = 3  # Flag at this many consecutive absences
+    AT_RISK_GRADE_DROP: float = 15.0  # Flag a drop of this many percentage points between exams
+    AT_RISK_SAFETY_LAG_SECONDS: int = 60  # Leave rows this fresh to the next run so late commits are not skipped
+    
+    # Audit log: change events are queued and written in batches off the request path
+    AUDIT_ENABLED: bool = True
+    AUDIT_QUEUE_SIZE: int = 10000  # Max queued events; beyond this writers insert their own
+    AUDIT_BATCH_SIZE: int = 500  # Rows per multi-row INSERT
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0  # Max time an event waits in the queue
+    
+    # Parquet session exports
+    EXPORT_DIR: str = "exports"
+    EXPORT_BATCH_SIZE: int = 50000  # Rows per server-side cursor fetch / record batch
+    EXPORT_SAFETY_LAG_SECONDS: int = 60  # Rows changed this recently are exported again next run
+    
+    # Cache settings
+    TEACHER_DASHBOARD_CACHE_TTL_SECONDS: int = 30
+    SEARCH_INDEX_TTL_SECONDS: int = 60  # In-process search index lifetime (non-Postgres only)
+    STUDENT_TREND_CACHE_TTL_SECONDS: int = 600  # Also invalidated on attendance/grade writes
+    STUDENT_TREND_MOVING_AVERAGE_EXAMS: int = 3  # Window of the per-course grade moving average
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
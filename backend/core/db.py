@@ -1,27 +1,217 @@
-from sqlalchemy import create_engine
+import logging
+import time
+from typing import Iterable, Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, configure_mappers
 from core.config import settings
+from core.circuit import CircuitBreaker, CircuitOpenError, unavailable
+
+logger = logging.getLogger(__name__)
+
+# Bound how long a request can wait on a sick database before giving up
+connect_args = {}
+if settings.DATABASE_URL.startswith("postgresql"):
+    connect_args["connect_timeout"] = settings.DB_CONNECT_TIMEOUT_SECONDS
 
 # Create database engine
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    connect_args=connect_args,
     echo=False  # Set to True for SQL query logging
 )
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Shard name of sessions on DATABASE_URL (see core.shards)
+DEFAULT_SHARD = "default"
+
+_AFTER_COMMIT_KEY = "after_commit"
+
+
+def after_commit(db, fn):
+    """
+    Run fn() once db's transaction commits; dropped if it rolls back.
+
+    For cache invalidation from handlers that may run inside /admin/batch,
+    where their commit() only flushes: invalidating before the real commit
+    would let a concurrent request cache the old rows again.
+    """
+    db.info.setdefault(_AFTER_COMMIT_KEY, []).append(fn)
+
+
+def _run_after_commit(session):
+    for fn in session.info.pop(_AFTER_COMMIT_KEY, []):
+        fn()
+
+
+def _discard_after_commit(session):
+    session.info.pop(_AFTER_COMMIT_KEY, None)
+
+
+event.listen(SessionLocal, "after_commit", _run_after_commit)
+event.listen(SessionLocal, "after_rollback", _discard_after_commit)
+
 # Create Base class for models
 Base = declarative_base()
 
+# Builders for hot statements, executed once at startup so their compiled
+# form is already in the engine's cache when real traffic arrives.
+hot_statements = []
 
-# Dependency to get database session
-def get_db():
-    db = SessionLocal()
+
+def hot_statement(builder):
+    """
+    Register a statement builder for startup warm-up.
+
+    The builder must be callable without arguments (every parameter has a
+    placeholder default) and return a lambda_stmt or select construct.
+    """
+    hot_statements.append(builder)
+    return builder
+
+
+def _warm_engine(bind, connections: int):
+    # Check out several connections at once so the pool actually opens them,
+    # then hand them all back. Anything beyond the pool size would just be
+    # discarded as overflow on return.
+    connections = min(connections, bind.pool.size())
+    opened = []
     try:
-        yield db
+        for _ in range(connections):
+            opened.append(bind.connect())
+    finally:
+        for conn in opened:
+            conn.close()
+
+    db = SessionLocal(bind=bind)
+    try:
+        for builder in hot_statements:
+            db.execute(builder()).all()
     finally:
+        db.rollback()
         db.close()
 
+
+def warm_up(connections: int = 0, binds: Optional[Iterable] = None):
+    """
+    Prepare the database layer before serving traffic:
+    configure mappers, then for each engine in `binds` (default: the main
+    engine) pre-open pool connections and run every registered hot statement
+    once so it is compiled and cached. Each engine has its own pool and
+    compiled cache, so every shard database needs its own pass.
+
+    A database that is down is logged and skipped rather than raised: the
+    app still starts, and requests get 503 from the breaker until it's back.
+    """
+    configure_mappers()
+    for bind in binds or [engine]:
+        try:
+            _warm_engine(bind, connections)
+        except CHECKOUT_ERRORS:
+            logger.warning("Database %s unavailable at startup, skipped warm-up", bind.url, exc_info=True)
+
+
+# Trips after consecutive connection failures or slow checkouts so requests
+# fail fast with 503 instead of piling up on pool and connect timeouts
+db_breaker = CircuitBreaker(
+    failure_threshold=settings.DB_BREAKER_FAILURE_THRESHOLD,
+    reset_seconds=settings.DB_BREAKER_RESET_SECONDS
+)
+
+# Failing to check out a connection means the database (not a query) is the
+# problem, whatever the driver calls it
+CHECKOUT_ERRORS = (DBAPIError, PoolTimeoutError)
+
+
+def is_outage(error: Exception) -> bool:
+    """
+    True if an error raised while a request uses the database means the
+    database went away. Failing queries (bad SQL, deadlocks,
+    statement_timeout) are OperationalErrors too, but not outages.
+    """
+    return isinstance(error, PoolTimeoutError) or (
+        isinstance(error, DBAPIError) and error.connection_invalidated
+    )
+
+
+class LazySession:
+    """
+    Request session that checks out its connection on first use.
+
+    Handlers that never reach the database (cache hits, coalesced requests
+    waiting on another request's result) never hold a pool connection.
+    `shard` names the database it opens on, for keying in-process caches:
+    ids are only unique within one shard.
+    """
+
+    def __init__(self, checkout, shard: str = DEFAULT_SHARD):
+        self._checkout = checkout
+        self._session = None
+        self.shard = shard
+
+    @property
+    def is_open(self) -> bool:
+        return self._session is not None
+
+    def release(self):
+        if self._session is not None:
+            self._session.close()
+
+    def __getattr__(self, name):
+        if self._session is None:
+            self._session = self._checkout()
+        return getattr(self._session, name)
+
+
+def open_session(bind=None, breaker: CircuitBreaker = db_breaker, shard: str = DEFAULT_SHARD):
+    """
+    Generator behind get_db and its shard-aware variant: yields a LazySession
+    on `bind` (default engine if None) guarded by `breaker`. The session's
+    info["shard"] is set to `shard`.
+    """
+    def checkout():
+        try:
+            breaker.before_call()
+        except CircuitOpenError as e:
+            raise unavailable(e.retry_after)
+
+        options = {"bind": bind} if bind is not None else {}
+        db = SessionLocal(info={"shard": shard}, **options)
+        # Check out (and pre-ping) the connection before handing the session
+        # over so an outage is detected here rather than mid-query
+        started = time.monotonic()
+        try:
+            db.connection()
+        except CHECKOUT_ERRORS:
+            db.close()
+            breaker.record_failure()
+            raise unavailable(settings.DB_BREAKER_RESET_SECONDS)
+        except Exception:
+            db.close()
+            raise
+        if time.monotonic() - started > settings.DB_BREAKER_SLOW_CHECKOUT_SECONDS:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return db
+
+    db = LazySession(checkout, shard)
+    try:
+        yield db
+    except Exception as e:
+        if db.is_open and is_outage(e):
+            breaker.record_failure()
+            raise unavailable(settings.DB_BREAKER_RESET_SECONDS)
+        raise
+    finally:
+        db.release()
+
+
+# Dependency to get database session
+def get_db():
+    yield from open_session()
@@ -0,0 +1,240 @@
+"""
+On-demand per-request profiling.
+
+When PROFILING_ENABLED is set, a super_admin can send the PROFILE_HEADER header
+with a request to capture:
+  - sampled Python stacks of the work done for that request (the handler in
+    its worker thread, and the request's own coroutines on the event loop),
+  - a timeline of every SQL statement the request executed.
+The capture is written as JSON to PROFILE_DIR and can be listed/downloaded via
+/admin/profiles. Requests without the header only pay for one header lookup.
+Stopping the sampler, summarizing and writing the file happen in a worker
+thread, so a profiled request never blocks the event loop for other requests.
+"""
+import contextvars
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import List, Optional
+from fastapi import HTTPException
+from sqlalchemy import event
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.auth import verify_token
+from core.config import settings
+
+_MAX_STACK_DEPTH = 64
+_PROFILE_NAME_RE = re.compile(r"^[\w.-]+\.json$")
+
+# Set only while a profiled request is running; propagates into worker threads
+_active_capture: contextvars.ContextVar = contextvars.ContextVar("active_profile_capture", default=None)
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class _Sampler(threading.Thread):
+    """Background thread recording the stacks of every other thread at a fixed interval."""
+
+    def __init__(self, interval: float, request_frame):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.request_frame = request_frame
+        # (code objects innermost first, whether the request's own frame was on the stack)
+        self.samples = []
+        self._stop_event = threading.Event()
+
+    def run(self):
+        own = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                codes = []
+                in_request = False
+                while frame is not None and len(codes) < _MAX_STACK_DEPTH:
+                    codes.append(frame.f_code)
+                    in_request = in_request or frame is self.request_frame
+                    frame = frame.f_back
+                self.samples.append((codes, in_request))
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class _Capture:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = []
+        self._pending = {}
+
+    def before_execute(self, cursor, statement):
+        self._pending[id(cursor)] = (time.perf_counter(), statement)
+
+    def after_execute(self, cursor, rowcount):
+        started, statement = self._pending.pop(id(cursor), (None, None))
+        if started is None:
+            return
+        self.statements.append({
+            "offset_ms": round((started - self.started) * 1000, 3),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+            "rowcount": rowcount,
+            "statement": statement
+        })
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    capture = _active_capture.get()
+    if capture is not None:
+        capture.before_execute(cursor, statement)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    capture = _active_capture.get()
+    if capture is not None:
+        capture.after_execute(cursor, cursor.rowcount)
+
+
+def _summarize(stacks: List[List[str]], interval: float) -> dict:
+    """Folded stacks (flamegraph input) plus top functions by self and total samples."""
+    folded = Counter()
+    self_counts = Counter()
+    total_counts = Counter()
+    for labels in stacks:
+        folded[";".join(reversed(labels))] += 1
+        self_counts[labels[0]] += 1
+        for label in set(labels):
+            total_counts[label] += 1
+    sample_ms = interval * 1000
+    return {
+        "samples": len(stacks),
+        "sample_interval_ms": sample_ms,
+        "top_self": [
+            {"function": label, "samples": n, "approx_ms": round(n * sample_ms, 1)}
+            for label, n in self_counts.most_common(30)
+        ],
+        "top_total": [
+            {"function": label, "samples": n, "approx_ms": round(n * sample_ms, 1)}
+            for label, n in total_counts.most_common(30)
+        ],
+        "folded": [f"{stack} {n}" for stack, n in folded.most_common()]
+    }
+
+
+def _is_super_admin(headers: Headers) -> bool:
+    authorization = headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        return verify_token(token).role == "super_admin"
+    except HTTPException:
+        return False
+
+
+class ProfilingMiddleware:
+    """Profile a single request when it carries PROFILE_HEADER and a super_admin token."""
+
+    def __init__(self, app: ASGIApp, header: str, output_dir: str, interval: float):
+        self.app = app
+        self.header = header.lower().encode("latin-1")
+        self.output_dir = output_dir
+        self.interval = interval
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not any(name == self.header for name, _ in scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+        if not _is_super_admin(Headers(scope=scope)):
+            await self.app(scope, receive, send)
+            return
+        await self._profile(scope, receive, send)
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send):
+        status = {"code": None}
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        capture = _Capture()
+        token = _active_capture.set(capture)
+        sampler = _Sampler(self.interval, sys._getframe())
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _active_capture.reset(token)
+            wall_ms = (time.perf_counter() - capture.started) * 1000
+            await run_in_threadpool(self._finish, scope, status["code"], wall_ms, capture, sampler)
+
+    def _finish(self, scope: Scope, status_code: Optional[int], wall_ms: float, capture: _Capture, sampler: _Sampler):
+        """Stop the sampler and write the capture; blocking, so run off the event loop."""
+        sampler.stop()
+        # Keep samples belonging to this request: the request's coroutine chain
+        # on the event loop, and the route handler running in a worker thread.
+        endpoint = scope.get("endpoint")
+        endpoint_code = getattr(getattr(endpoint, "__wrapped__", endpoint), "__code__", None)
+        stacks = []
+        for codes, in_request in sampler.samples:
+            if in_request or endpoint_code in codes:
+                stacks.append([_frame_label(code) for code in codes])
+
+        self._save(scope, status_code, wall_ms, capture, _summarize(stacks, self.interval))
+
+    def _save(self, scope: Scope, status_code: Optional[int], wall_ms: float, capture: _Capture, profile: dict):
+        os.makedirs(self.output_dir, exist_ok=True)
+        now = datetime.now(timezone.utc)
+        slug = re.sub(r"[^\w]+", "_", scope["path"]).strip("_")[:80] or "root"
+        name = f"{now.strftime('%Y%m%dT%H%M%S%f')}_{scope['method']}_{slug}.json"
+        sql_ms = sum(s["duration_ms"] for s in capture.statements)
+        with open(os.path.join(self.output_dir, name), "w") as f:
+            json.dump({
+                "method": scope["method"],
+                "path": scope["path"],
+                "query_string": scope.get("query_string", b"").decode("latin-1"),
+                "status": status_code,
+                "captured_at": now.isoformat(),
+                "wall_ms": round(wall_ms, 3),
+                "sql": {
+                    "count": len(capture.statements),
+                    "total_ms": round(sql_ms, 3),
+                    "timeline": capture.statements
+                },
+                "profile": profile
+            }, f, indent=1)
+
+
+def install_sql_timeline(engine):
+    """Register the SQL timeline hooks on an engine (no-ops unless a capture is active)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def list_profiles() -> List[dict]:
+    if not os.path.isdir(settings.PROFILE_DIR):
+        return []
+    entries = []
+    for name in sorted(os.listdir(settings.PROFILE_DIR), reverse=True):
+        if _PROFILE_NAME_RE.match(name):
+            path = os.path.join(settings.PROFILE_DIR, name)
+            entries.append({"name": name, "size": os.path.getsize(path)})
+    return entries
+
+
+def profile_path(name: str) -> Optional[str]:
+    """Resolve a profile file name inside PROFILE_DIR, rejecting anything else."""
+    if not _PROFILE_NAME_RE.match(name):
+        return None
+    path = os.path.join(settings.PROFILE_DIR, name)
+    return path if os.path.isfile(path) else None
@@ -0,0 +1,71 @@
+import bisect
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens of a name or email ("john.smith@x.com" -> john, smith, x, com)."""
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+class PrefixIndex:
+    """
+    Sorted in-process prefix index used when the database has no trigram support
+    (e.g. SQLite test runs).
+
+    Every token of every indexed field is kept in a list that is sorted once
+    by finalize(), so a prefix lookup is a binary search plus a scan over the
+    matching run. Build it fully, finalize it, then share it read-only.
+    """
+
+    def __init__(self):
+        self._keys: List[str] = []
+        self._entries: List[Tuple[str, Any]] = []
+        self._docs: Dict[Any, Dict[str, Any]] = {}
+
+    def add(self, key: Any, fields: List[str], doc: Dict[str, Any]):
+        """Index doc under key using every token of fields."""
+        self._docs[key] = doc
+        for field in fields:
+            for token in tokenize(field):
+                self._entries.append((token, key))
+
+    def finalize(self) -> "PrefixIndex":
+        """Sort the token list; must be called after the last add()."""
+        self._entries.sort(key=lambda entry: entry[0])
+        self._keys = [token for token, _ in self._entries]
+        return self
+
+    def search(self, query: str, limit: Optional[int] = 20) -> List[Dict[str, Any]]:
+        """
+        Return docs matching every query token by prefix, best first
+        (all of them if limit is None).
+        A doc scores 1.0 per exact token match and 0.5 per prefix match.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        scores: Dict[Any, float] = {}
+        for i, term in enumerate(terms):
+            matched: Dict[Any, float] = {}
+            position = bisect.bisect_left(self._keys, term)
+            while position < len(self._keys) and self._keys[position].startswith(term):
+                token, key = self._entries[position]
+                matched[key] = max(matched.get(key, 0.0), 1.0 if token == term else 0.5)
+                position += 1
+            if i == 0:
+                scores = matched
+            else:
+                scores = {k: scores[k] + v for k, v in matched.items() if k in scores}
+            if not scores:
+                return []
+
+        ranked = sorted(scores.items(), key=lambda item: -item[1])[:limit]
+        return [
+            {**self._docs[key], "score": round(score / len(terms), 3)}
+            for key, score in ranked
+        ]
@@ -0,0 +1,226 @@
+"""
+Optional branch-sharded database routing.
+
+Branches never share students, classes or courses, so a branch's data can
+live in its own database (or its own schema of the main database).
+BRANCH_SHARDS maps branch_id to either a database URL or "schema:<name>";
+unmapped branches stay on DATABASE_URL. With BRANCH_SHARDS empty everything
+behaves exactly like get_db.
+
+Each shard database holds the full schema, including the User rows of its
+branches. The default database stays the directory of branches and users
+that the frontend logs in against: with install_user_directory, every User
+row written on another shard is copied there once the shard commits.
+
+With BRANCH_SHARDS set, every request using get_branch_db must name its
+branch: in the path, as a `branch_id` query parameter, or in the caller's
+token. Ids (course_id, class_id, teacher_id) are only unique within a shard,
+so a route keyed by one cannot find its shard by itself.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, FrozenSet, List, Optional
+from fastapi import HTTPException, Request
+from sqlalchemy import create_engine, event, select, delete, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from core.auth import verify_token
+from core.circuit import CircuitBreaker
+from core.config import settings
+from core.db import engine, SessionLocal, db_breaker, connect_args, open_session, DEFAULT_SHARD
+
+from models.user import User
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA_PREFIX = "schema:"
+_DIRECTORY_KEY = "user_directory_pending"
+
+
+class Shard:
+    """One database (or schema) and the branches explicitly routed to it."""
+
+    def __init__(self, name: str, bind: Engine, breaker: CircuitBreaker, branch_ids: FrozenSet[int]):
+        self.name = name
+        self.bind = bind
+        self.breaker = breaker
+        self.branch_ids = branch_ids
+
+    @property
+    def is_default(self) -> bool:
+        return self.name == DEFAULT_SHARD
+
+    def branch_filter(self, column):
+        """
+        Restrict a query to the branches this shard owns. The default shard
+        owns every branch not routed elsewhere.
+        """
+        if self.is_default:
+            routed = set(settings.BRANCH_SHARDS)
+            return column.notin_(routed) if routed else column.is_not(None)
+        return column.in_(self.branch_ids)
+
+
+def _build_shards() -> Dict[str, Shard]:
+    targets: Dict[str, set] = {}
+    for branch_id, target in settings.BRANCH_SHARDS.items():
+        targets.setdefault(target, set()).add(int(branch_id))
+
+    shards = {DEFAULT_SHARD: Shard(DEFAULT_SHARD, engine, db_breaker, frozenset())}
+    for target, branch_ids in targets.items():
+        if target.startswith(_SCHEMA_PREFIX):
+            # Same database and pool, unqualified table names mapped to the schema
+            bind = engine.execution_options(schema_translate_map={None: target[len(_SCHEMA_PREFIX):]})
+        else:
+            bind = create_engine(
+                target,
+                pool_pre_ping=True,
+                pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+                connect_args=connect_args if target.startswith("postgresql") else {}
+            )
+        shards[target] = Shard(
+            target,
+            bind,
+            CircuitBreaker(settings.DB_BREAKER_FAILURE_THRESHOLD, settings.DB_BREAKER_RESET_SECONDS),
+            frozenset(branch_ids)
+        )
+    return shards
+
+
+shards = _build_shards()
+_shard_by_branch = {
+    branch_id: shard for shard in shards.values() for branch_id in shard.branch_ids
+}
+
+
+def shard_engines() -> List[Engine]:
+    """One engine per database: schema shards run on the default engine and share its events."""
+    return [shard.bind for shard in shards.values() if not shard.name.startswith(_SCHEMA_PREFIX)]
+
+
+def shard_for_branch(branch_id: Optional[int]) -> Shard:
+    return _shard_by_branch.get(branch_id, shards[DEFAULT_SHARD])
+
+
+def session_for_branch(branch_id: Optional[int]) -> Session:
+    """A plain session on a branch's shard, for jobs and scripts."""
+    shard = shard_for_branch(branch_id)
+    return SessionLocal(bind=shard.bind, info={"shard": shard.name})
+
+
+def _request_branch_id(request: Request) -> Optional[int]:
+    """branch_id from the path, else the query string, else the caller's token."""
+    branch_id = request.path_params.get("branch_id", request.query_params.get("branch_id"))
+    if branch_id is not None:
+        try:
+            return int(branch_id)
+        except ValueError:
+            raise HTTPException(status_code=422, detail="branch_id must be an integer")
+
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            return verify_token(token).branch_id
+        except HTTPException:
+            # Authentication itself is enforced by the route's own dependencies
+            return None
+    return None
+
+
+def get_branch_db(request: Request):
+    """
+    get_db variant that opens the session on the shard of the request's branch.
+    While branches are sharded, a request that doesn't name its branch is
+    rejected rather than silently served from the default shard.
+    """
+    branch_id = _request_branch_id(request) if _shard_by_branch else None
+    if _shard_by_branch and branch_id is None:
+        raise HTTPException(
+            status_code=400,
+            detail="branch_id is required: pass it in the path, as a query parameter or in the token"
+        )
+    shard = shard_for_branch(branch_id)
+    yield from open_session(shard.bind if not shard.is_default else None, shard.breaker, shard.name)
+
+
+def fan_out(fn: Callable[[Session, Shard], Any], workers: Optional[int] = None) -> List[Any]:
+    """
+    Run fn(session, shard) on every shard concurrently, one session each
+    (guarded by the shard's circuit breaker), and return the results in
+    shard order. For super_admin views across branches;
+    fn should restrict itself to shard.branch_filter(...) so schema shards
+    sharing the default database don't double count.
+    """
+    def run(shard: Shard):
+        scope = open_session(None if shard.is_default else shard.bind, shard.breaker, shard.name)
+        db = next(scope)
+        try:
+            return fn(db, shard)
+        except Exception as e:
+            # Let open_session map outages to 503 and count them on the shard's breaker
+            scope.throw(e)
+            raise
+        finally:
+            scope.close()
+
+    targets = list(shards.values())
+    if len(targets) == 1:
+        return [run(targets[0])]
+    with ThreadPoolExecutor(max_workers=workers or settings.SHARD_FANOUT_WORKERS) as pool:
+        return list(pool.map(run, targets))
+
+
+def _on_other_shard(session) -> bool:
+    return session.info.get("shard", DEFAULT_SHARD) != DEFAULT_SHARD
+
+
+def _track_flushed_users(session, flush_context):
+    if not _on_other_shard(session):
+        return
+    pending = session.info.setdefault(_DIRECTORY_KEY, set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, User):
+            pending.add(obj.id)
+
+
+def _track_bulk_users(state):
+    # Bulk UPDATE/DELETE never reach the flush: find the rows they will touch
+    if not (state.is_update or state.is_delete) or not _on_other_shard(state.session):
+        return
+    if getattr(state.statement.table, "name", None) != User.__tablename__:
+        return
+    affected = select(User.id)
+    if state.statement.whereclause is not None:
+        affected = affected.where(state.statement.whereclause)
+    ids = state.session.execute(affected).scalars()
+    state.session.info.setdefault(_DIRECTORY_KEY, set()).update(ids)
+
+
+def _copy_users_to_directory(session):
+    ids = session.info.pop(_DIRECTORY_KEY, None)
+    if not ids:
+        return
+    shard = shards.get(session.info["shard"])
+    try:
+        with shard.bind.connect() as conn:
+            rows = conn.execute(select(User.__table__).where(User.id.in_(ids))).mappings().all()
+        # Core statements on the default engine: no session, so nothing is re-tracked
+        with engine.begin() as conn:
+            conn.execute(delete(User).where(User.id.in_(ids)))
+            if rows:
+                conn.execute(insert(User), [dict(row) for row in rows])
+    except Exception:
+        logger.exception("Failed to copy %d users from shard %s to the directory", len(ids), shard.name)
+
+
+def _discard_tracked_users(session):
+    session.info.pop(_DIRECTORY_KEY, None)
+
+
+def install_user_directory(session_factory):
+    """Copy User rows committed on non-default shards into the default database."""
+    event.listen(session_factory, "after_flush", _track_flushed_users)
+    event.listen(session_factory, "do_orm_execute", _track_bulk_users)
+    event.listen(session_factory, "after_commit", _copy_users_to_directory)
+    event.listen(session_factory, "after_rollback", _discard_tracked_users)
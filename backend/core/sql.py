@@ -0,0 +1,23 @@
+"""SQL expressions that need a different spelling per database dialect."""
+from sqlalchemy import Date
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+
+class month_start(FunctionElement):
+    """First day of the month of a date or timestamp, as a DATE."""
+    type = Date()
+    name = "month_start"
+    inherit_cache = True
+
+
+@compiles(month_start)
+def _month_start(element, compiler, **kw):
+    # Inline 'month' rather than binding it: Postgres only matches the SELECT
+    # and GROUP BY expressions if they are textually identical.
+    return "CAST(date_trunc('month', %s) AS DATE)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(month_start, "sqlite")
+def _month_start_sqlite(element, compiler, **kw):
+    return "date(%s, 'start of month')" % compiler.process(element.clauses, **kw)
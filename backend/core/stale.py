@@ -0,0 +1,86 @@
+"""
+Serve the last good response of a GET endpoint when the database is down.
+
+Endpoints opt in with @stale_on_outage. Their successful responses are kept
+(per path, query string and Authorization header, so users never see each
+other's data); when a later request to the same URL fails with 503, the kept
+copy is served instead, marked with X-Stale, Age and a Warning header.
+"""
+import time
+from typing import List, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.cache import TTLCache
+
+_STALE_ATTR = "_stale_on_outage"
+
+
+def stale_on_outage(func):
+    """Mark a read-only GET handler as safe to answer from its last good response."""
+    setattr(func, _STALE_ATTR, True)
+    return func
+
+
+def _is_marked(endpoint) -> bool:
+    while endpoint is not None:
+        if getattr(endpoint, _STALE_ATTR, False):
+            return True
+        endpoint = getattr(endpoint, "__wrapped__", None)
+    return False
+
+
+class StaleResponseMiddleware:
+    def __init__(self, app: ASGIApp, max_age_seconds: float, max_entries: int):
+        self.app = app
+        self.responses = TTLCache(ttl_seconds=max_age_seconds, max_entries=max_entries)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        key = (scope["path"], scope.get("query_string", b""), headers.get("authorization"))
+        start: Optional[Message] = None
+        chunks: List[bytes] = []
+
+        async def send_wrapper(message: Message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                # Hold the start until we know whether the response is served or replaced
+                start = message
+                return
+            if start is None or not _is_marked(scope.get("endpoint")):
+                if start is not None:
+                    await send(start)
+                    start = None
+                await send(message)
+                return
+
+            status = start["status"]
+            if status == 503:
+                cached = self.responses.get(key)
+                if cached is not None:
+                    if not message.get("more_body", False):
+                        await self._send_stale(cached, send)
+                    return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(chunks)
+            if status == 200:
+                self.responses.set(key, (time.time(), start["headers"], body))
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _send_stale(self, cached, send: Send):
+        stored_at, raw_headers, body = cached
+        headers = MutableHeaders(raw=list(raw_headers))
+        headers["X-Stale"] = "true"
+        headers["Age"] = str(int(time.time() - stored_at))
+        headers["Warning"] = '110 - "Response is Stale"'
+        await send({"type": "http.response.start", "status": 200, "headers": headers.raw})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,40 @@
+from datetime import datetime
+from typing import Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import insert, literal, select
+from sqlalchemy.orm import Session
+
+from models.deletion_log import DeletionLog
+
+
+def log_deletions(db: Session, entity: str, rows):
+    """
+    Record tombstones for rows about to be deleted.
+
+    `rows` is a select of (id, branch_id) for the doomed rows. The log is
+    written with a single INSERT ... SELECT in the caller's transaction, so it
+    should run before the DELETE (including rows the database will cascade to).
+    """
+    doomed = rows.subquery()
+    columns = list(doomed.c)
+    db.execute(
+        insert(DeletionLog).from_select(
+            ["entity", "entity_id", "branch_id"],
+            select(literal(entity), columns[0], columns[1])
+        )
+    )
+
+
+def encode_mark(updated_at: datetime, row_id: int) -> str:
+    """Opaque high-water mark: the last (timestamp, id) a client has seen."""
+    return f"{updated_at.isoformat()}|{row_id}"
+
+
+def decode_mark(mark: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    if not mark:
+        return None
+    try:
+        timestamp, row_id = mark.rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid sync mark: {mark}")
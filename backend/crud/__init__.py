@@ -2,5 +2,22 @@
 
 from .classes_branch import router as classes_branch_router
 from .teachers_branch import router as teachers_branch_router
+from .search_branch import router as search_branch_router
+from .rollups import router as rollups_router
+from .profiles import router as profiles_router
+from .exports import router as exports_router
+from .student_trends import router as student_trends_router
+from .workload import router as workload_router
+from .audit import router as audit_router
 
-__all__ = ["classes_branch_router", "teachers_branch_router"]
+__all__ = [
+    "classes_branch_router",
+    "teachers_branch_router",
+    "search_branch_router",
+    "rollups_router",
+    "profiles_router",
+    "exports_router",
+    "student_trends_router",
+    "workload_router",
+    "audit_router",
+]
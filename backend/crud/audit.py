@@ -0,0 +1,78 @@
+import uuid
+from datetime import datetime
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from core.shards import get_branch_db
+from core.auth import require_role, TokenData
+
+from models.audit_log import AuditLog
+
+router = APIRouter(tags=["admin"])
+
+
+@router.get("/audit")
+def get_audit_trail(
+    entity: Optional[str] = Query(None, max_length=50),
+    entity_id: Optional[str] = Query(None, max_length=64),
+    actor_id: Optional[str] = None,
+    action: Optional[Literal["create", "update", "delete"]] = None,
+    branch_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    before_id: Optional[int] = Query(None, description="Cursor: next_before_id of the previous page"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_branch_db),
+    current_user: TokenData = Depends(require_role(["admin", "super_admin"]))
+):
+    """
+    Review the audit trail, newest first, with keyset pagination.
+    Grades, course links and bulk statements carry no branch_id, so filtering
+    by branch only narrows to teachers, classes and courses. Each shard keeps
+    its own trail: the request's branch picks the one read.
+    """
+    stmt = select(AuditLog)
+    if entity is not None:
+        stmt = stmt.where(AuditLog.entity == entity)
+    if entity_id is not None:
+        stmt = stmt.where(AuditLog.entity_id == entity_id)
+    if actor_id is not None:
+        try:
+            stmt = stmt.where(AuditLog.actor_id == uuid.UUID(actor_id))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="actor_id must be a UUID")
+    if action is not None:
+        stmt = stmt.where(AuditLog.action == action)
+    if branch_id is not None:
+        stmt = stmt.where(AuditLog.branch_id == branch_id)
+    if since is not None:
+        stmt = stmt.where(AuditLog.occurred_at >= since)
+    if until is not None:
+        stmt = stmt.where(AuditLog.occurred_at < until)
+    if before_id is not None:
+        stmt = stmt.where(AuditLog.id < before_id)
+
+    # One extra row tells us whether there is another page
+    rows = db.execute(stmt.order_by(AuditLog.id.desc()).limit(limit + 1)).scalars().all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return {
+        "events": [
+            {
+                "id": row.id,
+                "occurred_at": row.occurred_at,
+                "actor_id": str(row.actor_id) if row.actor_id else None,
+                "actor_role": row.actor_role,
+                "action": row.action,
+                "entity": row.entity,
+                "entity_id": row.entity_id,
+                "branch_id": row.branch_id,
+                "changes": row.changes
+            }
+            for row in rows
+        ],
+        "has_more": has_more,
+        "next_before_id": rows[-1].id if has_more else None
+    }
@@ -1,21 +1,31 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import select, update
-from core.db import get_db
+from sqlalchemy import select, update, lambda_stmt
+from core.db import hot_statement
+from core.shards import get_branch_db
 from core.auth import require_role, TokenData
+from core.coalesce import coalesced
+from core.stale import stale_on_outage
 
 from models.class_model import Class
 
 router = APIRouter(tags=["admin"])
 
+
+@hot_statement
+def classes_by_branch(branch_id: int = 0):
+    return lambda_stmt(lambda: select(Class).where(Class.branch_id == branch_id))
+
+
 @router.get("/classes/{branch_id}")
+@stale_on_outage
+@coalesced("branch_classes")
 def get_classes(
     branch_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_branch_db),
     # current_user: TokenData = Depends(require_role(["admin", "super_admin"]))
 ):
-    query = select(Class).where(Class.branch_id == branch_id)
-    result = db.execute(query)
+    result = db.execute(classes_by_branch(branch_id))
     classes = result.scalars().all()
 
     return [
@@ -0,0 +1,56 @@
+import json
+import os
+from typing import Optional
+from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from core.auth import require_role, TokenData
+from core.shards import get_branch_db
+from jobs.export_session import export_session, session_dir, MANIFEST
+from models.session import Session as AcademicSession
+
+router = APIRouter(tags=["admin"])
+
+
+def export_branch_id(branch_id: Optional[int], current_user: TokenData) -> int:
+    """The branch to export: the query parameter, else the caller's own branch."""
+    branch_id = branch_id if branch_id is not None else current_user.branch_id
+    if branch_id is None:
+        raise HTTPException(status_code=400, detail="branch_id is required")
+    if current_user.role != "super_admin" and branch_id != current_user.branch_id:
+        raise HTTPException(status_code=403, detail="Admins can only export their own branch")
+    return branch_id
+
+
+@router.post("/exports/{session_id}")
+def start_session_export(
+    session_id: int,
+    background_tasks: BackgroundTasks,
+    branch_id: Optional[int] = None,
+    incremental: bool = True,
+    db: Session = Depends(get_branch_db),
+    current_user: TokenData = Depends(require_role(["admin", "super_admin"]))
+):
+    """Export a branch's session to Parquet under EXPORT_DIR in the background"""
+    branch_id = export_branch_id(branch_id, current_user)
+    found = db.execute(
+        select(AcademicSession.id).where(AcademicSession.id == session_id, AcademicSession.branch_id == branch_id)
+    ).first()
+    if not found:
+        raise HTTPException(status_code=404, detail="Session not found in this branch")
+    background_tasks.add_task(export_session, branch_id, session_id, incremental)
+    return {"message": "Export started", "branch_id": branch_id, "session_id": session_id, "incremental": incremental}
+
+
+@router.get("/exports/{session_id}")
+def get_session_export(
+    session_id: int,
+    branch_id: Optional[int] = None,
+    current_user: TokenData = Depends(require_role(["admin", "super_admin"]))
+):
+    """Manifest of the latest export: files and marks per table"""
+    path = os.path.join(session_dir(export_branch_id(branch_id, current_user), session_id), MANIFEST)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="No export for this session")
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from core.auth import require_role, TokenData
+from core.profiling import list_profiles, profile_path
+
+router = APIRouter(tags=["admin"])
+
+
+@router.get("/profiles")
+def get_profiles(current_user: TokenData = Depends(require_role(["super_admin"]))):
+    """List captured request profiles, newest first"""
+    return list_profiles()
+
+
+@router.get("/profiles/{name}")
+def download_profile(
+    name: str,
+    current_user: TokenData = Depends(require_role(["super_admin"]))
+):
+    """Download one captured profile (JSON with SQL timeline and sampled stacks)"""
+    path = profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/json", filename=name)
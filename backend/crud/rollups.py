@@ -0,0 +1,127 @@
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, Depends, BackgroundTasks, Body
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func, distinct
+from core.shards import Shard, fan_out
+from core.auth import require_role, TokenData
+from core.stale import stale_on_outage
+
+from models.branch import Branch
+from models.enrollment_rollup import EnrollmentRollup
+from models.attendance_rollup import AttendanceRollup
+from models.grade_rollup import GradeRollup
+from models.teacher_load_rollup import TeacherLoadRollup
+from jobs.rollups import build_rollups
+
+router = APIRouter(tags=["admin"])
+
+
+@router.post("/rollups/rebuild")
+def rebuild_rollups(
+    background_tasks: BackgroundTasks,
+    branch_ids: Optional[List[int]] = Body(None, embed=True),
+    current_user: TokenData = Depends(require_role(["super_admin"]))
+):
+    """Rebuild rollups on demand (all branches unless branch_ids is given) in the background"""
+    background_tasks.add_task(build_rollups, branch_ids)
+    return {"message": "Rollup rebuild started", "branch_ids": branch_ids}
+
+
+def _branch_overview(db: Session, shard: Shard, month: date) -> List[dict]:
+    """Overview rows for the branches stored on one shard."""
+    branches = {
+        id: {
+            "branch_id": id,
+            "branch_name": name,
+            "active_students": 0,
+            "attendance_rate": None,
+            "grade_average": None,
+            "graded_count": 0,
+            "teachers": 0,
+            "avg_students_per_teacher": None,
+            "last_built_at": None
+        }
+        for id, name in db.execute(select(Branch.id, Branch.name).where(shard.branch_filter(Branch.id)).order_by(Branch.id))
+    }
+
+    for branch_id, active, built_at in db.execute(
+        select(EnrollmentRollup.branch_id, func.sum(EnrollmentRollup.active_students), func.max(EnrollmentRollup.built_at))
+        .where(EnrollmentRollup.month == month)
+        .group_by(EnrollmentRollup.branch_id)
+    ):
+        if branch_id in branches:
+            branches[branch_id]["active_students"] = int(active or 0)
+            branches[branch_id]["last_built_at"] = built_at
+
+    for branch_id, present, absent in db.execute(
+        select(AttendanceRollup.branch_id, func.sum(AttendanceRollup.present), func.sum(AttendanceRollup.absent))
+        .where(AttendanceRollup.month == month)
+        .group_by(AttendanceRollup.branch_id)
+    ):
+        total = (present or 0) + (absent or 0)
+        if branch_id in branches and total:
+            branches[branch_id]["attendance_rate"] = round(100.0 * present / total, 1)
+
+    for branch_id, graded, weighted in db.execute(
+        select(
+            GradeRollup.branch_id,
+            func.sum(GradeRollup.graded_count),
+            func.sum(GradeRollup.average_percent * GradeRollup.graded_count)
+        )
+        .where(GradeRollup.month == month)
+        .group_by(GradeRollup.branch_id)
+    ):
+        if branch_id in branches and graded:
+            branches[branch_id]["graded_count"] = int(graded)
+            branches[branch_id]["grade_average"] = round(float(weighted) / graded, 1) if weighted is not None else None
+
+    for branch_id, teachers, avg_students in db.execute(
+        select(
+            TeacherLoadRollup.branch_id,
+            func.count(distinct(TeacherLoadRollup.teacher_id)),
+            func.avg(TeacherLoadRollup.students)
+        )
+        .where(TeacherLoadRollup.month == month)
+        .group_by(TeacherLoadRollup.branch_id)
+    ):
+        if branch_id in branches:
+            branches[branch_id]["teachers"] = teachers
+            branches[branch_id]["avg_students_per_teacher"] = round(float(avg_students), 1) if avg_students is not None else None
+
+    return list(branches.values())
+
+
+@router.get("/rollups/overview")
+@stale_on_outage
+def get_rollup_overview(
+    month: Optional[date] = None,
+    current_user: TokenData = Depends(require_role(["super_admin"]))
+):
+    """
+    School-wide dashboard for super_admin, read only from the rollup tables.
+    Every branch shard is queried concurrently.
+    Args:
+        month: First day of the month to report (default: latest built month)
+    Returns:
+        Dict: per-branch enrollment, attendance rate, grade average and teacher load.
+    """
+    if month is None:
+        built = [
+            latest for latest in fan_out(lambda db, shard: db.execute(
+                select(func.max(EnrollmentRollup.month)).where(shard.branch_filter(EnrollmentRollup.branch_id))
+            ).scalar())
+            if latest is not None
+        ]
+        if not built:
+            return {"month": None, "branches": []}
+        month = max(built)
+    month = month.replace(day=1)
+
+    branches = [
+        branch
+        for shard_branches in fan_out(lambda db, shard: _branch_overview(db, shard, month))
+        for branch in shard_branches
+    ]
+    branches.sort(key=lambda branch: branch["branch_id"])
+    return {"month": month.isoformat(), "branches": branches}
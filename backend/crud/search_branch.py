@@ -0,0 +1,140 @@
+from typing import Literal
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func, or_
+from core.shards import get_branch_db
+from core.auth import require_role, TokenData
+from core.cache import TTLCache
+from core.config import settings
+from core.search import PrefixIndex
+
+from models.student import Student
+from models.user import User, user_full_name
+
+router = APIRouter(tags=["admin"])
+
+# Fallback prefix indexes keyed by branch_id, only used off Postgres
+prefix_indexes = TTLCache(ttl_seconds=settings.SEARCH_INDEX_TTL_SECONDS)
+
+
+def _pg_search_students(db: Session, branch_id: int, q: str, limit: int):
+    # `%` and ILIKE '%q%' are both served by the gin_trgm_ops index
+    score = func.similarity(Student.name, q)
+    rows = db.execute(
+        select(Student.id, Student.name, score)
+        .where(
+            Student.branch_id == branch_id,
+            or_(Student.name.op("%")(q), Student.name.icontains(q, autoescape=True))
+        )
+        .order_by(score.desc(), Student.name)
+        .limit(limit)
+    ).all()
+    return [
+        {"id": id, "name": name, "score": round(float(s), 3)}
+        for id, name, s in rows
+    ]
+
+
+def pg_teacher_query(branch_id: int, q: str, limit: int):
+    # Every predicate has a gin_trgm_ops index, the full name included
+    # ("Ada Love" matches no single column)
+    score = func.greatest(
+        func.similarity(User.first_name, q),
+        func.similarity(User.last_name, q),
+        func.similarity(User.email, q),
+        func.similarity(user_full_name, q)
+    )
+    return (
+        select(User.id, User.first_name, User.last_name, User.email, score)
+        .where(
+            User.branch_id == branch_id,
+            User.role == "teacher",
+            User.deleted_at.is_(None),
+            or_(
+                User.first_name.op("%")(q),
+                User.last_name.op("%")(q),
+                User.email.op("%")(q),
+                user_full_name.op("%")(q),
+                User.first_name.icontains(q, autoescape=True),
+                User.last_name.icontains(q, autoescape=True),
+                User.email.icontains(q, autoescape=True),
+                user_full_name.icontains(q, autoescape=True)
+            )
+        )
+        .order_by(score.desc(), User.last_name)
+        .limit(limit)
+    )
+
+
+def _pg_search_teachers(db: Session, branch_id: int, q: str, limit: int):
+    rows = db.execute(pg_teacher_query(branch_id, q, limit)).all()
+    return [
+        {
+            "id": str(id),
+            "first_name": first_name,
+            "last_name": last_name,
+            "email": email,
+            "score": round(float(s), 3)
+        }
+        for id, first_name, last_name, email, s in rows
+    ]
+
+
+def build_prefix_index(db: Session, branch_id: int) -> PrefixIndex:
+    """Load a branch's students and teachers into an in-process prefix index."""
+    index = PrefixIndex()
+    for id, name in db.execute(
+        select(Student.id, Student.name).where(Student.branch_id == branch_id)
+    ):
+        index.add(("student", id), [name], {"kind": "student", "id": id, "name": name})
+    for id, first_name, last_name, email in db.execute(
+        select(User.id, User.first_name, User.last_name, User.email).where(
+            User.branch_id == branch_id,
+            User.role == "teacher",
+            User.deleted_at.is_(None)
+        )
+    ):
+        index.add(("teacher", id), [first_name, last_name, email], {
+            "kind": "teacher",
+            "id": str(id),
+            "first_name": first_name,
+            "last_name": last_name,
+            "email": email
+        })
+    return index.finalize()
+
+
+def _fallback_search(db: Session, branch_id: int, q: str, limit: int, kind: str):
+    index = prefix_indexes.get_or_set(branch_id, lambda: build_prefix_index(db, branch_id))
+    students, teachers = [], []
+    for match in index.search(q, limit=None):
+        doc = {k: v for k, v in match.items() if k != "kind"}
+        if match["kind"] == "student" and kind != "teachers" and len(students) < limit:
+            students.append(doc)
+        elif match["kind"] == "teacher" and kind != "students" and len(teachers) < limit:
+            teachers.append(doc)
+    return students, teachers
+
+
+@router.get("/search/{branch_id}")
+def search_people(
+    branch_id: int,
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    kind: Literal["all", "students", "teachers"] = "all",
+    db: Session = Depends(get_branch_db),
+    # current_user: TokenData = Depends(require_role(["admin", "super_admin"]))
+):
+    """
+    Fuzzy search over student names and teacher names/emails in a branch.
+    Results are ranked by trigram similarity on Postgres, or by prefix match
+    quality elsewhere, and capped at `limit` per kind.
+    """
+    q = q.strip()
+    if db.get_bind().dialect.name == "postgresql":
+        students = _pg_search_students(db, branch_id, q, limit) if kind != "teachers" else []
+        teachers = _pg_search_teachers(db, branch_id, q, limit) if kind != "students" else []
+    else:
+        students, teachers = _fallback_search(db, branch_id, q, limit, kind)
+
+    return {"students": students, "teachers": teachers}
@@ -0,0 +1,124 @@
+from typing import Iterable
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func, case, cast, Date
+from core.shards import get_branch_db
+from core.auth import require_role, TokenData
+from core.cache import TTLCache
+from core.config import settings
+from core.stale import stale_on_outage
+from core.sql import month_start
+
+from models.student import Student
+from models.course import Course
+from models.exam import Exam
+from models.grade import Grade
+from models.attendance_record import AttendanceRecord, AttendanceStatusEnum
+
+router = APIRouter(tags=["admin"])
+
+# Trend payloads keyed by (shard name, student_id): student ids are only
+# unique within one shard's database
+trend_cache = TTLCache(ttl_seconds=settings.STUDENT_TREND_CACHE_TTL_SECONDS)
+
+
+def invalidate_student_trends(shard: str, student_ids: Iterable[int]):
+    """Drop cached trends for students whose attendance or grades changed."""
+    for student_id in student_ids:
+        trend_cache.invalidate((shard, student_id))
+
+
+def invalidate_shard_trends(shard: str):
+    """Drop every cached trend on a shard, for deletions too broad to list the students."""
+    trend_cache.invalidate_where(lambda key: key[0] == shard)
+
+
+def build_student_trends(db: Session, student_id: int) -> dict:
+    """
+    Monthly attendance and per-course grade trajectory for one student,
+    from one grouped attendance query and one windowed grade query.
+    """
+    student = db.execute(
+        select(Student.id, Student.name).where(Student.id == student_id)
+    ).one_or_none()
+    if student is None:
+        raise HTTPException(status_code=404, detail="Student not found")
+
+    # 1. Attendance bucketed by month
+    month = month_start(AttendanceRecord.date)
+    absent = func.sum(case((AttendanceRecord.status == AttendanceStatusEnum.ABSENT, 1), else_=0))
+    attendance_rows = db.execute(
+        select(month, func.count(), absent)
+        .where(AttendanceRecord.student_id == student_id)
+        .group_by(month)
+        .order_by(month)
+    ).all()
+
+    # 2. Every grade with its course's moving average and change from the previous exam
+    exam_day = func.coalesce(Exam.exam_date, cast(Exam.created_at, Date))
+    percent = Grade.marks_obtained * 100.0 / func.nullif(Exam.max_marks, 0)
+    by_course = {"partition_by": Exam.course_id, "order_by": (exam_day, Exam.id)}
+    grade_rows = db.execute(
+        select(
+            Exam.course_id,
+            Course.name,
+            Exam.id,
+            Exam.name,
+            exam_day,
+            percent,
+            func.avg(percent).over(
+                rows=(-(settings.STUDENT_TREND_MOVING_AVERAGE_EXAMS - 1), 0), **by_course
+            ),
+            percent - func.lag(percent).over(**by_course)
+        )
+        .join(Exam, Exam.id == Grade.exam_id)
+        .join(Course, Course.id == Exam.course_id)
+        .where(Grade.student_id == student_id)
+        .order_by(Course.name, exam_day, Exam.id)
+    ).all()
+
+    attendance = []
+    for bucket, total, absences in attendance_rows:
+        absences = int(absences or 0)
+        attendance.append({
+            "month": bucket.isoformat()[:7],
+            "present": total - absences,
+            "absent": absences,
+            "rate": round(100.0 * (total - absences) / total, 1) if total else None
+        })
+
+    courses = {}
+    for course_id, course_name, exam_id, exam_name, day, pct, moving_avg, change in grade_rows:
+        course = courses.setdefault(course_id, {"course_id": course_id, "course_name": course_name, "exams": []})
+        course["exams"].append({
+            "exam_id": exam_id,
+            "exam_name": exam_name,
+            "date": day,
+            "percent": round(float(pct), 1) if pct is not None else None,
+            "moving_average": round(float(moving_avg), 1) if moving_avg is not None else None,
+            "change": round(float(change), 1) if change is not None else None
+        })
+
+    return {
+        "student_id": student.id,
+        "student_name": student.name,
+        "moving_average_exams": settings.STUDENT_TREND_MOVING_AVERAGE_EXAMS,
+        "attendance": attendance,
+        "courses": list(courses.values())
+    }
+
+
+@router.get("/students/{student_id}/trends")
+@stale_on_outage
+def get_student_trends(
+    student_id: int,
+    db: Session = Depends(get_branch_db),
+    current_user: TokenData = Depends(require_role(["admin", "super_admin", "teacher"]))
+):
+    """
+    Month-by-month attendance and per-course grade trajectory for parent meetings.
+
+    Cached per student for STUDENT_TREND_CACHE_TTL_SECONDS; attendance and grade
+    submissions invalidate the affected students.
+    """
+    return trend_cache.get_or_set((db.shard, student_id), lambda: build_student_trends(db, student_id))
@@ -1,25 +1,36 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import select, update
-from core.db import get_db
+from sqlalchemy import select, update, lambda_stmt
+from core.db import hot_statement
+from core.shards import get_branch_db
 from core.auth import require_role, TokenData
+from core.coalesce import coalesced
+from core.stale import stale_on_outage
 
 from models.class_model import Class
 from models.user import User
 
 router = APIRouter(tags=["admin"])
 
+
+@hot_statement
+def teachers_by_branch(branch_id: int = 0):
+    return lambda_stmt(lambda: select(User).where(
+        User.branch_id == branch_id,
+        User.role == "teacher",
+        User.deleted_at.is_(None)
+    ))
+
+
 @router.get("/teachers/{branch_id}")
+@stale_on_outage
+@coalesced("branch_teachers")
 def get_teachers(
     branch_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_branch_db),
     # current_user: TokenData = Depends(require_role(["admin", "super_admin"]))
 ):
-    query = select(User).where(
-        User.branch_id == branch_id,
-        User.role == "teacher"
-    )
-    result = db.execute(query)
+    result = db.execute(teachers_by_branch(branch_id))
     teachers = result.scalars().all()
 
     return [
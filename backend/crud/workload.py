@@ -0,0 +1,177 @@
+from datetime import date, timedelta
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func, union, or_, literal
+from core.shards import get_branch_db
+from core.auth import require_role, TokenData
+
+from models.user import User
+from models.class_model import Class
+from models.course import Course
+from models.teacher_course import TeacherCourse
+from models.student_class import StudentClass, StudentStatusEnum
+from models.attendance_record import AttendanceRecord
+
+router = APIRouter(tags=["admin"])
+
+SCHOOL_DAYS = {0, 1, 2, 3, 4}  # Monday to Friday
+
+
+def _school_days(start: date, end: date):
+    days = (start + timedelta(days=i) for i in range((end - start).days + 1))
+    return [day for day in days if day.weekday() in SCHOOL_DAYS]
+
+
+def workload_query(branch_id: int, start: date, end: date):
+    """
+    One statement computing every teacher's workload in a branch.
+
+    Each measure is aggregated in its own CTE (so joins never multiply rows)
+    and the CTEs are left-joined onto the branch's teachers. Attendance
+    compliance is the share of school days in [start, end] on which each of
+    the teacher's homeroom classes had attendance taken.
+    """
+    # Classes a teacher is responsible for: as class teacher or through a course
+    teacher_classes = union(
+        select(Class.class_teacher_id.label("teacher_id"), Class.id.label("class_id"))
+        .where(Class.branch_id == branch_id, Class.class_teacher_id.is_not(None)),
+        select(TeacherCourse.teacher_id, TeacherCourse.class_id)
+        .join(Class, Class.id == TeacherCourse.class_id)
+        .where(Class.branch_id == branch_id)
+    ).cte("teacher_classes")
+
+    class_counts = (
+        select(teacher_classes.c.teacher_id, func.count().label("classes"))
+        .group_by(teacher_classes.c.teacher_id)
+    ).cte("class_counts")
+
+    course_counts = (
+        select(TeacherCourse.teacher_id, func.count(TeacherCourse.course_id.distinct()).label("courses"))
+        .join(Course, Course.id == TeacherCourse.course_id)
+        .where(Course.branch_id == branch_id)
+        .group_by(TeacherCourse.teacher_id)
+    ).cte("course_counts")
+
+    student_counts = (
+        select(teacher_classes.c.teacher_id, func.count(StudentClass.student_id.distinct()).label("students"))
+        .join(StudentClass, StudentClass.class_id == teacher_classes.c.class_id)
+        .where(StudentClass.status == StudentStatusEnum.ACTIVE)
+        .group_by(teacher_classes.c.teacher_id)
+    ).cte("student_counts")
+
+    # Distinct (class, school day) pairs with attendance in the window, per homeroom teacher
+    school_days = _school_days(start, end)
+    days_taken = (
+        select(AttendanceRecord.class_id, AttendanceRecord.date)
+        .join(Class, Class.id == AttendanceRecord.class_id)
+        .where(Class.branch_id == branch_id, AttendanceRecord.date.in_(school_days))
+        .distinct()
+    ).subquery()
+    homeroom = (
+        select(
+            Class.class_teacher_id.label("teacher_id"),
+            func.count(Class.id.distinct()).label("homeroom_classes"),
+            func.count(days_taken.c.date).label("days_taken")
+        )
+        .outerjoin(days_taken, days_taken.c.class_id == Class.id)
+        .where(Class.branch_id == branch_id, Class.class_teacher_id.is_not(None))
+        .group_by(Class.class_teacher_id)
+    ).cte("homeroom")
+
+    expected_days = len(school_days)
+    columns = {
+        # Either name part may be NULL; concatenating it would blank the whole name
+        "name": func.trim(func.coalesce(User.first_name, "") + literal(" ") + func.coalesce(User.last_name, "")),
+        "classes": func.coalesce(class_counts.c.classes, 0),
+        "courses": func.coalesce(course_counts.c.courses, 0),
+        "students": func.coalesce(student_counts.c.students, 0),
+        "homeroom_classes": func.coalesce(homeroom.c.homeroom_classes, 0),
+        "days_taken": func.coalesce(homeroom.c.days_taken, 0),
+        "compliance": homeroom.c.days_taken * 1.0 / func.nullif(homeroom.c.homeroom_classes * expected_days, 0),
+    }
+    stmt = (
+        select(User.id, User.email, *(expr.label(name) for name, expr in columns.items()))
+        .outerjoin(class_counts, class_counts.c.teacher_id == User.id)
+        .outerjoin(course_counts, course_counts.c.teacher_id == User.id)
+        .outerjoin(student_counts, student_counts.c.teacher_id == User.id)
+        .outerjoin(homeroom, homeroom.c.teacher_id == User.id)
+        .where(User.branch_id == branch_id, User.role == "teacher", User.deleted_at.is_(None))
+    )
+    return stmt, columns, expected_days
+
+
+@router.get("/workload/{branch_id}")
+def get_branch_workload(
+    branch_id: int,
+    sort: Literal["name", "classes", "courses", "students", "compliance"] = "name",
+    order: Literal["asc", "desc"] = "asc",
+    q: Optional[str] = Query(None, max_length=100),
+    min_classes: Optional[int] = Query(None, ge=0),
+    max_compliance: Optional[float] = Query(None, ge=0, le=1),
+    weeks: int = Query(1, ge=1, le=12),
+    limit: int = Query(100, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_branch_db),
+    # current_user: TokenData = Depends(require_role(["admin", "super_admin"]))
+):
+    """
+    Per-teacher workload for scheduling: classes, courses, distinct active
+    students and attendance-taking compliance over the last `weeks` weeks.
+    Computed with a single query; sorting, filtering and paging happen in SQL.
+    Args:
+        q: Match on teacher name or email
+        min_classes: Only teachers responsible for at least this many classes
+        max_compliance: Only homeroom teachers at or below this compliance (0-1)
+    """
+    end = date.today()
+    start = end - timedelta(weeks=weeks) + timedelta(days=1)
+    stmt, columns, expected_days = workload_query(branch_id, start, end)
+
+    if q and q.strip():
+        # autoescape: a `%` or `_` in the search text matches only itself
+        q = q.strip()
+        stmt = stmt.where(or_(
+            columns["name"].icontains(q, autoescape=True),
+            User.email.icontains(q, autoescape=True)
+        ))
+    if min_classes is not None:
+        stmt = stmt.where(columns["classes"] >= min_classes)
+    if max_compliance is not None:
+        stmt = stmt.where(columns["compliance"] <= max_compliance)
+
+    sort_expr = columns[sort].desc() if order == "desc" else columns[sort].asc()
+    rows = db.execute(
+        stmt.add_columns(func.count().over().label("total"))
+        .order_by(sort_expr.nulls_last(), User.id)
+        .limit(limit)
+        .offset(offset)
+    ).all()
+    # The window count rides along with any non-empty page. A page past the
+    # end has no row to carry it, so only then is it counted on its own.
+    if rows:
+        total = rows[0].total
+    elif offset:
+        total = db.execute(select(func.count()).select_from(stmt.subquery())).scalar_one()
+    else:
+        total = 0
+
+    return {
+        "branch_id": branch_id,
+        "window": {"start": start, "end": end, "school_days": expected_days},
+        "total": total,
+        "teachers": [
+            {
+                "id": str(row.id),
+                "name": row.name,
+                "email": row.email,
+                "classes": row.classes,
+                "courses": row.courses,
+                "students": row.students,
+                "homeroom_classes": row.homeroom_classes,
+                "attendance_days_taken": row.days_taken,
+                "attendance_compliance": round(float(row.compliance), 3) if row.compliance is not None else None
+            }
+            for row in rows
+        ]
+    }
@@ -0,0 +1,295 @@
+"""
+At-risk student detection.
+
+Pulls a session's attendance and grades in bulk into NumPy arrays and flags
+students whose attendance rate over the last AT_RISK_WINDOW_DAYS fell below
+threshold, who are on a run of consecutive absences, or whose latest exam in
+a course dropped sharply from the previous one.
+
+Attendance flags depend on the window, which moves every day, so they are
+recomputed for every student with attendance in the window on each run;
+the bulk pull is bounded by the window, not the session. Grade drops only
+change when grades do, so they are re-evaluated incrementally: only
+students with grades recorded or corrected (by updated_at) since the
+previous run. Grade rows fresher than AT_RISK_SAFETY_LAG_SECONDS are left
+to the next run so a transaction that commits late is not skipped. Deleted
+grades leave nothing to detect, so run with --full after bulk deletions.
+
+Each session is processed on its branch's shard. Without arguments every
+current session (today within its dates, or undated) of every shard is run.
+
+    python -m jobs.at_risk [--full]
+    python -m jobs.at_risk [--full] <branch_id> <session_id> [<session_id> ...]
+"""
+import logging
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+import numpy as np
+from sqlalchemy import select, insert, delete, func, or_
+from sqlalchemy.orm import Session
+from core.config import settings
+from core.shards import session_for_branch, fan_out
+
+from models.class_model import Class
+from models.exam import Exam
+from models.grade import Grade
+from models.attendance_record import AttendanceRecord, AttendanceStatusEnum
+from models.student_risk_flag import StudentRiskFlag, RiskFlagEnum
+from models.job_watermark import JobWatermark
+from models.session import Session as AcademicSession
+
+logger = logging.getLogger(__name__)
+
+JOB_NAME = "at_risk"
+ATTENDANCE_FLAGS = (RiskFlagEnum.LOW_ATTENDANCE, RiskFlagEnum.ABSENCE_STREAK)
+
+
+def _group_bounds(keys: np.ndarray):
+    """Start and end (exclusive) index of each run of equal keys in a sorted array."""
+    if len(keys) == 0:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    change = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+    starts = np.concatenate(([0], change))
+    ends = np.concatenate((change, [len(keys)]))
+    return starts, ends
+
+
+def attendance_metrics(student_ids: np.ndarray, days: np.ndarray, absent: np.ndarray):
+    """
+    Per-student attendance rate, current absence streak and longest streak.
+
+    Inputs are parallel arrays, one entry per attendance record. Returns
+    (students, rate, current_streak, longest_streak).
+    """
+    order = np.lexsort((days, student_ids))
+    student_ids, absent = student_ids[order], absent[order]
+    starts, ends = _group_bounds(student_ids)
+    students = student_ids[starts]
+
+    counts = ends - starts
+    absences = np.add.reduceat(absent.astype(np.int64), starts) if len(starts) else np.array([], dtype=np.int64)
+    rate = 1.0 - absences / np.maximum(counts, 1)
+
+    # Streak at each record = distance to the last present record within the
+    # same student. Seed each group start with start-1 so nothing leaks across.
+    index = np.arange(len(absent))
+    last_present = np.where(absent, -1, index)
+    last_present[starts] = np.maximum(last_present[starts], starts - 1)
+    last_present = np.maximum.accumulate(last_present)
+    streak = np.where(absent, index - last_present, 0)
+
+    current = streak[ends - 1] if len(ends) else np.array([], dtype=np.int64)
+    longest = np.maximum.reduceat(streak, starts) if len(starts) else np.array([], dtype=np.int64)
+    return students, rate, current, longest
+
+
+def grade_drops(student_ids: np.ndarray, course_ids: np.ndarray, exam_days: np.ndarray, percents: np.ndarray):
+    """
+    Per-student worst change between the last two exams of any course
+    (negative = drop). Students with fewer than two exams in every course
+    are omitted. Returns (students, worst_delta, course_of_worst).
+    """
+    order = np.lexsort((exam_days, course_ids, student_ids))
+    student_ids, course_ids, percents = student_ids[order], course_ids[order], percents[order]
+
+    # Groups are (student, course) pairs
+    pair = (student_ids.astype(np.int64) << 32) | course_ids.astype(np.int64)
+    starts, ends = _group_bounds(pair)
+    has_two = (ends - starts) >= 2
+    last = ends[has_two] - 1
+    deltas = percents[last] - percents[last - 1]
+    students = student_ids[last]
+    courses = course_ids[last]
+
+    if len(students) == 0:
+        empty = np.array([], dtype=np.int64)
+        return empty, np.array([], dtype=float), empty
+
+    # Worst (minimum) delta per student: sort by student then delta, take first
+    order = np.lexsort((deltas, students))
+    students, deltas, courses = students[order], deltas[order], courses[order]
+    firsts, _ = _group_bounds(students)
+    return students[firsts], deltas[firsts], courses[firsts]
+
+
+def _get_watermark(db: Session, session_id: int) -> JobWatermark:
+    watermark = db.execute(
+        select(JobWatermark).where(JobWatermark.job == JOB_NAME, JobWatermark.session_id == session_id)
+    ).scalar_one_or_none()
+    if watermark is None:
+        watermark = JobWatermark(job=JOB_NAME, session_id=session_id)
+        db.add(watermark)
+    return watermark
+
+
+def _attendance_flags(db: Session, session_id: int, window_start: date) -> tuple:
+    """Attendance flags of every student with attendance in the window, and the rows read."""
+    rows = db.execute(
+        select(AttendanceRecord.student_id, AttendanceRecord.date, AttendanceRecord.status)
+        .join(Class, Class.id == AttendanceRecord.class_id)
+        .where(Class.session_id == session_id, AttendanceRecord.date >= window_start)
+    ).all()
+    flags = []
+    if rows:
+        a_students, a_days, a_status = zip(*rows)
+        students, rate, current, longest = attendance_metrics(
+            np.array(a_students, dtype=np.int64),
+            np.array(a_days, dtype="datetime64[D]"),
+            np.array([s == AttendanceStatusEnum.ABSENT for s in a_status], dtype=bool)
+        )
+        for i in np.flatnonzero(rate < settings.AT_RISK_ATTENDANCE_THRESHOLD):
+            flags.append((int(students[i]), RiskFlagEnum.LOW_ATTENDANCE, float(rate[i]),
+                          f"{rate[i]:.0%} attendance over {settings.AT_RISK_WINDOW_DAYS} days"))
+        for i in np.flatnonzero(current >= settings.AT_RISK_ABSENCE_STREAK):
+            flags.append((int(students[i]), RiskFlagEnum.ABSENCE_STREAK, float(current[i]),
+                          f"{current[i]} consecutive absences (longest {longest[i]})"))
+    return flags, len(rows)
+
+
+def _grade_flags(db: Session, session_id: int, changed) -> tuple:
+    """Grade drop flags of the students in the `changed` subquery, and the rows read."""
+    rows = db.execute(
+        select(
+            Grade.student_id,
+            Exam.course_id,
+            func.coalesce(Exam.exam_date, func.date(Exam.created_at)),
+            Grade.marks_obtained * 100.0 / func.nullif(Exam.max_marks, 0)
+        )
+        .join(Exam, Exam.id == Grade.exam_id)
+        .join(changed, changed.c.student_id == Grade.student_id)
+        .where(Exam.session_id == session_id)
+    ).all()
+    flags = []
+    if rows:
+        g_students, g_courses, g_days, g_percents = zip(*rows)
+        percents = np.array([np.nan if p is None else float(p) for p in g_percents])
+        valid = ~np.isnan(percents)
+        students, deltas, courses = grade_drops(
+            np.array(g_students, dtype=np.int64)[valid],
+            np.array(g_courses, dtype=np.int64)[valid],
+            np.array(g_days, dtype="datetime64[D]")[valid],
+            percents[valid]
+        )
+        for i in np.flatnonzero(deltas <= -settings.AT_RISK_GRADE_DROP):
+            flags.append((int(students[i]), RiskFlagEnum.GRADE_DROP, float(deltas[i]),
+                          f"Dropped {-deltas[i]:.1f} points in course {courses[i]}"))
+    return flags, len(rows)
+
+
+def detect_at_risk(branch_id: int, session_id: int, full: bool = False, today: Optional[date] = None) -> dict:
+    """Recompute a session's attendance flags and the grade flags of changed students."""
+    started = time.perf_counter()
+    today = today or date.today()
+    window_start = today - timedelta(days=settings.AT_RISK_WINDOW_DAYS)
+
+    db = session_for_branch(branch_id)
+    try:
+        watermark = _get_watermark(db, session_id)
+        upper = datetime.now(timezone.utc) - timedelta(seconds=settings.AT_RISK_SAFETY_LAG_SECONDS)
+
+        # Every student in the window: yesterday's flags may no longer hold
+        attendance_flags, attendance_rows = _attendance_flags(db, session_id, window_start)
+        db.execute(delete(StudentRiskFlag).where(
+            StudentRiskFlag.session_id == session_id,
+            StudentRiskFlag.flag.in_(ATTENDANCE_FLAGS)
+        ))
+
+        # Students with grades recorded or corrected since the last run
+        changed_grades = [Exam.session_id == session_id, Grade.updated_at <= upper]
+        if not full and watermark.last_grade_at is not None:
+            changed_grades.append(Grade.updated_at > watermark.last_grade_at)
+        changed = (
+            select(Grade.student_id)
+            .join(Exam, Exam.id == Grade.exam_id)
+            .where(*changed_grades)
+            .distinct()
+            .subquery()
+        )
+        grade_flags, grade_rows = _grade_flags(db, session_id, changed)
+        changed_ids = db.execute(select(changed.c.student_id)).scalars().all()
+        if full:
+            db.execute(delete(StudentRiskFlag).where(
+                StudentRiskFlag.session_id == session_id,
+                StudentRiskFlag.flag == RiskFlagEnum.GRADE_DROP
+            ))
+        elif changed_ids:
+            db.execute(delete(StudentRiskFlag).where(
+                StudentRiskFlag.session_id == session_id,
+                StudentRiskFlag.flag == RiskFlagEnum.GRADE_DROP,
+                StudentRiskFlag.student_id.in_(select(changed.c.student_id))
+            ))
+
+        flags = attendance_flags + grade_flags
+        if flags:
+            db.execute(insert(StudentRiskFlag), [
+                {
+                    "student_id": student_id,
+                    "session_id": session_id,
+                    "flag": flag,
+                    "value": value,
+                    "detail": detail,
+                    "as_of": today
+                }
+                for student_id, flag, value, detail in flags
+            ])
+
+        # Every grade up to `upper` has been seen; a --full run also moves the mark
+        watermark.last_grade_at = upper
+        watermark.last_run_on = today
+        db.commit()
+
+        return {
+            "branch_id": branch_id,
+            "session_id": session_id,
+            "grade_students_evaluated": len(changed_ids),
+            "attendance_rows": attendance_rows,
+            "grade_rows": grade_rows,
+            "flags": len(flags),
+            "seconds": round(time.perf_counter() - started, 3)
+        }
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def detect_all(full: bool = False, today: Optional[date] = None) -> List[dict]:
+    """
+    Run detect_at_risk for every current session of every shard.
+    A failing session does not stop the others.
+    """
+    today = today or date.today()
+    sessions = [
+        pair
+        for shard_sessions in fan_out(lambda db, shard: db.execute(
+            select(AcademicSession.branch_id, AcademicSession.id).where(
+                shard.branch_filter(AcademicSession.branch_id),
+                or_(AcademicSession.start_date.is_(None), AcademicSession.start_date <= today),
+                or_(AcademicSession.end_date.is_(None), AcademicSession.end_date >= today)
+            )
+        ).all())
+        for pair in shard_sessions
+    ]
+    results = []
+    for branch_id, session_id in sessions:
+        try:
+            results.append(detect_at_risk(branch_id, session_id, full=full, today=today))
+        except Exception as e:
+            logger.exception("At-risk detection failed for session %s of branch %s", session_id, branch_id)
+            results.append({"branch_id": branch_id, "session_id": session_id, "error": str(e)})
+    return results
+
+
+if __name__ == "__main__":
+    import models  # noqa: F401  (register every mapper)
+    full = "--full" in sys.argv
+    args = [int(arg) for arg in sys.argv[1:] if arg != "--full"]
+    if args:
+        results = [detect_at_risk(args[0], session_id, full=full) for session_id in args[1:]]
+    else:
+        results = detect_all(full=full)
+    for result in results:
+        print(result)
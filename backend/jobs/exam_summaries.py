@@ -0,0 +1,57 @@
+"""
+Exam grade summaries.
+
+Exam.graded_count, average_marks and highest_marks are denormalized from the
+grades table so exam listings don't aggregate grades on every request. The
+grade-write path calls refresh_exam_summaries for the exams it touched, in the
+same transaction; run this module to backfill or repair every exam.
+
+    python -m jobs.exam_summaries [<exam_id> ...]
+"""
+import sys
+import time
+from typing import Iterable, Optional
+from sqlalchemy import select, update, func
+from sqlalchemy.orm import Session
+from core.db import SessionLocal
+
+from models.exam import Exam
+from models.grade import Grade
+
+
+def refresh_exam_summaries(db: Session, exam_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recompute the summary columns from grades in one UPDATE, for the given
+    exams or all of them. Does not commit. Returns the number of exams updated.
+    """
+    def aggregate(expr):
+        return select(expr).where(Grade.exam_id == Exam.id).scalar_subquery()
+
+    stmt = update(Exam).values(
+        graded_count=aggregate(func.count(Grade.id)),
+        average_marks=aggregate(func.avg(Grade.marks_obtained)),
+        highest_marks=aggregate(func.max(Grade.marks_obtained))
+    )
+    if exam_ids is not None:
+        stmt = stmt.where(Exam.id.in_(list(exam_ids)))
+    return db.execute(stmt.execution_options(synchronize_session=False)).rowcount
+
+
+def backfill(exam_ids: Optional[Iterable[int]] = None) -> dict:
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        updated = refresh_exam_summaries(db, exam_ids)
+        db.commit()
+        return {"exams_updated": updated, "seconds": round(time.perf_counter() - started, 3)}
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    import models  # noqa: F401  (register every mapper)
+    ids = [int(arg) for arg in sys.argv[1:]]
+    print(backfill(ids or None))
@@ -0,0 +1,204 @@
+"""
+Columnar snapshot export of a session to Parquet.
+
+Writes one directory per table under EXPORT_DIR/branch_<b>/session_<id>/,
+reading from the branch's shard. Rows are read through a server-side cursor
+and written as record batches of EXPORT_BATCH_SIZE rows, so memory stays
+bounded regardless of table size.
+
+Dimension tables (students, classes, courses, exams) are rewritten as a
+single snapshot file on every run. The large tables are appended to: an
+incremental run writes one new part file per table holding only
+- student_classes rows with an id above the last exported id (rows are only
+  ever inserted), and
+- grades and attendance_records rows whose updated_at is past the last
+  run's mark. A row corrected after it was exported appears in several
+  parts; readers keep the copy with the latest updated_at per id.
+The mark trails the run by EXPORT_SAFETY_LAG_SECONDS so a transaction that
+commits late with an older updated_at is picked up by the next run. Deleted
+grades and attendance rows only disappear on a full run, which replaces
+every part file. Progress is tracked in manifest.json next to the data.
+
+    python -m jobs.export_session <branch_id> <session_id> [--full]
+"""
+import enum
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import select, Integer, Float, String, Date, DateTime, Enum, Uuid
+from core.config import settings
+from core.shards import shard_for_branch
+
+from models.student import Student
+from models.student_class import StudentClass
+from models.class_model import Class
+from models.course import Course
+from models.exam import Exam
+from models.grade import Grade
+from models.attendance_record import AttendanceRecord
+
+MANIFEST = "manifest.json"
+
+
+# How each table is exported: rewritten every run, or appended to by id or by updated_at
+SNAPSHOT, BY_ID, BY_UPDATED_AT = "snapshot", "id", "updated_at"
+
+
+def session_dir(branch_id: int, session_id: int, output_dir: Optional[str] = None) -> str:
+    # Session ids are only unique within a shard: keep branches apart
+    return os.path.join(output_dir or settings.EXPORT_DIR, f"branch_{branch_id}", f"session_{session_id}")
+
+
+def _session_tables(session_id: int):
+    """(name, model, select, mode) for every exported table."""
+    session_classes = select(Class.id).where(Class.session_id == session_id)
+    session_exams = select(Exam.id).where(Exam.session_id == session_id)
+    enrolled = select(StudentClass.student_id).where(StudentClass.class_id.in_(session_classes))
+    return [
+        ("students", Student, select(Student).where(Student.id.in_(enrolled)), SNAPSHOT),
+        ("classes", Class, select(Class).where(Class.session_id == session_id), SNAPSHOT),
+        ("courses", Course, select(Course).where(Course.session_id == session_id), SNAPSHOT),
+        ("exams", Exam, select(Exam).where(Exam.session_id == session_id), SNAPSHOT),
+        ("student_classes", StudentClass, select(StudentClass).where(StudentClass.class_id.in_(session_classes)), BY_ID),
+        ("grades", Grade, select(Grade).where(Grade.exam_id.in_(session_exams)), BY_UPDATED_AT),
+        ("attendance_records", AttendanceRecord, select(AttendanceRecord).where(AttendanceRecord.class_id.in_(session_classes)), BY_UPDATED_AT),
+    ]
+
+
+def _arrow_type(column_type) -> pa.DataType:
+    if isinstance(column_type, Enum):
+        return pa.string()
+    if isinstance(column_type, Uuid):
+        return pa.string()
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us", tz="UTC")
+    if isinstance(column_type, Date):
+        return pa.date32()
+    if isinstance(column_type, Integer):
+        return pa.int64()
+    if isinstance(column_type, Float):
+        return pa.float64()
+    if isinstance(column_type, String):
+        return pa.string()
+    raise TypeError(f"No Parquet mapping for column type {column_type!r}")
+
+
+def _arrow_value(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _write_table(bind, model, query, path: str, after_id: Optional[int], append: bool) -> dict:
+    """
+    Stream query results (restricted to ids above after_id, if given) into a
+    Parquet file; returns row count and max id. An append that finds no rows
+    writes no file.
+    """
+    table = model.__table__
+    columns = list(table.columns)
+    schema = pa.schema([pa.field(c.name, _arrow_type(c.type), nullable=c.nullable) for c in columns])
+    id_index = [c.name for c in columns].index("id")
+
+    # Select plain columns (no ORM hydration) in id order
+    stmt = query.with_only_columns(*columns)
+    if after_id is not None:
+        stmt = stmt.where(table.c.id > after_id)
+    stmt = stmt.order_by(table.c.id)
+
+    rows = 0
+    max_id = after_id
+    tmp_path = path + ".tmp"
+    with bind.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=settings.EXPORT_BATCH_SIZE).execute(stmt)
+        with pq.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+            for partition in result.partitions():
+                arrays = [
+                    pa.array([_arrow_value(row[i]) for row in partition], type=schema.field(i).type)
+                    for i in range(len(columns))
+                ]
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+                rows += len(partition)
+                max_id = partition[-1][id_index]
+
+    if rows == 0 and append:
+        # Nothing new: don't leave an empty partition behind
+        os.remove(tmp_path)
+        return {"rows": 0, "max_id": after_id, "file": None}
+    os.replace(tmp_path, path)
+    return {"rows": rows, "max_id": max_id, "file": os.path.basename(path)}
+
+
+def export_session(branch_id: int, session_id: int, incremental: bool = True, output_dir: Optional[str] = None) -> dict:
+    """
+    Export a branch's session to Parquet and return the updated manifest.
+    The first run, and any run with incremental=False, writes everything.
+    """
+    started = time.perf_counter()
+    bind = shard_for_branch(branch_id).bind
+    directory = session_dir(branch_id, session_id, output_dir)
+    os.makedirs(directory, exist_ok=True)
+
+    manifest_path = os.path.join(directory, MANIFEST)
+    manifest = {"branch_id": branch_id, "session_id": session_id, "tables": {}}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    now = datetime.now(timezone.utc)
+    run_id = now.strftime("%Y%m%dT%H%M%S%f")
+    upper = now - timedelta(seconds=settings.EXPORT_SAFETY_LAG_SECONDS)
+    for name, model, query, mode in _session_tables(session_id):
+        table_dir = os.path.join(directory, name)
+        os.makedirs(table_dir, exist_ok=True)
+        state = manifest["tables"].get(name, {"last_id": None, "parts": []})
+        path = os.path.join(table_dir, f"part-{run_id}.parquet")
+        mark = state.get("last_updated_at")
+
+        if incremental and mode == BY_ID and state["parts"]:
+            result = _write_table(bind, model, query, path, state["last_id"] or 0, append=True)
+        elif incremental and mode == BY_UPDATED_AT and mark:
+            changed = query.where(model.updated_at > datetime.fromisoformat(mark))
+            result = _write_table(bind, model, changed, path, None, append=True)
+        else:
+            # Full rewrite: a single file replaces every previous part,
+            # including any a crashed run left out of the manifest
+            result = _write_table(bind, model, query, path, None, append=False)
+            for old in os.listdir(table_dir):
+                if old.startswith("part-") and old.endswith(".parquet") and old != result["file"]:
+                    os.remove(os.path.join(table_dir, old))
+            state["parts"] = []
+
+        if result["file"]:
+            state["parts"].append(result["file"])
+        if mode == BY_UPDATED_AT:
+            # Rows changed after `upper` may still be joined by late commits
+            # with older timestamps: they are exported again next run
+            state["last_updated_at"] = upper.isoformat()
+        state["last_id"] = max(result["max_id"] or 0, state["last_id"] or 0) or None
+        state["last_rows"] = result["rows"]
+        manifest["tables"][name] = state
+
+    manifest["exported_at"] = datetime.now(timezone.utc).isoformat()
+    manifest["seconds"] = round(time.perf_counter() - started, 3)
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    return manifest
+
+
+if __name__ == "__main__":
+    import models  # noqa: F401  (register every mapper)
+    args = [arg for arg in sys.argv[1:] if arg != "--full"]
+    branch_id, session_ids = int(args[0]), args[1:]
+    for session_id in session_ids:
+        manifest = export_session(branch_id, int(session_id), incremental="--full" not in sys.argv)
+        print(json.dumps(manifest, indent=1))
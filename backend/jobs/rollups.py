@@ -0,0 +1,179 @@
+"""
+Cross-branch rollup builder.
+
+Rebuilds the enrollment, attendance, grade and teacher-load rollup tables
+with set-based INSERT ... SELECT statements, one transaction per branch,
+with branches processed in parallel.
+
+Run nightly from cron:
+    python -m jobs.rollups
+or for specific branches:
+    python -m jobs.rollups 1 2 3
+"""
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Iterable, List, Optional
+from sqlalchemy import select, insert, delete, func, distinct, literal, Date
+from core.config import settings
+from core.sql import month_start
+from core.shards import session_for_branch, fan_out
+
+from models.branch import Branch
+from models.class_model import Class
+from models.course import Course
+from models.exam import Exam
+from models.grade import Grade
+from models.student_class import StudentClass, StudentStatusEnum
+from models.teacher_course import TeacherCourse
+from models.user import User
+from models.attendance_record import AttendanceRecord, AttendanceStatusEnum
+from models.enrollment_rollup import EnrollmentRollup
+from models.attendance_rollup import AttendanceRollup
+from models.grade_rollup import GradeRollup
+from models.teacher_load_rollup import TeacherLoadRollup
+
+logger = logging.getLogger(__name__)
+
+
+def build_branch_rollups(branch_id: int, month: Optional[date] = None):
+    """
+    Rebuild every rollup for one branch in a single transaction.
+
+    Attendance and grades are rebuilt for all months; enrollment and teacher
+    load are point-in-time snapshots stored under `month` (default: this month).
+    """
+    month = month or date.today().replace(day=1)
+    db = session_for_branch(branch_id)
+    try:
+        # Enrollment snapshot
+        db.execute(delete(EnrollmentRollup).where(
+            EnrollmentRollup.branch_id == branch_id,
+            EnrollmentRollup.month == month
+        ))
+        db.execute(insert(EnrollmentRollup).from_select(
+            ["branch_id", "session_id", "month", "active_students", "total_enrollments"],
+            select(
+                Class.branch_id,
+                Class.session_id,
+                literal(month, Date),
+                func.count(distinct(StudentClass.student_id)).filter(
+                    StudentClass.status == StudentStatusEnum.ACTIVE
+                ),
+                func.count(StudentClass.id)
+            )
+            .join(StudentClass, StudentClass.class_id == Class.id)
+            .where(Class.branch_id == branch_id)
+            .group_by(Class.branch_id, Class.session_id)
+        ))
+
+        # Attendance per month
+        db.execute(delete(AttendanceRollup).where(AttendanceRollup.branch_id == branch_id))
+        attendance_month = month_start(AttendanceRecord.date)
+        db.execute(insert(AttendanceRollup).from_select(
+            ["branch_id", "session_id", "month", "present", "absent"],
+            select(
+                Class.branch_id,
+                Class.session_id,
+                attendance_month,
+                func.count(AttendanceRecord.id).filter(AttendanceRecord.status == AttendanceStatusEnum.PRESENT),
+                func.count(AttendanceRecord.id).filter(AttendanceRecord.status == AttendanceStatusEnum.ABSENT)
+            )
+            .join(AttendanceRecord, AttendanceRecord.class_id == Class.id)
+            .where(Class.branch_id == branch_id)
+            .group_by(Class.branch_id, Class.session_id, attendance_month)
+        ))
+
+        # Grade averages per course per month (exam date, else when it was created)
+        db.execute(delete(GradeRollup).where(GradeRollup.branch_id == branch_id))
+        exam_month = month_start(func.coalesce(Exam.exam_date, Exam.created_at))
+        db.execute(insert(GradeRollup).from_select(
+            ["branch_id", "session_id", "month", "course_id", "graded_count", "average_percent"],
+            select(
+                Course.branch_id,
+                Exam.session_id,
+                exam_month,
+                Exam.course_id,
+                func.count(Grade.id),
+                func.avg(Grade.marks_obtained * 100.0 / func.nullif(Exam.max_marks, 0))
+            )
+            .join(Exam, Exam.course_id == Course.id)
+            .join(Grade, Grade.exam_id == Exam.id)
+            .where(Course.branch_id == branch_id)
+            .group_by(Course.branch_id, Exam.session_id, exam_month, Exam.course_id)
+        ))
+
+        # Teacher load snapshot
+        db.execute(delete(TeacherLoadRollup).where(
+            TeacherLoadRollup.branch_id == branch_id,
+            TeacherLoadRollup.month == month
+        ))
+        db.execute(insert(TeacherLoadRollup).from_select(
+            ["branch_id", "session_id", "month", "teacher_id", "classes", "courses", "students"],
+            select(
+                Course.branch_id,
+                Course.session_id,
+                literal(month, Date),
+                TeacherCourse.teacher_id,
+                func.count(distinct(TeacherCourse.class_id)),
+                func.count(distinct(TeacherCourse.course_id)),
+                func.count(distinct(StudentClass.student_id))
+            )
+            .join(TeacherCourse, TeacherCourse.course_id == Course.id)
+            # Soft-deleted teachers keep their assignments but carry no load
+            .join(User, (User.id == TeacherCourse.teacher_id) & User.deleted_at.is_(None))
+            .outerjoin(StudentClass, (StudentClass.class_id == TeacherCourse.class_id) & (
+                StudentClass.status == StudentStatusEnum.ACTIVE
+            ))
+            .where(Course.branch_id == branch_id)
+            .group_by(Course.branch_id, Course.session_id, TeacherCourse.teacher_id)
+        ))
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def build_rollups(branch_ids: Optional[Iterable[int]] = None, workers: Optional[int] = None) -> List[dict]:
+    """
+    Rebuild rollups for the given branches (default: all) in parallel.
+    Returns one result per branch; a failing branch does not stop the others.
+    """
+    if branch_ids is None:
+        branch_ids = [
+            branch_id
+            for shard_branches in fan_out(
+                lambda db, shard: db.execute(select(Branch.id).where(shard.branch_filter(Branch.id))).scalars().all()
+            )
+            for branch_id in shard_branches
+        ]
+
+    def run(branch_id: int) -> dict:
+        started = time.perf_counter()
+        try:
+            build_branch_rollups(branch_id)
+            error = None
+        except Exception as e:
+            # Usually run in the background, where nobody sees the returned error
+            logger.exception("Rollup rebuild failed for branch %s", branch_id)
+            error = str(e)
+        return {
+            "branch_id": branch_id,
+            "seconds": round(time.perf_counter() - started, 3),
+            "error": error
+        }
+
+    with ThreadPoolExecutor(max_workers=workers or settings.ROLLUP_WORKERS) as pool:
+        return list(pool.map(run, branch_ids))
+
+
+if __name__ == "__main__":
+    import models  # noqa: F401  (register every mapper)
+    ids = [int(arg) for arg in sys.argv[1:]] or None
+    for result in build_rollups(ids):
+        print(result)
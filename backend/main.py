@@ -1,14 +1,61 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from core.config import settings
-from routes import admin, teacher
+from core.db import SessionLocal, warm_up
+from core.compression import CompressionMiddleware
+from core.stale import StaleResponseMiddleware
+from core.admission import AdmissionControlMiddleware
+from core.audit import AuditContextMiddleware, audit_writer, install_audit
+from core.shards import install_user_directory, shard_engines
+from core.profiling import ProfilingMiddleware, install_sql_timeline
+from routes import admin, teacher, sync
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Warm the database layer before the app starts accepting requests:
+    mappers configured, pool connections opened and hot statements compiled
+    on every shard database. One that is down is skipped, not fatal.
+    On shutdown, flush the audit queue.
+    """
+    await run_in_threadpool(warm_up, settings.DB_WARMUP_CONNECTIONS, shard_engines())
+    if settings.AUDIT_ENABLED:
+        audit_writer.start()
+    yield
+    # Write out any audit events still queued before the process exits
+    if settings.AUDIT_ENABLED:
+        await run_in_threadpool(audit_writer.stop)
+
 
 # Create FastAPI app
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version="1.0.0",
+    lifespan=lifespan,
 )
 
+# Per-priority concurrency limits; added before CORS so that 429s still carry
+# CORS headers and the browser can read Retry-After
+if settings.ADMISSION_CONTROL_ENABLED:
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+    )
+
+# Teachers created on a branch shard must be able to log in, and login reads
+# the default database: keep a copy of every shard's User rows there
+if settings.BRANCH_SHARDS:
+    install_user_directory(SessionLocal)
+
+# Audit trail: capture change events from every session and tag them with
+# the caller of the request
+if settings.AUDIT_ENABLED:
+    install_audit(SessionLocal)
+    app.add_middleware(AuditContextMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -16,11 +63,41 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],
 )
 
+# Serve the last good copy of @stale_on_outage GETs while the DB breaker is open
+app.add_middleware(
+    StaleResponseMiddleware,
+    max_age_seconds=settings.STALE_RESPONSE_MAX_AGE_SECONDS,
+    max_entries=settings.STALE_RESPONSE_MAX_ENTRIES,
+)
+
+# Compress responses; wraps every middleware above, so stale copies and 429s
+# are compressed too. Only the optional profiler below sits outside it.
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_level=settings.GZIP_COMPRESSION_LEVEL,
+        brotli_quality=settings.BROTLI_QUALITY,
+    )
+
+# Opt-in request profiling; not installed at all unless enabled
+if settings.PROFILING_ENABLED:
+    for shard_engine in shard_engines():
+        install_sql_timeline(shard_engine)
+    app.add_middleware(
+        ProfilingMiddleware,
+        header=settings.PROFILE_HEADER,
+        output_dir=settings.PROFILE_DIR,
+        interval=settings.PROFILE_SAMPLE_INTERVAL_MS / 1000,
+    )
+
 # Include routers
 app.include_router(admin.router, prefix=settings.API_V1_PREFIX)
 app.include_router(teacher.router, prefix=settings.API_V1_PREFIX)
+app.include_router(sync.router, prefix=settings.API_V1_PREFIX)
 
 
 @app.get("/")
@@ -35,6 +112,6 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Health check endpoint; breaker, lane and audit figures are at /admin/runtime_stats"""
     return {"status": "healthy"}
 
@@ -10,6 +10,14 @@ from models.class_course import ClassCourse
 from models.exam import Exam
 from models.grade import Grade
 from models.attendance_record import AttendanceRecord
+from models.deletion_log import DeletionLog
+from models.enrollment_rollup import EnrollmentRollup
+from models.attendance_rollup import AttendanceRollup
+from models.grade_rollup import GradeRollup
+from models.teacher_load_rollup import TeacherLoadRollup
+from models.student_risk_flag import StudentRiskFlag
+from models.job_watermark import JobWatermark
+from models.audit_log import AuditLog
 
 __all__ = [
     "User",
@@ -24,5 +32,13 @@ __all__ = [
     "Exam",
     "Grade",
     "AttendanceRecord",
+    "DeletionLog",
+    "EnrollmentRollup",
+    "AttendanceRollup",
+    "GradeRollup",
+    "TeacherLoadRollup",
+    "StudentRiskFlag",
+    "JobWatermark",
+    "AuditLog",
 ]
 
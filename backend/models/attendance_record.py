@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, Date, ForeignKey, Enum, UniqueConstraint
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey, Enum, UniqueConstraint, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 import enum
 from core.db import Base
 
@@ -19,6 +20,8 @@ class AttendanceRecord(Base):
     date = Column(Date, nullable=False)
     status = Column(Enum(AttendanceStatusEnum), nullable=False)
     teacher_id = Column(UUID(as_uuid=True), ForeignKey("User.id", ondelete="SET NULL"))
+    # Attendance is corrected in place, so incremental jobs watermark on this, not id
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     
     # Relationships
     class_model = relationship("Class", back_populates="attendance_records")
@@ -28,5 +31,6 @@ class AttendanceRecord(Base):
     # Unique constraint
     __table_args__ = (
         UniqueConstraint('student_id', 'class_id', 'date', name='unq_student_class_date'),
+        Index('ix_attendance_records_updated_at', 'updated_at'),
     )
 
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, String, Integer, DateTime, JSON, Index
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from core.db import Base
+
+
+class AuditLog(Base):
+    __tablename__ = "audit_log"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    occurred_at = Column(DateTime(timezone=True), nullable=False)  # When the change committed, not when it was written
+    actor_id = Column(UUID(as_uuid=True))  # Not a FK: the trail must outlive the user
+    actor_role = Column(String(50))
+    action = Column(String(20), nullable=False)  # 'create', 'update', 'delete'
+    entity = Column(String(50), nullable=False)  # Table name, e.g. 'classes'
+    entity_id = Column(String(64))
+    branch_id = Column(Integer)
+    changes = Column(JSON().with_variant(JSONB(), "postgresql"))
+    
+    # Reviews page newest-first (by id) within one of these filters
+    __table_args__ = (
+        Index("ix_audit_log_entity", "entity", "entity_id", "id"),
+        Index("ix_audit_log_actor", "actor_id", "id"),
+        Index("ix_audit_log_branch", "branch_id", "id"),
+        Index("ix_audit_log_occurred_at", "occurred_at"),
+    )
@@ -14,9 +14,9 @@ class Branch(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     
     # Relationships
-    users = relationship("User", back_populates="branch")
-    students = relationship("Student", back_populates="branch", cascade="all, delete-orphan")
-    sessions = relationship("Session", back_populates="branch", cascade="all, delete-orphan")
-    classes = relationship("Class", back_populates="branch", cascade="all, delete-orphan")
-    courses = relationship("Course", back_populates="branch", cascade="all, delete-orphan")
+    users = relationship("User", back_populates="branch", passive_deletes=True)
+    students = relationship("Student", back_populates="branch", cascade="all, delete-orphan", passive_deletes=True)
+    sessions = relationship("Session", back_populates="branch", cascade="all, delete-orphan", passive_deletes=True)
+    classes = relationship("Class", back_populates="branch", cascade="all, delete-orphan", passive_deletes=True)
+    courses = relationship("Course", back_populates="branch", cascade="all, delete-orphan", passive_deletes=True)
 
@@ -20,7 +20,7 @@ class Class(Base):
     branch = relationship("Branch", back_populates="classes")
     session = relationship("Session", back_populates="classes")
     class_teacher = relationship("User", back_populates="classes", foreign_keys=[class_teacher_id])
-    student_classes = relationship("StudentClass", back_populates="class_model", cascade="all, delete-orphan")
-    class_courses = relationship("ClassCourse", back_populates="class_model", cascade="all, delete-orphan")
-    attendance_records = relationship("AttendanceRecord", back_populates="class_model", cascade="all, delete-orphan")
+    student_classes = relationship("StudentClass", back_populates="class_model", cascade="all, delete-orphan", passive_deletes=True)
+    class_courses = relationship("ClassCourse", back_populates="class_model", cascade="all, delete-orphan", passive_deletes=True)
+    attendance_records = relationship("AttendanceRecord", back_populates="class_model", cascade="all, delete-orphan", passive_deletes=True)
 
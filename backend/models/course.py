@@ -17,7 +17,7 @@ class Course(Base):
     # Relationships
     branch = relationship("Branch", back_populates="courses")
     session = relationship("Session", back_populates="courses")
-    teacher_courses = relationship("TeacherCourse", back_populates="course", cascade="all, delete-orphan")
-    class_courses = relationship("ClassCourse", back_populates="course", cascade="all, delete-orphan")
-    exams = relationship("Exam", back_populates="course", cascade="all, delete-orphan")
+    teacher_courses = relationship("TeacherCourse", back_populates="course", cascade="all, delete-orphan", passive_deletes=True)
+    class_courses = relationship("ClassCourse", back_populates="course", cascade="all, delete-orphan", passive_deletes=True)
+    exams = relationship("Exam", back_populates="course", cascade="all, delete-orphan", passive_deletes=True)
 
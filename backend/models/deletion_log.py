@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, Integer, DateTime, Index
+from sqlalchemy.sql import func
+from core.db import Base
+
+
+class DeletionLog(Base):
+    __tablename__ = "deletion_log"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    entity = Column(String(50), nullable=False)  # e.g. 'courses', 'exams'
+    entity_id = Column(Integer, nullable=False)
+    branch_id = Column(Integer)  # Not a FK: the log must outlive the branch's rows
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        Index("ix_deletion_log_branch_deleted_at", "branch_id", "deleted_at", "id"),
+    )
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from core.db import Base
+
+
+class EnrollmentRollup(Base):
+    """Enrollment snapshot per branch, session and month."""
+    __tablename__ = "enrollment_rollups"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    branch_id = Column(Integer, ForeignKey("branches.id", ondelete="CASCADE"), nullable=False)
+    session_id = Column(Integer, ForeignKey("sessions.id", ondelete="CASCADE"))
+    month = Column(Date, nullable=False)
+    active_students = Column(Integer, nullable=False)
+    total_enrollments = Column(Integer, nullable=False)
+    built_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        UniqueConstraint('branch_id', 'session_id', 'month', name='unq_enrollment_rollup'),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Date, DateTime, ForeignKey
+from sqlalchemy import Column, String, Integer, Float, Date, DateTime, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from core.db import Base
@@ -13,11 +13,15 @@ class Exam(Base):
     name = Column(String(255), nullable=False)
     max_marks = Column(Integer, nullable=False)
     exam_date = Column(Date)
+    # Grade summary, maintained by the grade-write path (see jobs.exam_summaries)
+    graded_count = Column(Integer, nullable=False, default=0, server_default="0")
+    average_marks = Column(Float)
+    highest_marks = Column(Integer)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     
     # Relationships
     course = relationship("Course", back_populates="exams")
     session = relationship("Session", back_populates="exams")
-    grades = relationship("Grade", back_populates="exam", cascade="all, delete-orphan")
+    grades = relationship("Grade", back_populates="exam", cascade="all, delete-orphan", passive_deletes=True)
 
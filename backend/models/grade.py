@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 from core.db import Base
 
 class Grade(Base):
@@ -9,6 +10,8 @@ class Grade(Base):
     exam_id = Column(Integer, ForeignKey("exams.id", ondelete="CASCADE"), nullable=False)
     student_id = Column(Integer, ForeignKey("students.id", ondelete="CASCADE"), nullable=False)
     marks_obtained = Column(Integer, nullable=False)
+    # Grades are corrected in place, so incremental jobs watermark on this, not id
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     
     # Relationships
     exam = relationship("Exam", back_populates="grades")
@@ -17,5 +20,8 @@ class Grade(Base):
     # Unique constraint
     __table_args__ = (
         UniqueConstraint('exam_id', 'student_id', name='unq_exam_student'),
+        # Per-student lookups (trends, at-risk); the unique index leads with exam_id
+        Index('ix_grades_student_id', 'student_id'),
+        Index('ix_grades_updated_at', 'updated_at'),
     )
 
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, Float, Date, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from core.db import Base
+
+
+class GradeRollup(Base):
+    """Grade averages per branch, session, month and course."""
+    __tablename__ = "grade_rollups"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    branch_id = Column(Integer, ForeignKey("branches.id", ondelete="CASCADE"), nullable=False)
+    session_id = Column(Integer, ForeignKey("sessions.id", ondelete="CASCADE"))
+    month = Column(Date, nullable=False)
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), nullable=False)
+    graded_count = Column(Integer, nullable=False)
+    average_percent = Column(Float)  # Mean of marks_obtained / max_marks * 100
+    built_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        UniqueConstraint('branch_id', 'session_id', 'month', 'course_id', name='unq_grade_rollup'),
+    )
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, String, Integer, Date, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from core.db import Base
+
+
+class JobWatermark(Base):
+    """Progress marker so batch jobs only process rows added or changed since their last run."""
+    __tablename__ = "job_watermarks"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job = Column(String(100), nullable=False)
+    session_id = Column(Integer, ForeignKey("sessions.id", ondelete="CASCADE"), nullable=False)
+    # updated_at high-water marks; NULL means nothing processed yet
+    last_attendance_at = Column(DateTime(timezone=True))
+    last_grade_at = Column(DateTime(timezone=True))
+    last_run_on = Column(Date)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    
+    __table_args__ = (
+        UniqueConstraint('job', 'session_id', name='unq_job_session'),
+    )
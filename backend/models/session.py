@@ -14,7 +14,7 @@ class Session(Base):
     
     # Relationships
     branch = relationship("Branch", back_populates="sessions")
-    classes = relationship("Class", back_populates="session", cascade="all, delete-orphan")
-    courses = relationship("Course", back_populates="session", cascade="all, delete-orphan")
-    exams = relationship("Exam", back_populates="session", cascade="all, delete-orphan")
+    classes = relationship("Class", back_populates="session", cascade="all, delete-orphan", passive_deletes=True)
+    courses = relationship("Course", back_populates="session", cascade="all, delete-orphan", passive_deletes=True)
+    exams = relationship("Exam", back_populates="session", cascade="all, delete-orphan", passive_deletes=True)
 
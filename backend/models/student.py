@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Date, DateTime, ForeignKey
+from sqlalchemy import Column, String, Integer, Date, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from core.db import Base
@@ -17,7 +17,11 @@ class Student(Base):
     
     # Relationships
     branch = relationship("Branch", back_populates="students")
-    student_classes = relationship("StudentClass", back_populates="student", cascade="all, delete-orphan")
-    grades = relationship("Grade", back_populates="student", cascade="all, delete-orphan")
-    attendance_records = relationship("AttendanceRecord", back_populates="student", cascade="all, delete-orphan")
-
+    student_classes = relationship("StudentClass", back_populates="student", cascade="all, delete-orphan", passive_deletes=True)
+    grades = relationship("Grade", back_populates="student", cascade="all, delete-orphan", passive_deletes=True)
+    attendance_records = relationship("AttendanceRecord", back_populates="student", cascade="all, delete-orphan", passive_deletes=True)
+    
+    # Trigram index for fuzzy name search (requires CREATE EXTENSION pg_trgm)
+    __table_args__ = (
+        Index("ix_students_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+    )
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, String, Integer, Float, Date, DateTime, ForeignKey, Enum, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+import enum
+from core.db import Base
+
+
+class RiskFlagEnum(str, enum.Enum):
+    LOW_ATTENDANCE = "low_attendance"
+    ABSENCE_STREAK = "absence_streak"
+    GRADE_DROP = "grade_drop"
+
+
+class StudentRiskFlag(Base):
+    __tablename__ = "student_risk_flags"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    student_id = Column(Integer, ForeignKey("students.id", ondelete="CASCADE"), nullable=False)
+    session_id = Column(Integer, ForeignKey("sessions.id", ondelete="CASCADE"), nullable=False)
+    flag = Column(Enum(RiskFlagEnum), nullable=False)
+    value = Column(Float, nullable=False)  # attendance rate, streak length or grade delta
+    detail = Column(String(255))
+    as_of = Column(Date, nullable=False)
+    flagged_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    # Relationships
+    student = relationship("Student")
+    
+    # Unique constraint
+    __table_args__ = (
+        UniqueConstraint('student_id', 'session_id', 'flag', name='unq_student_session_flag'),
+    )
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from core.db import Base
+
+
+class TeacherLoadRollup(Base):
+    """Teaching load snapshot per branch, session, month and teacher."""
+    __tablename__ = "teacher_load_rollups"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    branch_id = Column(Integer, ForeignKey("branches.id", ondelete="CASCADE"), nullable=False)
+    session_id = Column(Integer, ForeignKey("sessions.id", ondelete="CASCADE"))
+    month = Column(Date, nullable=False)
+    teacher_id = Column(UUID(as_uuid=True), ForeignKey("User.id", ondelete="CASCADE"), nullable=False)
+    classes = Column(Integer, nullable=False)
+    courses = Column(Integer, nullable=False)
+    students = Column(Integer, nullable=False)
+    built_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        UniqueConstraint('branch_id', 'session_id', 'month', 'teacher_id', name='unq_teacher_load_rollup'),
+    )
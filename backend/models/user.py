@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Integer, ForeignKey
+from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, Index, literal_column, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -10,17 +10,39 @@ class User(Base):
     __tablename__ = "User"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    email = Column(String(255), unique=True, nullable=False, index=True)
+    email = Column(String(255), nullable=False)  # Unique among users not soft-deleted (see below)
     password = Column(String(255), nullable=False)
     first_name = Column(String(255))
     last_name = Column(String(255))
     role = Column(String(50), nullable=False)  # 'teacher', 'admin', 'super_admin'
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     branch_id = Column(Integer, ForeignKey("branches.id", ondelete="SET NULL"))
+    deleted_at = Column(DateTime(timezone=True), nullable=True)  # Set when soft-deleted
     
     # Relationships
     branch = relationship("Branch", back_populates="users")
-    classes = relationship("Class", back_populates="class_teacher", foreign_keys="Class.class_teacher_id")
-    teacher_courses = relationship("TeacherCourse", back_populates="teacher", cascade="all, delete-orphan")
-    attendance_records = relationship("AttendanceRecord", back_populates="teacher")
+    classes = relationship("Class", back_populates="class_teacher", foreign_keys="Class.class_teacher_id", passive_deletes=True)
+    teacher_courses = relationship("TeacherCourse", back_populates="teacher", cascade="all, delete-orphan", passive_deletes=True)
+    attendance_records = relationship("AttendanceRecord", back_populates="teacher", passive_deletes=True)
+    
+    # Trigram indexes for fuzzy name/email search (requires CREATE EXTENSION pg_trgm)
+    __table_args__ = (
+        # A soft-deleted teacher's email can be registered again
+        Index(
+            "uq_user_email_active", "email", unique=True,
+            postgresql_where=text("deleted_at IS NULL"), sqlite_where=text("deleted_at IS NULL")
+        ),
+        Index("ix_user_first_name_trgm", "first_name", postgresql_using="gin", postgresql_ops={"first_name": "gin_trgm_ops"}),
+        Index("ix_user_last_name_trgm", "last_name", postgresql_using="gin", postgresql_ops={"last_name": "gin_trgm_ops"}),
+        Index("ix_user_email_trgm", "email", postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"}),
+    )
+
 
+# "first last" as teacher search matches it. Queries must use this exact
+# expression (not concat_ws, which isn't immutable) for the planner to use
+# the trigram index on it
+user_full_name = User.__table__.c.first_name + literal_column("' '") + User.__table__.c.last_name
+Index(
+    "ix_user_full_name_trgm", user_full_name.label("full_name"),
+    postgresql_using="gin", postgresql_ops={"full_name": "gin_trgm_ops"}
+)
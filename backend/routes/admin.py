@@ -1,15 +1,26 @@
+import uuid
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Body
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from sqlalchemy import select, update
-from core.db import get_db
-from core.auth import get_current_user, require_role, TokenData
+from sqlalchemy import select, update, delete, func, lambda_stmt
+from core.config import settings
+from core.db import hot_statement, after_commit
+from core.shards import get_branch_db, shard_for_branch, shards
+from core.sync import log_deletions
+from core.audit import log_cascade, audit_writer
+from core.admission import admission_stats
+from core.batch import BatchOperation, run_batch
+from core.coalesce import coalesced, single_flight
+from core.stale import stale_on_outage
+from core.auth import get_current_user, require_role, forget_user, TokenData
 
 from models.class_model import Class
 from models.user import User
 from models.student import Student
 from models.course import Course
+from models.exam import Exam
+from models.grade import Grade
 from models.class_course import ClassCourse
 from models.teacher_course import TeacherCourse
 from models.class_course import ClassCourse
@@ -17,7 +28,19 @@ from models.teacher_course import TeacherCourse
 from models.class_course import ClassCourse
 from models.teacher_course import TeacherCourse
 from models.attendance_record import AttendanceRecord, AttendanceStatusEnum
-from crud import classes_branch_router, teachers_branch_router
+from crud import (
+    classes_branch_router,
+    teachers_branch_router,
+    search_branch_router,
+    rollups_router,
+    profiles_router,
+    exports_router,
+    student_trends_router,
+    workload_router,
+    audit_router,
+)
+from crud.teachers_branch import teachers_by_branch
+from crud.student_trends import invalidate_shard_trends
 import bcrypt
 
 def get_password_hash(password):
@@ -32,6 +55,66 @@ router = APIRouter(prefix="/admin", tags=["admin"])
 # Include routers from crud module
 router.include_router(classes_branch_router)
 router.include_router(teachers_branch_router)
+router.include_router(search_branch_router)
+router.include_router(rollups_router)
+router.include_router(profiles_router)
+router.include_router(exports_router)
+router.include_router(student_trends_router)
+router.include_router(workload_router)
+router.include_router(audit_router)
+
+
+def parse_teacher_id(teacher_id: str, status_code: int = 404) -> uuid.UUID:
+    """A teacher id from the request; malformed ids are answered like unknown ones."""
+    try:
+        return uuid.UUID(teacher_id)
+    except ValueError:
+        raise HTTPException(status_code=status_code, detail="Teacher not found" if status_code == 404 else "Invalid teacher id")
+
+
+# Hot statements: built as lambda statements so SQLAlchemy caches the
+# compiled SQL instead of rebuilding the construct on every request.
+
+@hot_statement
+def course_by_id(course_id: int = 0):
+    return lambda_stmt(lambda: select(Course).where(Course.id == course_id))
+
+
+@hot_statement
+def courses_by_branch(branch_id: int = 0):
+    return lambda_stmt(lambda: select(Course).where(Course.branch_id == branch_id))
+
+
+@hot_statement
+def class_course_link(class_id: int = 0, course_id: int = 0):
+    return lambda_stmt(lambda: select(ClassCourse).where(
+        ClassCourse.class_id == class_id,
+        ClassCourse.course_id == course_id
+    ))
+
+
+@hot_statement
+def teacher_course_link(course_id: int = 0, class_id: int = 0, teacher_id: uuid.UUID = uuid.UUID(int=0)):
+    return lambda_stmt(lambda: select(TeacherCourse).where(
+        TeacherCourse.course_id == course_id,
+        TeacherCourse.class_id == class_id,
+        TeacherCourse.teacher_id == teacher_id
+    ))
+
+
+@hot_statement
+def teacher_homeroom_class(teacher_id: uuid.UUID = uuid.UUID(int=0)):
+    return lambda_stmt(lambda: select(Class).where(Class.class_teacher_id == teacher_id).limit(1))
+
+
+@hot_statement
+def teacher_course_names(teacher_id: uuid.UUID = uuid.UUID(int=0)):
+    return lambda_stmt(lambda: select(Course.name).join(
+        TeacherCourse, TeacherCourse.course_id == Course.id
+    ).where(
+        TeacherCourse.teacher_id == teacher_id
+    ))
+
 
 @router.get("/")
 def admin_root(current_user: TokenData = Depends(require_role(["admin", "super_admin"]))):
@@ -47,6 +130,20 @@ def admin_root(current_user: TokenData = Depends(require_role(["admin", "super_a
         }
     }
 
+@router.get("/coalescing_stats")
+def get_coalescing_stats(current_user: TokenData = Depends(require_role(["admin", "super_admin"]))):
+    """Per-route counts of executed, collapsed and timed-out coalesced requests"""
+    return single_flight.stats()
+
+@router.get("/runtime_stats")
+def get_runtime_stats(current_user: TokenData = Depends(require_role(["admin", "super_admin"]))):
+    """Circuit breakers per shard, admission lanes and the audit writer queue"""
+    return {
+        "database": {name: shard.breaker.stats() for name, shard in shards.items()},
+        "admission": admission_stats(),
+        "audit": audit_writer.stats()
+    }
+
 class TeacherAssignment(BaseModel):
     class_id: int
     teacher_id: Optional[str]
@@ -55,7 +152,7 @@ class TeacherAssignment(BaseModel):
 def assign_course(
     course_id: int,
     assignments: List[TeacherAssignment] = Body(...),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_branch_db),
     # current_user: TokenData = Depends(require_role(["admin", "super_admin"]))
 ):
     """
@@ -68,7 +165,7 @@ def assign_course(
     """
     
     # 1. Validate Course exists
-    course = db.execute(select(Course).where(Course.id == course_id)).scalar_one_or_none()
+    course = db.execute(course_by_id(course_id)).scalar_one_or_none()
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
 
@@ -81,9 +178,7 @@ def assign_course(
         
         # 2. Ensure ClassCourse exists
         # Check if exists
-        existing_cc = db.execute(
-            select(ClassCourse).where(ClassCourse.class_id == class_id, ClassCourse.course_id == course_id)
-        ).scalar_one_or_none()
+        existing_cc = db.execute(class_course_link(class_id, course_id)).scalar_one_or_none()
         
         if not existing_cc:
             new_cc = ClassCourse(class_id=class_id, course_id=course_id)
@@ -91,20 +186,22 @@ def assign_course(
             
         # 3. If teacher_id is valid, handle TeacherCourse
         if teacher_id:
+            teacher_uuid = parse_teacher_id(teacher_id, status_code=422)
+            active = db.execute(
+                select(User.id).where(User.id == teacher_uuid, User.role == "teacher", User.deleted_at.is_(None))
+            ).scalar_one_or_none()
+            if active is None:
+                raise HTTPException(status_code=404, detail=f"Teacher {teacher_id} not found")
             # Check if this specific teacher assignment exists
             existing_tc = db.execute(
-                select(TeacherCourse).where(
-                    TeacherCourse.course_id == course_id,
-                    TeacherCourse.class_id == class_id,
-                    TeacherCourse.teacher_id == teacher_id
-                )
+                teacher_course_link(course_id, class_id, teacher_uuid)
             ).scalar_one_or_none()
             
             if not existing_tc:
                 new_tc = TeacherCourse(
                     course_id=course_id,
                     class_id=class_id,
-                    teacher_id=teacher_id
+                    teacher_id=teacher_uuid
                 )
                 db.add(new_tc)
     
@@ -114,9 +211,11 @@ def assign_course(
 
 
 @router.get("/assign_course/{course_id}")
+@stale_on_outage
+@coalesced("course_assignments")
 def get_course_assignments(
     course_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_branch_db),
     # current_user: TokenData = Depends(require_role(["admin", "super_admin"]))
 ):
     """
@@ -148,9 +247,11 @@ def get_course_assignments(
 
 
 @router.get("/teacher_details/{branch_id}")
+@stale_on_outage
+@coalesced("teacher_details")
 def get_teacher_details(
     branch_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_branch_db),
     # current_user: TokenData = Depends(require_role(["super_admin"])) # As per requirements only super_admin usually sees passwords
 ):
     """
@@ -162,21 +263,17 @@ def get_teacher_details(
     """
     
     # Query teachers in this branch
-    teachers = db.query(User).filter(User.role == 'teacher', User.branch_id == branch_id).all()
+    teachers = db.execute(teachers_by_branch(branch_id)).scalars().all()
     
     result = []
     for teacher in teachers:
         # Get assigned class (where they are the class teacher)
-        class_obj = db.query(Class).filter(Class.class_teacher_id == teacher.id).first()
+        class_obj = db.execute(teacher_homeroom_class(teacher.id)).scalars().first()
         class_name = class_obj.name if class_obj else None
         
         # Get assigned courses
         # Join TeacherCourse -> Course
-        courses = db.query(Course.name).join(
-            TeacherCourse, TeacherCourse.course_id == Course.id
-        ).filter(
-            TeacherCourse.teacher_id == teacher.id
-        ).all()
+        courses = db.execute(teacher_course_names(teacher.id)).all()
         
         assigned_courses = [c[0] for c in courses] if courses else None
         
@@ -208,11 +305,12 @@ def create_teacher(
     email: str = Body(...),
     password: str = Body(...),
     role: str = Body(...),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_branch_db)
     # current_user: TokenData = Depends(require_role(["super_admin"]))
 ):
     # Check if email exists
-    if db.query(User).filter(User.email == email).first():
+    # Soft-deleted teachers keep their row but release their email
+    if db.query(User).filter(User.email == email, User.deleted_at.is_(None)).first():
         raise HTTPException(status_code=400, detail="Email already registered")
         
     hashed_password = get_password_hash(password)
@@ -244,29 +342,57 @@ def create_teacher(
 @router.delete("/delete-teacher/{teacher_id}")
 def delete_teacher(
     teacher_id: str,
-    db: Session = Depends(get_db)
+    soft: Optional[bool] = None,
+    db: Session = Depends(get_branch_db)
     # current_user: TokenData = Depends(require_role(["super_admin"]))
 ):
-    teacher = db.query(User).filter(User.id == teacher_id).first()
-    if not teacher:
+    """
+    Delete a teacher.
+    With soft=true (or TEACHER_SOFT_DELETE enabled) the row is only marked deleted
+    and hidden from listings, keeping their assignments and attendance history.
+    """
+    teacher_uuid = parse_teacher_id(teacher_id)
+    exists = db.execute(
+        select(User.id).where(User.id == teacher_uuid, User.deleted_at.is_(None))
+    ).scalar_one_or_none()
+    if not exists:
         raise HTTPException(status_code=404, detail="Teacher not found")
-        
-    # Cascading delete is handled by database constraints usually (User.id is foreign key)
-    # Models have ondelete="CASCADE" or "SET NULL"
-    # TeacherCourse -> ondelete="CASCADE" (User.id)
-    # Class -> ondelete="SET NULL" (class_teacher_id)
-    
-    db.delete(teacher)
+
+    if soft is None:
+        soft = settings.TEACHER_SOFT_DELETE
+
+    if soft:
+        db.execute(
+            update(User)
+            .where(User.id == teacher_uuid)
+            .values(deleted_at=func.now())
+        )
+    else:
+        # Unassign homeroom classes explicitly rather than leaving it to the FK's
+        # SET NULL, so their updated_at moves and delta sync picks the change up
+        db.execute(
+            update(Class)
+            .where(Class.class_teacher_id == teacher_uuid)
+            .values(class_teacher_id=None)
+        )
+        # Single DELETE; the database cascades via the FKs
+        # TeacherCourse -> ondelete="CASCADE" (User.id)
+        log_cascade(db, TeacherCourse.__tablename__, select(TeacherCourse.id, Course.branch_id).join(
+            Course, Course.id == TeacherCourse.course_id
+        ).where(TeacherCourse.teacher_id == teacher_uuid), f"User:{teacher_uuid}")
+        db.execute(delete(User).where(User.id == teacher_uuid))
     db.commit()
+    # Existing tokens of the teacher stop working right away
+    forget_user(teacher_uuid)
     
-    return {"message": "Teacher deleted successfully"}
+    return {"message": "Teacher deleted successfully", "soft": soft}
 
 
 @router.post("/assign-teacher")
 def assign_teacher(
     class_id: int,
     teacher_id: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_branch_db),
     # current_user: TokenData = Depends(require_role(["admin", "super_admin"]))
 ):
     # Ensure class exists
@@ -276,8 +402,9 @@ def assign_teacher(
         raise HTTPException(status_code=404, detail="Class not found")
 
     # Ensure teacher exists and is a teacher
+    teacher_uuid = parse_teacher_id(teacher_id)
     result = db.execute(
-        select(User).where(User.id == teacher_id, User.role == "teacher")
+        select(User).where(User.id == teacher_uuid, User.role == "teacher", User.deleted_at.is_(None))
     )
     teacher = result.scalar_one_or_none()
     if not teacher:
@@ -287,7 +414,7 @@ def assign_teacher(
     db.execute(
         update(Class)
         .where(Class.id == class_id)
-        .values(class_teacher_id=teacher_id)
+        .values(class_teacher_id=teacher_uuid)
     )
     db.commit()
 
@@ -298,7 +425,7 @@ def assign_teacher(
 def create_class(
     name: str,
     branch_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_branch_db),
     # current_user: TokenData = Depends(require_role(["admin", "super_admin"]))
 ):
     new_class = Class(
@@ -321,7 +448,7 @@ def create_class(
 @router.get("/class_students/{class_id}")
 def get_class_students(
     # class_id: int,
-    # db: Session = Depends(get_db),
+    # db: Session = Depends(get_branch_db),
     # current_user: TokenData = Depends(require_role(["admin", "super_admin"]))
     ):
 
@@ -337,7 +464,7 @@ def get_class_students(
 def promote_class(
     selectedClassId: int,  # Path parameter
     student_ids: List[str] = Body(),  # Request body parameter
-    # db: Session = Depends(get_db),
+    # db: Session = Depends(get_branch_db),
     # current_user: TokenData = Depends(require_role(["admin", "super_admin"]))
 ):
     # Now you can use both selectedClassId and student_ids
@@ -346,7 +473,7 @@ def promote_class(
 @router.get("/students_all/{branch_id}")
 def get_all_students(
     branch_id: int,
-    # db: Session = Depends(get_db),
+    # db: Session = Depends(get_branch_db),
     # current_user: TokenData = Depends(require_role(["admin", "super_admin"]))
 ):
     return [
@@ -365,7 +492,7 @@ def create_student(
     name: str = Body(...),
     dob: str = Body(...),
     class_id: int = Body(...),
-    # db: Session = Depends(get_db),
+    # db: Session = Depends(get_branch_db),
     # current_user: TokenData = Depends(require_role(["admin", "super_admin"]))
 ):
     return {
@@ -381,7 +508,7 @@ def create_student(
 def generate_report(
     student_ids: List[int] = Body(...),
     exam_ids: List[int] = Body(...),
-    # db: Session = Depends(get_db),
+    # db: Session = Depends(get_branch_db),
     # current_user: TokenData = Depends(require_role(["admin", "super_admin"]))
 ):
     # Mock data - in real implementation, this would query the database
@@ -415,31 +542,58 @@ def generate_report(
     return reports
 
 @router.get("/get_all_exams/{class_id}")
+@stale_on_outage
 def get_all_exams(
     class_id: int,
-    # db: Session = Depends(get_db),
+    db: Session = Depends(get_branch_db),
     # current_user: TokenData = Depends(require_role(["admin", "super_admin"]))
 ):
+    """
+    All exams of the courses taught in a class, with their grade summaries.
+    Summaries are read from Exam's precomputed columns, not aggregated here.
+    """
+    rows = db.execute(
+        select(
+            Exam.id,
+            Exam.name,
+            Exam.max_marks,
+            Exam.exam_date,
+            Exam.graded_count,
+            Exam.average_marks,
+            Exam.highest_marks,
+            Course.id,
+            Course.name
+        )
+        .join(ClassCourse, ClassCourse.course_id == Exam.course_id)
+        .join(Course, Course.id == Exam.course_id)
+        .where(ClassCourse.class_id == class_id)
+        .order_by(Exam.exam_date.desc().nulls_last(), Exam.id.desc())
+    ).all()
+
     return [
         {
-        "exam_id": 1,
-        "exam_name": "Quiz 2"
-        },
-        {
-        "exam_id": 2,
-        "exam_name": "Final Exam"
+            "exam_id": exam_id,
+            "exam_name": name,
+            "max_marks": max_marks,
+            "exam_date": exam_date,
+            "graded_count": graded_count,
+            "average_marks": round(average_marks, 2) if average_marks is not None else None,
+            "highest_marks": highest_marks,
+            "course_id": course_id,
+            "course_name": course_name
         }
+        for exam_id, name, max_marks, exam_date, graded_count, average_marks, highest_marks, course_id, course_name in rows
     ]
 
 @router.get("/get-courses/{branch_id}")
+@stale_on_outage
 def get_courses(
     branch_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_branch_db),
     # current_user: TokenData = Depends(require_role(["admin", "super_admin"]))
 ):
     """Get all courses for a specific branch"""
-    query = select(Course).where(Course.branch_id == branch_id)
-    result = db.execute(query)
+    result = db.execute(courses_by_branch(branch_id))
     courses = result.scalars().all()
     
     return courses
@@ -448,7 +602,7 @@ def get_courses(
 def add_course(
     branch_id: int,
     name: str = Body(..., embed=True),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_branch_db),
     # current_user: TokenData = Depends(require_role(["admin", "super_admin"]))
 ):
     """Add a new course"""
@@ -467,19 +621,102 @@ def add_course(
 @router.delete("/delete-course/{course_id}")
 def delete_course(
     course_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_branch_db),
     # current_user: TokenData = Depends(require_role(["admin", "super_admin"]))
 ):
     """Delete a course by ID"""
     
-    # Check if course exists
-    result = db.execute(select(Course).where(Course.id == course_id))
-    course = result.scalar_one_or_none()
+    # Tombstones for delta sync, including the exams the FK cascade removes
+    log_deletions(db, "exams", select(Exam.id, Course.branch_id).join(
+        Course, Course.id == Exam.course_id
+    ).where(Exam.course_id == course_id))
+    log_deletions(db, "courses", select(Course.id, Course.branch_id).where(Course.id == course_id))
+
+    # Audit the grades and assignments the cascade removes along with the course
+    cause = f"courses:{course_id}"
+    log_cascade(db, Grade.__tablename__, select(Grade.id, Course.branch_id).join(
+        Exam, Exam.id == Grade.exam_id
+    ).join(Course, Course.id == Exam.course_id).where(Course.id == course_id), cause)
+    for link in (ClassCourse, TeacherCourse):
+        log_cascade(db, link.__tablename__, select(link.id, Course.branch_id).join(
+            Course, Course.id == link.course_id
+        ).where(Course.id == course_id), cause)
+
+    # Issue a single DELETE and let Postgres cascade to exams, grades,
+    # teacher/class assignments instead of loading them into the session.
+    result = db.execute(delete(Course).where(Course.id == course_id))
     
-    if not course:
+    if result.rowcount == 0:
         raise HTTPException(status_code=404, detail="Course not found")
-        
-    db.delete(course)
+
+    # The course's grades are gone from every trend that showed them. Listing
+    # those students would cost a query over all the grades: drop the shard's
+    # trends instead, once the delete has committed (the batch commits later)
+    shard = db.shard
+    after_commit(db, lambda: invalidate_shard_trends(shard))
     db.commit()
     
-    return {"message": "Course deleted successfully"}
\ No newline at end of file
+    return {"message": "Course deleted successfully"}
+
+
+# Write handlers that can be combined in /admin/batch, by operation name
+BATCH_OPERATIONS = {
+    "create_class": create_class,
+    "assign_teacher": assign_teacher,
+    "assign_course": assign_course,
+    "create_teacher": create_teacher,
+    "delete_teacher": delete_teacher,
+    "add_course": add_course,
+    "delete_course": delete_course,
+}
+
+
+@router.post("/batch")
+def run_batch_operations(
+    operations: List[BatchOperation] = Body(..., embed=True),
+    branch_id: Optional[int] = None,
+    db: Session = Depends(get_branch_db),
+    current_user: TokenData = Depends(require_role(["admin", "super_admin"]))
+):
+    """
+    Run several write operations in one transaction, all-or-nothing.
+    With BRANCH_SHARDS set the batch runs on the shard of its `branch_id`
+    query parameter, and every operation must belong to that shard.
+    Admins can only touch their own branch; super_admin any branch. The
+    caller is handed to every handler that takes current_user.
+
+    Each operation names a handler from BATCH_OPERATIONS and passes its
+    arguments by parameter name. Giving an operation a "ref" lets later ones
+    use its result: "$ref" is the created id, "$ref.field" any returned field.
+
+        {"operations": [
+            {"op": "create_class", "ref": "cls", "args": {"name": "Grade 9", "branch_id": 1}},
+            {"op": "add_course", "ref": "math", "args": {"branch_id": 1, "name": "Math"}},
+            {"op": "assign_course", "args": {"course_id": "$math",
+                "assignments": [{"class_id": "$cls", "teacher_id": null}]}}
+        ]}
+    """
+    if len(operations) > settings.BATCH_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.BATCH_MAX_OPERATIONS} operations per batch"
+        )
+    own_branch_only = current_user.role != "super_admin"
+    if own_branch_only and branch_id is not None and branch_id != current_user.branch_id:
+        raise HTTPException(status_code=403, detail="Access denied to this branch")
+    for index, operation in enumerate(operations):
+        op_branch_id = operation.args.get("branch_id")
+        if not isinstance(op_branch_id, int):
+            continue
+        if own_branch_only and op_branch_id != current_user.branch_id:
+            raise HTTPException(
+                status_code=403,
+                detail={"index": index, "op": operation.op, "detail": "Access denied to this branch"}
+            )
+        if shard_for_branch(op_branch_id).name != db.shard:
+            raise HTTPException(
+                status_code=400,
+                detail={"index": index, "op": operation.op, "detail": "branch_id is on a different shard than the batch"}
+            )
+    results = run_batch(db, operations, BATCH_OPERATIONS, current_user)
+    return {"message": "Batch applied successfully", "count": len(results), "results": results}
@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+from fastapi import APIRouter, Depends, HTTPException, Body
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from sqlalchemy import select, inspect, tuple_
+from core.shards import get_branch_db
+from core.auth import require_role, TokenData
+from core.config import settings
+from core.sync import encode_mark, decode_mark
+
+from models.branch import Branch
+from models.class_model import Class
+from models.course import Course
+from models.student import Student
+from models.exam import Exam
+from models.deletion_log import DeletionLog
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+
+def _entity_query(entity: str, branch_id: int):
+    """Base select for one syncable entity, scoped to a branch."""
+    if entity == "branches":
+        return Branch, select(Branch).where(Branch.id == branch_id)
+    if entity == "classes":
+        return Class, select(Class).where(Class.branch_id == branch_id)
+    if entity == "courses":
+        return Course, select(Course).where(Course.branch_id == branch_id)
+    if entity == "students":
+        return Student, select(Student).where(Student.branch_id == branch_id)
+    if entity == "exams":
+        return Exam, select(Exam).join(Course, Course.id == Exam.course_id).where(Course.branch_id == branch_id)
+    raise HTTPException(status_code=400, detail=f"Unknown sync entity: {entity}")
+
+
+SYNC_ENTITIES = ["branches", "classes", "courses", "students", "exams"]
+
+
+def _row_to_dict(model, obj) -> dict:
+    return {attr.key: getattr(obj, attr.key) for attr in inspect(model).column_attrs}
+
+
+class SyncRequest(BaseModel):
+    # Per-entity marks from the previous response; missing/null means full snapshot.
+    # "deletions" carries the tombstone mark.
+    since: Dict[str, Optional[str]] = {}
+    limit: Optional[int] = None
+
+
+@router.post("/{branch_id}")
+def sync_branch(
+    branch_id: int,
+    request: SyncRequest = Body(SyncRequest()),
+    db: Session = Depends(get_branch_db),
+    current_user: TokenData = Depends(require_role(["admin", "super_admin"]))
+):
+    """
+    Delta sync for a branch.
+
+    Returns rows created or modified since each entity's mark, tombstones for
+    deleted rows, and the marks to send next time. Each entity returns at most
+    `limit` rows per call; `has_more` tells the client to call again.
+
+    Rows newer than SYNC_SAFETY_LAG_SECONDS are held back until the next call so
+    a transaction that commits late with an older updated_at is not skipped.
+
+    Admins can only sync their own branch; super_admin can sync any branch.
+    """
+    if current_user.role != "super_admin" and current_user.branch_id != branch_id:
+        raise HTTPException(status_code=403, detail="Access denied to this branch")
+
+    limit = min(request.limit or settings.SYNC_PAGE_SIZE, settings.SYNC_PAGE_SIZE)
+    upper = datetime.now(timezone.utc) - timedelta(seconds=settings.SYNC_SAFETY_LAG_SECONDS)
+
+    changes = {}
+    marks = {}
+    has_more = False
+
+    for entity in SYNC_ENTITIES:
+        model, query = _entity_query(entity, branch_id)
+        mark = decode_mark(request.since.get(entity))
+        query = query.where(model.updated_at <= upper)
+        if mark:
+            query = query.where(tuple_(model.updated_at, model.id) > tuple_(*mark))
+        rows = db.execute(
+            query.order_by(model.updated_at, model.id).limit(limit + 1)
+        ).scalars().all()
+
+        if len(rows) > limit:
+            has_more = True
+            rows = rows[:limit]
+        changes[entity] = [_row_to_dict(model, row) for row in rows]
+        marks[entity] = encode_mark(rows[-1].updated_at, rows[-1].id) if rows else request.since.get(entity)
+
+    # Tombstones
+    mark = decode_mark(request.since.get("deletions"))
+    query = select(DeletionLog).where(
+        DeletionLog.branch_id == branch_id,
+        DeletionLog.deleted_at <= upper
+    )
+    if mark:
+        query = query.where(tuple_(DeletionLog.deleted_at, DeletionLog.id) > tuple_(*mark))
+    tombstones = db.execute(
+        query.order_by(DeletionLog.deleted_at, DeletionLog.id).limit(limit + 1)
+    ).scalars().all()
+    if len(tombstones) > limit:
+        has_more = True
+        tombstones = tombstones[:limit]
+
+    deleted = {entity: [] for entity in SYNC_ENTITIES}
+    for tombstone in tombstones:
+        deleted.setdefault(tombstone.entity, []).append(tombstone.entity_id)
+    marks["deletions"] = (
+        encode_mark(tombstones[-1].deleted_at, tombstones[-1].id)
+        if tombstones else request.since.get("deletions")
+    )
+
+    return {
+        "branch_id": branch_id,
+        "changes": changes,
+        "deleted": deleted,
+        "marks": marks,
+        "has_more": has_more
+    }
@@ -1,8 +1,39 @@
-from fastapi import APIRouter, Depends
+import uuid
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Body
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func, or_, union
+from core.shards import get_branch_db
 from core.auth import get_current_user, require_role, TokenData
+from core.cache import TTLCache
+from core.stale import stale_on_outage
+from core.config import settings
+
+from models.class_model import Class
+from models.user import User
+from models.course import Course
+from models.student import Student
+from models.student_class import StudentClass, StudentStatusEnum
+from models.teacher_course import TeacherCourse
+from models.class_course import ClassCourse
+from models.attendance_record import AttendanceRecord, AttendanceStatusEnum
+from models.exam import Exam
+from models.grade import Grade
+from jobs.exam_summaries import refresh_exam_summaries
+from crud.student_trends import invalidate_student_trends
 
 router = APIRouter(prefix="/teacher", tags=["teacher"])
 
+# Dashboard payloads keyed by (shard name, teacher_id, date)
+dashboard_cache = TTLCache(ttl_seconds=settings.TEACHER_DASHBOARD_CACHE_TTL_SECONDS)
+
+
+def invalidate_teacher_dashboard(shard: str, teacher_id):
+    """Drop every cached dashboard for a teacher on a shard."""
+    dashboard_cache.invalidate_where(lambda key: key[:2] == (shard, str(teacher_id)))
+
 
 @router.get("/")
 async def teacher_root(current_user: TokenData = Depends(require_role(["teacher"]))):
@@ -18,3 +49,296 @@ async def teacher_root(current_user: TokenData = Depends(require_role(["teacher"
         }
     }
 
+
+def build_teacher_dashboard(db: Session, teacher_id: uuid.UUID, today: date) -> dict:
+    """
+    Build the dashboard payload for a teacher with a fixed number of queries,
+    independent of how many classes, courses or students are involved.
+    """
+    # 1. Classes where the teacher is the class teacher
+    homeroom_rows = db.execute(
+        select(Class.id, Class.name).where(Class.class_teacher_id == teacher_id)
+    ).all()
+
+    # 2. Courses the teacher teaches, with the class they teach it in
+    course_rows = db.execute(
+        select(Course.id, Course.name, TeacherCourse.class_id, Class.name)
+        .join(TeacherCourse, TeacherCourse.course_id == Course.id)
+        .outerjoin(Class, Class.id == TeacherCourse.class_id)
+        .where(TeacherCourse.teacher_id == teacher_id)
+        .order_by(Course.name)
+    ).all()
+
+    classes = {
+        class_id: {
+            "id": class_id,
+            "name": name,
+            "is_class_teacher": True,
+            "courses": [],
+            "students": [],
+            "attendance_today": {"submitted": False, "present": 0, "absent": 0},
+        }
+        for class_id, name in homeroom_rows
+    }
+    courses = []
+    for course_id, course_name, class_id, class_name in course_rows:
+        courses.append({
+            "id": course_id,
+            "name": course_name,
+            "class_id": class_id,
+            "class_name": class_name,
+        })
+        if class_id is None:
+            continue
+        if class_id not in classes:
+            classes[class_id] = {
+                "id": class_id,
+                "name": class_name,
+                "is_class_teacher": False,
+                "courses": [],
+                "students": [],
+                "attendance_today": {"submitted": False, "present": 0, "absent": 0},
+            }
+        classes[class_id]["courses"].append({"id": course_id, "name": course_name})
+
+    if classes:
+        class_ids = list(classes)
+
+        # 3. Active rosters for every class in one query
+        roster_rows = db.execute(
+            select(StudentClass.class_id, Student.id, Student.name)
+            .join(Student, Student.id == StudentClass.student_id)
+            .where(
+                StudentClass.class_id.in_(class_ids),
+                StudentClass.status == StudentStatusEnum.ACTIVE
+            )
+            .order_by(Student.name)
+        ).all()
+        for class_id, student_id, student_name in roster_rows:
+            classes[class_id]["students"].append({"id": student_id, "name": student_name})
+
+        # 4. Today's attendance counts per class
+        attendance_rows = db.execute(
+            select(AttendanceRecord.class_id, AttendanceRecord.status, func.count())
+            .where(
+                AttendanceRecord.class_id.in_(class_ids),
+                AttendanceRecord.date == today
+            )
+            .group_by(AttendanceRecord.class_id, AttendanceRecord.status)
+        ).all()
+        for class_id, status, count in attendance_rows:
+            summary = classes[class_id]["attendance_today"]
+            summary["submitted"] = True
+            summary[AttendanceStatusEnum(status).value] = count
+
+    return {
+        "teacher_id": str(teacher_id),
+        "date": today.isoformat(),
+        "classes": list(classes.values()),
+        "courses": courses,
+    }
+
+
+@router.get("/dashboard")
+@stale_on_outage
+def get_teacher_dashboard(
+    db: Session = Depends(get_branch_db),
+    current_user: TokenData = Depends(require_role(["teacher"]))
+):
+    """
+    Everything the teacher portal needs on login in a single response:
+    classes, courses, active rosters and today's attendance status.
+
+    Cached per teacher for TEACHER_DASHBOARD_CACHE_TTL_SECONDS and invalidated
+    when attendance is submitted for any of the teacher's classes.
+    """
+    teacher_id = uuid.UUID(current_user.id)
+    today = date.today()
+    return dashboard_cache.get_or_set(
+        (db.shard, str(teacher_id), today),
+        lambda: build_teacher_dashboard(db, teacher_id, today)
+    )
+
+
+class AttendanceEntry(BaseModel):
+    student_id: int
+    status: AttendanceStatusEnum
+
+
+@router.post("/attendance/{class_id}")
+def submit_attendance(
+    class_id: int,
+    records: List[AttendanceEntry] = Body(...),
+    attendance_date: Optional[date] = Body(None),
+    db: Session = Depends(get_branch_db),
+    current_user: TokenData = Depends(require_role(["teacher"]))
+):
+    """
+    Submit (or correct) attendance for a class on a given day, defaulting to today.
+    Existing records for the same student and day are updated in place.
+    """
+    teacher_id = uuid.UUID(current_user.id)
+    attendance_date = attendance_date or date.today()
+
+    # Teacher must be the class teacher or teach a course in this class
+    allowed = db.execute(
+        select(Class.id)
+        .outerjoin(TeacherCourse, TeacherCourse.class_id == Class.id)
+        .where(
+            Class.id == class_id,
+            or_(
+                Class.class_teacher_id == teacher_id,
+                TeacherCourse.teacher_id == teacher_id
+            )
+        )
+        .limit(1)
+    ).scalar_one_or_none()
+    if allowed is None:
+        raise HTTPException(status_code=403, detail="Not assigned to this class")
+
+    student_ids = [r.student_id for r in records]
+    if len(set(student_ids)) != len(student_ids):
+        raise HTTPException(status_code=422, detail="Each student may appear only once per submission")
+
+    enrolled = set(db.execute(
+        select(StudentClass.student_id).where(
+            StudentClass.class_id == class_id,
+            StudentClass.student_id.in_(student_ids)
+        )
+    ).scalars())
+    not_enrolled = sorted(set(student_ids) - enrolled)
+    if not_enrolled:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Students not enrolled in this class: {', '.join(map(str, not_enrolled))}"
+        )
+
+    existing = {
+        record.student_id: record
+        for record in db.execute(
+            select(AttendanceRecord).where(
+                AttendanceRecord.class_id == class_id,
+                AttendanceRecord.date == attendance_date,
+                AttendanceRecord.student_id.in_(student_ids)
+            )
+        ).scalars()
+    }
+
+    for entry in records:
+        record = existing.get(entry.student_id)
+        if record:
+            record.status = entry.status
+            record.teacher_id = teacher_id
+        else:
+            db.add(AttendanceRecord(
+                class_id=class_id,
+                student_id=entry.student_id,
+                date=attendance_date,
+                status=entry.status,
+                teacher_id=teacher_id
+            ))
+
+    # Everyone teaching this class sees its attendance status on their dashboard;
+    # soft-deleted teachers keep their links but have no dashboard
+    teaching = union(
+        select(Class.class_teacher_id.label("teacher_id")).where(Class.id == class_id, Class.class_teacher_id.is_not(None)),
+        select(TeacherCourse.teacher_id).where(TeacherCourse.class_id == class_id)
+    ).subquery()
+    class_teachers = set(db.execute(
+        select(teaching.c.teacher_id)
+        .join(User, User.id == teaching.c.teacher_id)
+        .where(User.deleted_at.is_(None))
+    ).scalars())
+
+    db.commit()
+    for class_teacher_id in class_teachers | {teacher_id}:
+        invalidate_teacher_dashboard(db.shard, class_teacher_id)
+    invalidate_student_trends(db.shard, student_ids)
+
+    return {"message": "Attendance submitted successfully", "count": len(records)}
+
+
+class GradeEntry(BaseModel):
+    student_id: int
+    marks_obtained: int
+
+
+@router.post("/grades/{exam_id}")
+def submit_grades(
+    exam_id: int,
+    grades: List[GradeEntry] = Body(..., embed=True),
+    db: Session = Depends(get_branch_db),
+    current_user: TokenData = Depends(require_role(["teacher"]))
+):
+    """
+    Enter (or correct) marks for an exam. Existing grades for the same student
+    are updated in place, and the exam's summary columns are refreshed in the
+    same transaction.
+    """
+    teacher_id = uuid.UUID(current_user.id)
+
+    # Lock the exam row so concurrent submissions for it refresh the summary in turn
+    exam = db.execute(
+        select(Exam).where(Exam.id == exam_id).with_for_update()
+    ).scalar_one_or_none()
+    if exam is None:
+        raise HTTPException(status_code=404, detail="Exam not found")
+
+    teaches = db.execute(
+        select(TeacherCourse.id)
+        .where(TeacherCourse.teacher_id == teacher_id, TeacherCourse.course_id == exam.course_id)
+        .limit(1)
+    ).scalar_one_or_none()
+    if teaches is None:
+        raise HTTPException(status_code=403, detail="Not assigned to this course")
+
+    student_ids = [g.student_id for g in grades]
+    if len(set(student_ids)) != len(student_ids):
+        raise HTTPException(status_code=422, detail="Each student may appear only once per submission")
+
+    for entry in grades:
+        if not 0 <= entry.marks_obtained <= exam.max_marks:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Marks for student {entry.student_id} must be between 0 and {exam.max_marks}"
+            )
+
+    # Exams belong to a course: only students of a class taking it can be graded
+    enrolled = set(db.execute(
+        select(StudentClass.student_id)
+        .join(ClassCourse, ClassCourse.class_id == StudentClass.class_id)
+        .where(
+            ClassCourse.course_id == exam.course_id,
+            StudentClass.student_id.in_(student_ids)
+        )
+    ).scalars())
+    not_enrolled = sorted(set(student_ids) - enrolled)
+    if not_enrolled:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Students not enrolled in this course: {', '.join(map(str, not_enrolled))}"
+        )
+
+    existing = {
+        grade.student_id: grade
+        for grade in db.execute(
+            select(Grade).where(
+                Grade.exam_id == exam_id,
+                Grade.student_id.in_(student_ids)
+            )
+        ).scalars()
+    }
+
+    for entry in grades:
+        grade = existing.get(entry.student_id)
+        if grade:
+            grade.marks_obtained = entry.marks_obtained
+        else:
+            db.add(Grade(exam_id=exam_id, student_id=entry.student_id, marks_obtained=entry.marks_obtained))
+
+    db.flush()
+    refresh_exam_summaries(db, [exam_id])
+    db.commit()
+    invalidate_student_trends(db.shard, student_ids)
+
+    return {"message": "Grades submitted successfully", "count": len(grades)}
@@ -0,0 +1,74 @@
+import os
+import sys
+import tempfile
+import uuid
+
+# Settings are read at import time: point the app at a throwaway SQLite
+# database before anything from the backend is imported
+_DB_DIR = tempfile.mkdtemp(prefix="bridge-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.sqlite')}"
+os.environ.setdefault("NEXTAUTH_SECRET", "test-secret")
+os.environ.setdefault("AUDIT_ENABLED", "false")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from jose import jwt
+
+import models
+from core.config import settings
+from core.db import Base, engine, SessionLocal, db_breaker
+
+
+@pytest.fixture
+def db():
+    """A session on a freshly created schema."""
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    db_breaker.record_success()
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def school(db):
+    """One branch with a class, a course taught in it by one teacher, and three enrolled students."""
+    db.add(models.Branch(id=1, name="Main"))
+    db.add(models.Session(id=1, name="2026", branch_id=1))
+    teacher = models.User(
+        email="teacher@example.com", password="x", first_name="Ada", last_name="Lovelace",
+        role="teacher", branch_id=1
+    )
+    db.add(teacher)
+    db.flush()
+    class_ = models.Class(name="Grade 8", branch_id=1, session_id=1, class_teacher_id=teacher.id)
+    course = models.Course(name="Math", branch_id=1, session_id=1)
+    db.add_all([class_, course])
+    db.flush()
+    db.add(models.TeacherCourse(teacher_id=teacher.id, course_id=course.id, class_id=class_.id))
+    db.add(models.ClassCourse(class_id=class_.id, course_id=course.id))
+    students = [models.Student(name=f"Student {i}", branch_id=1) for i in range(3)]
+    db.add_all(students)
+    db.flush()
+    for student in students:
+        db.add(models.StudentClass(student_id=student.id, class_id=class_.id))
+    db.commit()
+    return {
+        "teacher_id": teacher.id,
+        "class_id": class_.id,
+        "course_id": course.id,
+        "student_ids": [student.id for student in students],
+    }
+
+
+@pytest.fixture
+def auth_headers():
+    """Build an Authorization header carrying a signed token for a user."""
+    def build(user_id: uuid.UUID, role: str, branch_id: int = 1) -> dict:
+        token = jwt.encode(
+            {"id": str(user_id), "role": role, "branch_id": branch_id},
+            settings.NEXTAUTH_SECRET,
+            algorithm=settings.ALGORITHM
+        )
+        return {"Authorization": f"Bearer {token}"}
+    return build
@@ -0,0 +1,143 @@
+import asyncio
+import os
+import threading
+import time
+
+import httpx
+import pytest
+from fastapi import BackgroundTasks, FastAPI
+
+import core.admission as admission
+from core.admission import AdmissionControlMiddleware, _Lane
+
+
+@pytest.fixture
+def lanes(monkeypatch):
+    """One slot per class; heavy has room for one waiter for a short time."""
+    lanes = {
+        "critical": _Lane("critical", 1, 10, 1.0),
+        "default": _Lane("default", 1, 10, 1.0),
+        "heavy": _Lane("heavy", 1, 1, 0.1),
+    }
+    monkeypatch.setattr(admission, "lanes", lanes)
+    return lanes
+
+
+def test_full_heavy_lane_rejects_while_critical_is_served(lanes):
+    app = FastAPI()
+    report_gate = asyncio.Event()
+
+    @app.get("/admin/generate_report/{branch_id}")
+    async def report(branch_id: int):
+        await report_gate.wait()
+        return {"report": branch_id}
+
+    @app.get("/teacher/classes")
+    async def classes():
+        return {"classes": []}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=AdmissionControlMiddleware(app, retry_after=7))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            running = asyncio.create_task(client.get("/admin/generate_report/1"))
+            while lanes["heavy"].active == 0:
+                await asyncio.sleep(0.001)
+
+            # Queued behind the running report, then timed out
+            queued = asyncio.create_task(client.get("/admin/generate_report/2"))
+            while lanes["heavy"].waiting == 0:
+                await asyncio.sleep(0.001)
+            # Queue full: turned away immediately
+            overflow = await client.get("/admin/generate_report/3")
+            # Roll call is unaffected by the saturated heavy lane
+            critical = await client.get("/teacher/classes")
+
+            timed_out = await queued
+            report_gate.set()
+            return await running, timed_out, overflow, critical
+
+    running, timed_out, overflow, critical = asyncio.run(scenario())
+
+    assert critical.status_code == 200
+    for rejected in (overflow, timed_out):
+        assert rejected.status_code == 429
+        assert rejected.headers["Retry-After"] == "7"
+    assert running.status_code == 200
+    assert lanes["heavy"].stats == {"admitted": 1, "queued": 1, "rejected": 2}
+    assert lanes["heavy"].active == 0
+    assert lanes["critical"].stats["admitted"] == 1
+
+
+def test_background_task_does_not_hold_the_heavy_slot(lanes):
+    app = FastAPI()
+    export_gate = threading.Event()
+
+    @app.post("/admin/exports/{session_id}")
+    def start_export(session_id: int, background_tasks: BackgroundTasks):
+        background_tasks.add_task(export_gate.wait, 5)
+        return {"session_id": session_id}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=AdmissionControlMiddleware(app, retry_after=7))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            started = asyncio.create_task(client.post("/admin/exports/1"))
+            while lanes["heavy"].stats["admitted"] == 0 or lanes["heavy"].active:
+                await asyncio.sleep(0.001)
+            # The first export is still running in the background
+            assert not started.done()
+            second = await client.post("/admin/exports/2")
+            export_gate.set()
+            return await started, second
+
+    first, second = asyncio.run(scenario())
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert lanes["heavy"].stats["rejected"] == 0
+
+
+# BENCH_ADMISSION_REQUESTS=2000 pytest -s tests/test_admission.py prints the
+# roll call latency percentiles under a larger load
+ROLL_CALLS = int(os.environ.get("BENCH_ADMISSION_REQUESTS", "200"))
+HEAVY_SECONDS = 0.5
+
+
+def test_roll_call_p99_stays_low_while_heavy_requests_pile_up(monkeypatch):
+    # The configured limits, with a thread pool roll call would share with reports
+    monkeypatch.setattr(admission, "lanes", admission._build_lanes())
+    app = FastAPI()
+
+    @app.get("/admin/generate_report/{branch_id}")
+    def report(branch_id: int):
+        time.sleep(HEAVY_SECONDS)
+        return {"report": branch_id}
+
+    @app.post("/teacher/attendance/{class_id}")
+    def roll_call(class_id: int):
+        time.sleep(0.002)
+        return {"class_id": class_id}
+
+    async def timed(client, method, url):
+        started = time.perf_counter()
+        response = await client.request(method, url)
+        return response.status_code, time.perf_counter() - started
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=AdmissionControlMiddleware(app, retry_after=7))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            # Far more reports than the thread pool has threads
+            heavy = [asyncio.create_task(timed(client, "GET", f"/admin/generate_report/{i}")) for i in range(100)]
+            await asyncio.sleep(0.05)
+            calls = await asyncio.gather(*(timed(client, "POST", f"/teacher/attendance/{i}") for i in range(ROLL_CALLS)))
+            return calls, await asyncio.gather(*heavy)
+
+    calls, heavy = asyncio.run(scenario())
+
+    assert {status for status, _ in calls} == {200}
+    assert {status for status, _ in heavy} == {200, 429}
+    latencies = sorted(seconds for _, seconds in calls)
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    if "BENCH_ADMISSION_REQUESTS" in os.environ:
+        print(f"\nroll call under load: p50 {p50 * 1000:.1f} ms, p99 {p99 * 1000:.1f} ms over {len(latencies)} requests")
+    # No roll call ever waited behind a report
+    assert p99 < HEAVY_SECONDS
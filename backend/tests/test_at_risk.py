@@ -0,0 +1,119 @@
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from sqlalchemy import select
+
+from core.config import settings
+from jobs.at_risk import attendance_metrics, detect_all, detect_at_risk, grade_drops
+from models.attendance_record import AttendanceRecord
+from models.exam import Exam
+from models.grade import Grade
+from models.student_risk_flag import RiskFlagEnum, StudentRiskFlag
+
+
+def days(*offsets):
+    return np.array([np.datetime64("2026-03-01") + o for o in offsets], dtype="datetime64[D]")
+
+
+def test_attendance_metrics_per_student():
+    # Unsorted input; student 1 ends on three absences, student 2 on a present
+    students = np.array([2, 1, 1, 2, 1, 1, 2], dtype=np.int64)
+    when = days(0, 3, 0, 1, 1, 2, 2)
+    absent = np.array([True, True, False, True, True, True, False])
+
+    ids, rate, current, longest = attendance_metrics(students, when, absent)
+
+    assert ids.tolist() == [1, 2]
+    assert rate.tolist() == pytest.approx([0.25, 1 / 3])
+    assert current.tolist() == [3, 0]
+    assert longest.tolist() == [3, 2]
+
+
+def test_absence_streaks_do_not_carry_over_between_students():
+    # Student 1 ends absent, student 2 starts absent after a present day
+    students = np.array([1, 1, 2, 2, 2], dtype=np.int64)
+    when = days(0, 1, 0, 1, 2)
+    absent = np.array([True, True, True, False, True])
+
+    _, _, current, longest = attendance_metrics(students, when, absent)
+
+    assert current.tolist() == [2, 1]
+    assert longest.tolist() == [2, 1]
+
+
+def test_grade_drops_compare_the_last_two_exams_of_each_course():
+    students = np.array([1, 1, 1, 1, 1, 2, 3, 3], dtype=np.int64)
+    courses = np.array([10, 10, 10, 20, 20, 10, 10, 10], dtype=np.int64)
+    when = days(2, 0, 1, 0, 1, 0, 1, 0)
+    percents = np.array([40.0, 90.0, 80.0, 70.0, 75.0, 50.0, 60.0, 55.0])
+
+    ids, worst, course = grade_drops(students, courses, when, percents)
+
+    # Student 1: course 10 went 80 -> 40, course 20 rose; student 2 has one exam
+    assert ids.tolist() == [1, 3]
+    assert worst.tolist() == [-40.0, 5.0]
+    assert course.tolist() == [10, 10]
+
+
+def flags(db):
+    return sorted(
+        (row.student_id, row.flag) for row in db.execute(select(StudentRiskFlag)).scalars()
+    )
+
+
+@pytest.fixture
+def absent_week(db, school, monkeypatch):
+    monkeypatch.setattr(settings, "AT_RISK_SAFETY_LAG_SECONDS", 0)
+    today = date(2026, 3, 10)
+    student = school["student_ids"][0]
+    db.add_all([
+        AttendanceRecord(class_id=school["class_id"], student_id=student, date=today - timedelta(days=d), status="absent")
+        for d in range(4)
+    ])
+    db.commit()
+    return today, student
+
+
+def test_attendance_flags_clear_once_the_window_moves_past_them(db, absent_week):
+    today, student = absent_week
+    detect_at_risk(1, 1, today=today)
+    assert flags(db) == [(student, RiskFlagEnum.ABSENCE_STREAK), (student, RiskFlagEnum.LOW_ATTENDANCE)]
+
+    # No new rows, but the absences have aged out of the window
+    later = today + timedelta(days=settings.AT_RISK_WINDOW_DAYS + 5)
+    result = detect_at_risk(1, 1, today=later)
+    assert result["attendance_rows"] == 0
+    assert flags(db) == []
+
+
+def test_grade_drops_are_reevaluated_for_changed_students(db, school, monkeypatch):
+    monkeypatch.setattr(settings, "AT_RISK_SAFETY_LAG_SECONDS", 0)
+    student = school["student_ids"][1]
+    exams = [
+        Exam(course_id=school["course_id"], session_id=1, name=f"E{i}", max_marks=100, exam_date=date(2026, 2, 1 + i))
+        for i in range(2)
+    ]
+    db.add_all(exams)
+    db.flush()
+    earlier = datetime.now(timezone.utc) - timedelta(minutes=5)
+    db.add_all([
+        Grade(exam_id=exams[0].id, student_id=student, marks_obtained=90, updated_at=earlier),
+        Grade(exam_id=exams[1].id, student_id=student, marks_obtained=50, updated_at=earlier),
+    ])
+    db.commit()
+
+    assert detect_all(today=date(2026, 3, 1))[0]["grade_students_evaluated"] == 1
+    assert flags(db) == [(student, RiskFlagEnum.GRADE_DROP)]
+
+    # Nothing changed: the flag stays without re-reading the student
+    assert detect_at_risk(1, 1, today=date(2026, 3, 2))["grade_students_evaluated"] == 0
+    assert flags(db) == [(student, RiskFlagEnum.GRADE_DROP)]
+
+    # The second exam is corrected: the drop is gone
+    grade = db.execute(select(Grade).where(Grade.exam_id == exams[1].id)).scalar_one()
+    grade.marks_obtained = 88
+    grade.updated_at = datetime.now(timezone.utc)
+    db.commit()
+    assert detect_at_risk(1, 1, today=date(2026, 3, 3))["grade_students_evaluated"] == 1
+    assert flags(db) == []
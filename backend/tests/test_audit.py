@@ -0,0 +1,111 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, select
+
+import core.audit as audit
+import core.shards as sharding
+import main
+from core.audit import AuditContextMiddleware, audit_writer, install_audit
+from core.circuit import CircuitBreaker
+from core.config import settings
+from core.db import Base, SessionLocal
+from core.shards import Shard
+from models.audit_log import AuditLog
+from models.class_model import Class
+from models.exam import Exam
+from models.grade import Grade
+
+
+@pytest.fixture
+def audited(db, monkeypatch):
+    """Audit listeners on SessionLocal; main is imported first so it doesn't install its own."""
+    monkeypatch.setattr(settings, "AUDIT_ENABLED", True)
+    monkeypatch.setattr(audit_writer, "interval", 0.05)
+    install_audit(SessionLocal)
+    yield
+    for name, fn in (
+        ("after_flush", audit._after_flush),
+        ("do_orm_execute", audit._do_orm_execute),
+        ("after_commit", audit._after_commit),
+        ("after_rollback", audit._after_rollback),
+    ):
+        event.remove(SessionLocal, name, fn)
+    audit_writer.stop()
+
+
+def test_course_delete_audits_cascaded_rows_with_the_actor(db, school, audited, auth_headers):
+    exam = Exam(course_id=school["course_id"], session_id=1, name="Final", max_marks=100)
+    db.add(exam)
+    db.flush()
+    db.add_all([Grade(exam_id=exam.id, student_id=s, marks_obtained=50) for s in school["student_ids"][:2]])
+    db.commit()
+    audit_writer.stop()
+    db.execute(AuditLog.__table__.delete())
+    db.commit()
+
+    admin_id = uuid.uuid4()
+    client = TestClient(AuditContextMiddleware(main.app))
+    response = client.delete(
+        f"/admin/delete-course/{school['course_id']}", headers=auth_headers(admin_id, "admin")
+    )
+    assert response.status_code == 200
+    audit_writer.stop()
+
+    events = db.execute(select(AuditLog)).scalars().all()
+    by_entity = {}
+    for row in events:
+        by_entity.setdefault(row.entity, []).append(row)
+    assert {entity: len(rows) for entity, rows in by_entity.items()} == {
+        "courses": 1, "grades": 2, "class_courses": 1, "teacher_courses": 1
+    }
+    cause = f"courses:{school['course_id']}"
+    assert all(row.changes == {"cascade": cause} for row in by_entity["grades"])
+    assert {row.branch_id for row in by_entity["grades"]} == {1}
+
+    # One commit: the same actor and the same commit timestamp on every event
+    assert {row.actor_id for row in events} == {admin_id}
+    assert {row.actor_role for row in events} == {"admin"}
+    assert len({row.occurred_at for row in events}) == 1
+
+
+def test_batch_requires_an_admin_and_records_it_as_the_actor(db, school, audited, auth_headers):
+    client = TestClient(AuditContextMiddleware(main.app))
+    operations = {"operations": [
+        {"op": "create_class", "ref": "cls", "args": {"name": "Grade 9", "branch_id": 1}},
+        {"op": "assign_teacher", "args": {"class_id": "$cls", "teacher_id": str(school["teacher_id"])}},
+    ]}
+
+    assert client.post("/admin/batch", json=operations).status_code in (401, 403)
+    teacher = auth_headers(school["teacher_id"], "teacher")
+    assert client.post("/admin/batch", json=operations, headers=teacher).status_code == 403
+    # Admins stay inside their own branch
+    other_branch = auth_headers(school["teacher_id"], "admin", branch_id=2)
+    response = client.post("/admin/batch", json=operations, headers=other_branch)
+    assert response.status_code == 403
+    assert response.json()["detail"]["index"] == 0
+
+    admin_id = school["teacher_id"]
+    response = client.post("/admin/batch", json=operations, headers=auth_headers(admin_id, "admin"))
+    assert response.status_code == 200
+    audit_writer.stop()
+
+    events = db.execute(select(AuditLog).where(AuditLog.entity == "classes")).scalars().all()
+    assert {row.action for row in events} == {"create", "update"}
+    assert {row.actor_id for row in events} == {admin_id}
+
+
+def test_events_are_written_to_the_shard_that_committed_them(db, audited, monkeypatch, tmp_path):
+    north = create_engine(f"sqlite:///{tmp_path / 'north.sqlite'}")
+    Base.metadata.create_all(north)
+    monkeypatch.setitem(sharding.shards, "north", Shard("north", north, CircuitBreaker(3, 1.0), frozenset({2})))
+
+    with SessionLocal(bind=north, info={"shard": "north"}) as session:
+        session.add(Class(name="North 1", branch_id=2, session_id=1))
+        session.commit()
+    audit_writer.stop()
+
+    with north.connect() as conn:
+        assert conn.execute(select(AuditLog.entity, AuditLog.branch_id)).all() == [("classes", 2)]
+    assert db.execute(select(AuditLog)).first() is None
@@ -0,0 +1,121 @@
+import gzip
+import json
+import os
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from core.compression import CompressionMiddleware, choose_encoding
+from core.config import settings
+
+brotli = pytest.importorskip("brotli")
+
+BROWSER = "gzip, deflate, br, zstd"
+
+
+def test_brotli_is_preferred_when_offered():
+    assert choose_encoding(BROWSER) == "br"
+    assert choose_encoding("br;q=0.5, gzip") == "gzip"
+    assert choose_encoding("br;q=0, gzip;q=0.1") == "gzip"
+    assert choose_encoding("*") == "br"
+    assert choose_encoding("identity") is None
+    assert choose_encoding("") is None
+
+
+def teacher_details(teachers: int) -> list:
+    """Payload shaped like /admin/teacher_details."""
+    return [
+        {
+            "id": f"00000000-0000-0000-0000-{i:012d}",
+            "first_name": f"Teacher{i}",
+            "last_name": "Lovelace",
+            "email": f"teacher{i}@example.com",
+            "classes": [{"id": i * 3 + c, "name": f"Grade {c + 6}"} for c in range(3)],
+            "courses": ["Math", "Physics"],
+        }
+        for i in range(teachers)
+    ]
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    @app.get("/details/{teachers}")
+    def details(teachers: int):
+        return teacher_details(teachers)
+
+    @app.get("/bytes/{size}")
+    def padding(size: int):
+        return PlainTextResponse("x" * size)
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((json.dumps(teacher_details(5)) for _ in range(3)), media_type="application/json")
+
+    return TestClient(CompressionMiddleware(app, minimum_size=1024))
+
+
+def test_minimum_size_is_the_first_compressed_size(client):
+    below = client.get("/bytes/1023", headers={"Accept-Encoding": BROWSER})
+    assert "content-encoding" not in below.headers
+    assert below.headers["content-length"] == "1023"
+
+    at = client.get("/bytes/1024", headers={"Accept-Encoding": BROWSER})
+    assert at.headers["content-encoding"] == "br"
+    assert at.text == "x" * 1024
+
+
+def test_json_is_brotli_compressed(client):
+    response = client.get("/details/40", headers={"Accept-Encoding": BROWSER})
+    raw = json.dumps(teacher_details(40), separators=(",", ":")).encode()
+    assert len(raw) >= 1024
+    assert response.headers["content-encoding"] == "br"
+    assert "Accept-Encoding" in response.headers["vary"]
+    # httpx decodes br transparently; the wire size is the Content-Length
+    assert int(response.headers["content-length"]) < len(raw) / 4
+    assert response.json() == teacher_details(40)
+
+
+def test_streams_are_compressed_chunk_by_chunk(client):
+    response = client.get("/stream", headers={"Accept-Encoding": BROWSER})
+    assert response.headers["content-encoding"] == "br"
+    assert "content-length" not in response.headers
+    assert response.text == json.dumps(teacher_details(5)) * 3
+
+
+def test_the_app_compresses_with_its_configured_minimum(db, school):
+    import main
+    from models.class_model import Class
+
+    db.add_all([Class(name=f"Class {i}", branch_id=1, session_id=1) for i in range(60)])
+    db.commit()
+    client = TestClient(main.app)
+
+    assert "content-encoding" not in client.get("/", headers={"Accept-Encoding": BROWSER}).headers
+    response = client.get("/admin/classes/1", headers={"Accept-Encoding": BROWSER})
+    assert len(response.content) >= settings.COMPRESSION_MINIMUM_SIZE
+    assert response.headers["content-encoding"] == "br"
+
+
+# BENCH_COMPRESSION=1 pytest -s tests/test_compression.py prints wire size
+# and CPU time per response for gzip and brotli at the configured levels
+@pytest.mark.skipif(not os.environ.get("BENCH_COMPRESSION"), reason="set BENCH_COMPRESSION=1 to measure")
+@pytest.mark.parametrize("teachers", [1, 10, 100, 1000])
+def test_compression_benchmark(teachers):
+    raw = json.dumps(teacher_details(teachers)).encode()
+    rounds = 200
+
+    def measure(compress):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            out = compress(raw)
+        return len(out), (time.perf_counter() - started) / rounds * 1e6
+
+    gz, gz_us = measure(lambda b: gzip.compress(b, settings.GZIP_COMPRESSION_LEVEL))
+    br, br_us = measure(lambda b: brotli.compress(b, quality=settings.BROTLI_QUALITY))
+    sent = "compressed" if len(raw) >= settings.COMPRESSION_MINIMUM_SIZE else "sent as-is"
+    print(f"\n{len(raw):>8} B ({sent}): gzip {gz} B / {gz_us:.0f} us, br {br} B / {br_us:.0f} us")
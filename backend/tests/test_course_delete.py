@@ -0,0 +1,60 @@
+import os
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert
+
+from core.db import engine
+from models.exam import Exam
+from models.grade import Grade
+from models.student import Student
+
+# BENCH_COURSE_DELETE_GRADES=100000 pytest -s tests/test_course_delete.py
+# prints the time for a realistically sized course
+BENCH_GRADES = int(os.environ.get("BENCH_COURSE_DELETE_GRADES", "0"))
+
+
+def statements_deleting_course(db, school, grades: int):
+    """SQL sent to the database by DELETE /admin/delete-course for a course with this many grades."""
+    import main
+
+    students = max(1, grades // 10)
+    db.execute(insert(Student), [{"name": f"S{i}", "branch_id": 1} for i in range(students)])
+    exams = [Exam(course_id=school["course_id"], session_id=1, name=f"E{i}", max_marks=100) for i in range(10)]
+    db.add_all(exams)
+    db.flush()
+    first_student = school["student_ids"][-1] + 1
+    db.execute(insert(Grade), [
+        {"exam_id": exams[i % 10].id, "student_id": first_student + i // 10, "marks_obtained": 50}
+        for i in range(grades)
+    ])
+    db.commit()
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.split()[0:3])
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        started = time.perf_counter()
+        response = TestClient(main.app).delete(f"/admin/delete-course/{school['course_id']}")
+        elapsed = time.perf_counter() - started
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert response.status_code == 200
+    if BENCH_GRADES:
+        print(f"\ndelete-course with {grades} grades: {elapsed * 1000:.1f} ms, {len(statements)} statements")
+    return statements
+
+
+@pytest.mark.parametrize("grades", sorted({10, 2000, BENCH_GRADES} - {0}))
+def test_course_delete_is_one_statement_regardless_of_size(db, school, grades):
+    statements = statements_deleting_course(db, school, grades)
+
+    # Tombstones (INSERT ... SELECT), then a single DELETE left to the FK
+    # cascade: nothing is loaded row by row into the session
+    assert [s for s in statements if s[0] == "DELETE"] == [["DELETE", "FROM", "courses"]]
+    assert not any(s[0] == "SELECT" for s in statements)
+    assert len(statements) == 3
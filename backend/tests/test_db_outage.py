@@ -0,0 +1,126 @@
+"""
+DB stall harness for the circuit breaker and stale responses.
+
+StalledDatabase stands in for a sick Postgres at the driver boundary: once
+the pool is emptied, every new connection either fails (failover, refused
+connections) or is delayed (vacuum storm, saturated server) before being
+handed to SQLAlchemy.
+"""
+import sqlite3
+import time
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+
+from core.config import settings
+from core.db import db_breaker, engine, get_db
+
+
+class StalledDatabase:
+    def __init__(self, fail: bool = False, delay: float = 0.0):
+        self.fail = fail
+        self.delay = delay
+        self.connects = 0
+
+    def _on_connect(self, dialect, conn_rec, cargs, cparams):
+        self.connects += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            raise sqlite3.OperationalError("could not connect to server: Connection refused")
+        return None  # Connect normally after the delay
+
+    def __enter__(self):
+        # Drop pooled connections so the next checkout has to connect
+        engine.dispose()
+        event.listen(engine, "do_connect", self._on_connect)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine, "do_connect", self._on_connect)
+        engine.dispose()
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    monkeypatch.setattr(db_breaker, "failure_threshold", 3)
+    monkeypatch.setattr(db_breaker, "reset_seconds", 0.5)
+    db_breaker.record_success()
+    yield db_breaker
+    db_breaker.record_success()
+
+
+@pytest.fixture
+def client(db):
+    import main
+    return TestClient(main.app, raise_server_exceptions=False)
+
+
+def test_refused_connections_open_the_breaker_and_writes_fail_fast(client, breaker):
+    with StalledDatabase(fail=True) as stall:
+        for _ in range(breaker.failure_threshold):
+            response = client.post("/admin/add-course/1", json={"name": "Physics"})
+            assert response.status_code == 503
+        assert breaker.state == "open"
+
+        # Open circuit: rejected without even trying to connect
+        attempts = stall.connects
+        response = client.post("/admin/add-course/1", json={"name": "Physics"})
+        assert response.status_code == 503
+        assert int(response.headers["Retry-After"]) >= 1
+        assert stall.connects == attempts
+
+    # After reset_seconds one trial request goes through and closes the circuit
+    time.sleep(breaker.reset_seconds)
+    assert client.post("/admin/add-course/1", json={"name": "Physics"}).status_code == 200
+    assert breaker.state == "closed"
+
+
+def test_slow_checkouts_count_as_failures(client, breaker, monkeypatch):
+    monkeypatch.setattr(settings, "DB_BREAKER_SLOW_CHECKOUT_SECONDS", 0.05)
+    with StalledDatabase(delay=0.1):
+        for _ in range(breaker.failure_threshold):
+            # Served, but slowly enough to count against the database
+            assert client.get("/admin/get-courses/1").status_code == 200
+            engine.dispose()
+        assert breaker.state == "open"
+
+
+def test_cached_get_is_served_stale_while_database_is_down(client, breaker):
+    fresh = client.get("/admin/get-courses/1")
+    assert fresh.status_code == 200
+
+    with StalledDatabase(fail=True):
+        stale = client.get("/admin/get-courses/1")
+        assert stale.status_code == 200
+        assert stale.headers["X-Stale"] == "true"
+        assert stale.json() == fresh.json()
+
+        # Nothing cached for this URL: plain 503
+        assert client.get("/admin/get-courses/2").status_code == 503
+
+
+def test_query_errors_are_not_outages(breaker):
+    app = FastAPI()
+
+    @app.get("/broken")
+    def broken(db=Depends(get_db)):
+        return db.execute(text("SELECT no_such_column FROM no_such_table")).all()
+
+    broken_client = TestClient(app, raise_server_exceptions=False)
+    for _ in range(breaker.failure_threshold + 1):
+        assert broken_client.get("/broken").status_code == 500
+    assert breaker.state == "closed"
+    assert breaker.stats()["consecutive_failures"] == 0
+
+
+def test_app_starts_while_the_database_is_down(db, breaker):
+    import main
+
+    with StalledDatabase(fail=True):
+        # The lifespan's warm-up logs the outage instead of failing startup
+        with TestClient(main.app, raise_server_exceptions=False) as client:
+            assert client.get("/health").status_code == 200
+            assert client.post("/admin/add-course/1", json={"name": "Physics"}).status_code == 503
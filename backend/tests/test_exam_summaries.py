@@ -0,0 +1,126 @@
+import pytest
+from sqlalchemy import select, delete, func
+
+from models.exam import Exam
+from models.grade import Grade
+from models.student import Student
+from jobs.exam_summaries import refresh_exam_summaries
+
+
+@pytest.fixture
+def exams(db, school):
+    rows = [Exam(course_id=school["course_id"], session_id=1, name=name, max_marks=100) for name in ("Midterm", "Final")]
+    db.add_all(rows)
+    db.commit()
+    return [exam.id for exam in rows]
+
+
+def assert_matches_live(db, exam_ids):
+    """Stored summary columns equal aggregates computed from grades right now."""
+    db.expire_all()
+    for exam_id in exam_ids:
+        count, average, highest = db.execute(
+            select(func.count(Grade.id), func.avg(Grade.marks_obtained), func.max(Grade.marks_obtained))
+            .where(Grade.exam_id == exam_id)
+        ).one()
+        exam = db.get(Exam, exam_id)
+        assert exam.graded_count == count
+        assert exam.average_marks == (pytest.approx(average) if average is not None else None)
+        assert exam.highest_marks == highest
+
+
+def test_insert_update_delete(db, school, exams):
+    midterm, final = exams
+    s1, s2, s3 = school["student_ids"]
+
+    db.add_all([
+        Grade(exam_id=midterm, student_id=s1, marks_obtained=70),
+        Grade(exam_id=midterm, student_id=s2, marks_obtained=85),
+        Grade(exam_id=final, student_id=s3, marks_obtained=40),
+    ])
+    db.flush()
+    assert refresh_exam_summaries(db, exams) == 2
+    db.commit()
+    assert_matches_live(db, exams)
+    assert db.get(Exam, midterm).highest_marks == 85
+
+    grade = db.execute(select(Grade).where(Grade.exam_id == midterm, Grade.student_id == s2)).scalar_one()
+    grade.marks_obtained = 55
+    db.flush()
+    refresh_exam_summaries(db, [midterm])
+    db.commit()
+    assert_matches_live(db, exams)
+    assert db.get(Exam, midterm).highest_marks == 70
+
+    db.execute(delete(Grade).where(Grade.exam_id == final))
+    refresh_exam_summaries(db, [final])
+    db.commit()
+    assert_matches_live(db, exams)
+    exam = db.get(Exam, final)
+    assert (exam.graded_count, exam.average_marks, exam.highest_marks) == (0, None, None)
+
+
+def test_refresh_only_touches_given_exams(db, school, exams):
+    midterm, final = exams
+    db.add(Grade(exam_id=final, student_id=school["student_ids"][0], marks_obtained=90))
+    db.flush()
+    refresh_exam_summaries(db, [midterm])
+    db.commit()
+    db.expire_all()
+    assert db.get(Exam, final).graded_count == 0
+
+    # Backfill without ids repairs every exam
+    refresh_exam_summaries(db)
+    db.commit()
+    assert_matches_live(db, exams)
+
+
+def test_grade_write_path_keeps_summaries_current(db, school, exams, auth_headers):
+    from fastapi.testclient import TestClient
+    import main
+
+    client = TestClient(main.app)
+    headers = auth_headers(school["teacher_id"], "teacher")
+    midterm, _ = exams
+    s1, s2, _ = school["student_ids"]
+
+    response = client.post(f"/teacher/grades/{midterm}", headers=headers, json={"grades": [
+        {"student_id": s1, "marks_obtained": 60},
+        {"student_id": s2, "marks_obtained": 90},
+    ]})
+    assert response.status_code == 200
+    assert_matches_live(db, exams)
+
+    # Correction in place
+    response = client.post(f"/teacher/grades/{midterm}", headers=headers, json={"grades": [
+        {"student_id": s2, "marks_obtained": 30},
+    ]})
+    assert response.status_code == 200
+    assert_matches_live(db, exams)
+    assert db.get(Exam, midterm).highest_marks == 60
+
+    # A duplicate student is rejected before anything is written
+    response = client.post(f"/teacher/grades/{midterm}", headers=headers, json={"grades": [
+        {"student_id": s1, "marks_obtained": 10},
+        {"student_id": s1, "marks_obtained": 20},
+    ]})
+    assert response.status_code == 422
+    assert_matches_live(db, exams)
+
+    # So is a student outside the classes taking the exam's course
+    outsider = Student(name="Visitor", branch_id=1)
+    db.add(outsider)
+    db.commit()
+    response = client.post(f"/teacher/grades/{midterm}", headers=headers, json={"grades": [
+        {"student_id": s1, "marks_obtained": 70},
+        {"student_id": outsider.id, "marks_obtained": 70},
+    ]})
+    assert response.status_code == 400
+    assert str(outsider.id) in response.json()["detail"]
+    assert_matches_live(db, exams)
+    assert db.get(Exam, midterm).highest_marks == 60
+
+    listing = client.get(f"/admin/get_all_exams/{school['class_id']}").json()
+    by_id = {exam["exam_id"]: exam for exam in listing}
+    assert by_id[midterm]["graded_count"] == 2
+    assert by_id[midterm]["average_marks"] == 45.0
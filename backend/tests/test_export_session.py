@@ -0,0 +1,99 @@
+from datetime import date, datetime, timezone
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from sqlalchemy import update
+
+from core.config import settings
+from jobs.export_session import _arrow_type, _session_tables, export_session, session_dir
+from models.attendance_record import AttendanceRecord
+from models.exam import Exam
+from models.grade import Grade
+from models.student import Student
+from models.student_class import StudentClass
+
+
+def test_every_exported_column_has_a_parquet_type():
+    expected = {
+        ("grades", "marks_obtained"): pa.int64(),
+        ("grades", "updated_at"): pa.timestamp("us", tz="UTC"),
+        ("attendance_records", "date"): pa.date32(),
+        ("attendance_records", "status"): pa.string(),
+        ("attendance_records", "teacher_id"): pa.string(),
+        ("student_classes", "id"): pa.int64(),
+    }
+    seen = {}
+    for name, model, _, _ in _session_tables(1):
+        for column in model.__table__.columns:
+            seen[(name, column.name)] = _arrow_type(column.type)
+    assert {key: seen[key] for key in expected} == expected
+
+
+def read_part(tmp_path, table, part):
+    return pq.read_table(tmp_path / "branch_1" / "session_1" / table / part).to_pylist()
+
+
+@pytest.fixture
+def exported(db, school, tmp_path, monkeypatch):
+    # No lag: the test's own writes are immediately past the mark
+    monkeypatch.setattr(settings, "EXPORT_SAFETY_LAG_SECONDS", 0)
+    exam = Exam(course_id=school["course_id"], session_id=1, name="Midterm", max_marks=100)
+    db.add(exam)
+    db.flush()
+    earlier = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    db.add_all([
+        Grade(exam_id=exam.id, student_id=s, marks_obtained=40, updated_at=earlier)
+        for s in school["student_ids"]
+    ])
+    db.add(AttendanceRecord(
+        class_id=school["class_id"], student_id=school["student_ids"][0], date=date(2026, 1, 5),
+        status="present", updated_at=earlier
+    ))
+    db.commit()
+    return export_session(1, 1, output_dir=str(tmp_path))
+
+
+def test_first_run_exports_everything(exported, school, tmp_path):
+    assert session_dir(1, 1, str(tmp_path)) == str(tmp_path / "branch_1" / "session_1")
+    tables = exported["tables"]
+    assert tables["grades"]["last_rows"] == 3
+    assert tables["attendance_records"]["last_rows"] == 1
+    assert tables["student_classes"]["last_rows"] == 3
+    assert all(len(state["parts"]) == 1 for state in tables.values())
+
+
+def test_incremental_run_appends_only_new_and_changed_rows(exported, db, school, tmp_path):
+    corrected = school["student_ids"][1]
+    db.execute(
+        update(Grade).where(Grade.student_id == corrected)
+        .values(marks_obtained=75, updated_at=datetime.now(timezone.utc))
+    )
+    student = Student(name="Late joiner", branch_id=1)
+    db.add(student)
+    db.flush()
+    db.add(StudentClass(student_id=student.id, class_id=school["class_id"]))
+    db.commit()
+
+    manifest = export_session(1, 1, output_dir=str(tmp_path))
+    tables = manifest["tables"]
+
+    grades = tables["grades"]
+    assert len(grades["parts"]) == 2
+    assert [(r["student_id"], r["marks_obtained"]) for r in read_part(tmp_path, "grades", grades["parts"][-1])] == [
+        (corrected, 75)
+    ]
+    links = tables["student_classes"]
+    assert [r["student_id"] for r in read_part(tmp_path, "student_classes", links["parts"][-1])] == [student.id]
+    # Nothing changed: no new part
+    assert len(tables["attendance_records"]["parts"]) == 1
+    # Dimensions are snapshots, rewritten with the new student
+    assert len(tables["students"]["parts"]) == 1
+    assert tables["students"]["last_rows"] == 4
+
+    # A full run collapses every table back to one file
+    manifest = export_session(1, 1, incremental=False, output_dir=str(tmp_path))
+    assert manifest["tables"]["grades"]["last_rows"] == 3
+    assert all(len(state["parts"]) == 1 for state in manifest["tables"].values())
+    files = list((tmp_path / "branch_1" / "session_1" / "grades").glob("part-*.parquet"))
+    assert len(files) == 1
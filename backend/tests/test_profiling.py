@@ -0,0 +1,98 @@
+import asyncio
+import json
+import time
+import uuid
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import create_engine, event, text
+
+import core.profiling as profiling
+from core.profiling import ProfilingMiddleware, install_sql_timeline
+
+SUPER_ADMIN_ID = uuid.uuid4()
+
+
+@pytest.fixture
+def engines():
+    """Two databases standing in for the default engine and a shard's."""
+    engines = [create_engine("sqlite://"), create_engine("sqlite://")]
+    for engine in engines:
+        install_sql_timeline(engine)
+    yield engines
+    for engine in engines:
+        event.remove(engine, "before_cursor_execute", profiling._before_cursor_execute)
+        event.remove(engine, "after_cursor_execute", profiling._after_cursor_execute)
+
+
+@pytest.fixture
+def app(engines):
+    app = FastAPI()
+
+    @app.get("/report")
+    def report():
+        for i, engine in enumerate(engines):
+            with engine.connect() as conn:
+                conn.execute(text(f"SELECT {i + 1}"))
+        time.sleep(0.02)
+        return {"ok": True}
+
+    @app.get("/ping")
+    async def ping():
+        return {"pong": True}
+
+    return app
+
+
+def run(app, tmp_path, *requests):
+    async def scenario():
+        middleware = ProfilingMiddleware(app, header="X-Profile", output_dir=str(tmp_path), interval=0.002)
+        transport = httpx.ASGITransport(app=middleware)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(request(client) for request in requests))
+    return asyncio.run(scenario())
+
+
+def test_profile_records_sql_on_every_engine(app, tmp_path, auth_headers):
+    super_admin = {**auth_headers(SUPER_ADMIN_ID, "super_admin"), "X-Profile": "1"}
+    admin = {**auth_headers(SUPER_ADMIN_ID, "admin"), "X-Profile": "1"}
+
+    run(app, tmp_path, lambda c: c.get("/report", headers=admin))
+    assert list(tmp_path.iterdir()) == []
+
+    response, = run(app, tmp_path, lambda c: c.get("/report", headers=super_admin))
+    assert response.status_code == 200
+    capture, = [json.loads(path.read_text()) for path in tmp_path.iterdir()]
+    assert capture["status"] == 200
+    assert [s["statement"] for s in capture["sql"]["timeline"]] == ["SELECT 1", "SELECT 2"]
+    assert capture["profile"]["samples"] > 0
+
+
+def test_writing_a_profile_does_not_block_other_requests(app, tmp_path, auth_headers, monkeypatch):
+    save = ProfilingMiddleware._save
+
+    def slow_save(self, *args):
+        time.sleep(0.5)  # a slow disk
+        save(self, *args)
+
+    monkeypatch.setattr(ProfilingMiddleware, "_save", slow_save)
+    headers = {**auth_headers(SUPER_ADMIN_ID, "super_admin"), "X-Profile": "1"}
+    timings = {}
+
+    async def profiled(client):
+        return await client.get("/report", headers=headers)
+
+    async def ping_while_saving(client):
+        # Sent while the profile is being written; a blocked loop delays the wake-up itself
+        started = time.perf_counter()
+        await asyncio.sleep(0.2)
+        response = await client.get("/ping")
+        timings["ping"] = time.perf_counter() - started
+        return response
+
+    profiled_response, ping = run(app, tmp_path, profiled, ping_while_saving)
+    assert profiled_response.status_code == ping.status_code == 200
+    assert timings["ping"] < 0.4
+    assert len(list(tmp_path.iterdir())) == 1
+
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex
+
+from core.db import Base
+from crud.search_branch import pg_teacher_query, prefix_indexes
+from models.branch import Branch
+from models.user import User
+
+
+@pytest.fixture
+def client(db):
+    import main
+    prefix_indexes.clear()
+    yield TestClient(main.app)
+    prefix_indexes.clear()
+
+
+def test_pg_teacher_filter_uses_the_indexed_full_name_expression():
+    sql = str(pg_teacher_query(1, "Ada Love", 20).compile(dialect=postgresql.dialect()))
+    where = sql[sql.index("WHERE"):sql.index("ORDER BY")]
+    full_name = '"User".first_name || \' \' || "User".last_name'
+    assert f"{full_name} %% " in where
+    assert f"({full_name}) ILIKE" in where
+
+    index = next(ix for ix in User.__table__.indexes if ix.name == "ix_user_full_name_trgm")
+    ddl = str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+    assert ddl.endswith("USING gin ((first_name || ' ' || last_name) gin_trgm_ops)")
+
+
+@pytest.mark.skipif("TEST_POSTGRES_URL" not in os.environ, reason="needs a Postgres with pg_trgm")
+def test_pg_teacher_search_matches_across_first_and_last_name():
+    engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    Base.metadata.create_all(engine)
+    try:
+        with Session(engine) as db:
+            db.add(Branch(id=1, name="Main"))
+            db.add_all([
+                User(email="ada@example.com", password="x", first_name="Ada", last_name="Lovelace", role="teacher", branch_id=1),
+                User(email="bob@example.com", password="x", first_name="Bob", last_name="Lovell", role="teacher", branch_id=1),
+            ])
+            db.commit()
+            names = [row.last_name for row in db.execute(pg_teacher_query(1, "Ada Lovelace", 20))]
+            assert names[0] == "Lovelace"
+    finally:
+        Base.metadata.drop_all(engine)
+
+
+def test_fallback_search_finds_teachers_by_full_name(client, school):
+    response = client.get("/admin/search/1", params={"q": "Ada Love"})
+    assert response.status_code == 200
+    body = response.json()
+    assert [t["email"] for t in body["teachers"]] == ["teacher@example.com"]
+    assert body["students"] == []
+
+
+def test_fallback_search_filters_by_kind_and_skips_deleted_teachers(client, school):
+    response = client.get("/admin/search/1", params={"q": "student", "kind": "students", "limit": 2})
+    assert len(response.json()["students"]) == 2
+    assert response.json()["teachers"] == []
+
+    client.delete(f"/admin/delete-teacher/{school['teacher_id']}", params={"soft": True})
+    prefix_indexes.clear()
+    response = client.get("/admin/search/1", params={"q": "ada"})
+    assert response.json()["teachers"] == []
@@ -0,0 +1,97 @@
+import os
+import tempfile
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, select
+
+import core.shards as sharding
+import models
+from core.circuit import CircuitBreaker
+from core.db import Base, SessionLocal
+from core.shards import Shard, install_user_directory
+
+
+@pytest.fixture
+def north(db, monkeypatch):
+    """Branch 2 routed to its own SQLite database, with the user directory installed."""
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bridge-shard-'), 'north.sqlite')}"
+    bind = create_engine(url)
+    Base.metadata.create_all(bind)
+    shard = Shard(url, bind, CircuitBreaker(3, 1.0), frozenset({2}))
+    monkeypatch.setattr(sharding, "shards", {**sharding.shards, url: shard})
+    monkeypatch.setattr(sharding, "_shard_by_branch", {2: shard})
+
+    install_user_directory(SessionLocal)
+    with SessionLocal(bind=bind) as session:
+        session.add(models.Branch(id=2, name="North"))
+        session.add(models.Session(id=2, name="2026", branch_id=2))
+        session.add(models.Course(name="North Math", branch_id=2, session_id=2))
+        session.commit()
+    yield shard
+    for name, fn in (
+        ("after_flush", sharding._track_flushed_users),
+        ("do_orm_execute", sharding._track_bulk_users),
+        ("after_commit", sharding._copy_users_to_directory),
+        ("after_rollback", sharding._discard_tracked_users),
+    ):
+        event.remove(SessionLocal, name, fn)
+    bind.dispose()
+
+
+@pytest.fixture
+def client(db):
+    import main
+    return TestClient(main.app)
+
+
+def test_id_keyed_routes_need_a_branch(client, db, school, north):
+    response = client.get(f"/admin/assign_course/{school['course_id']}")
+    assert response.status_code == 400
+
+    # The query parameter picks the shard; the North database has its own course 1
+    response = client.delete("/admin/delete-course/1", params={"branch_id": 2})
+    assert response.status_code == 200
+    with SessionLocal(bind=north.bind) as session:
+        assert session.scalar(select(models.Course).where(models.Course.id == 1)) is None
+    assert db.get(models.Course, school["course_id"]) is not None
+
+
+def test_create_class_uses_its_branch_query_parameter(client, school, north):
+    response = client.post("/admin/create-class", params={"name": "Grade 1", "branch_id": 2})
+    assert response.status_code == 200
+    with SessionLocal(bind=north.bind) as session:
+        assert session.scalar(select(models.Class.name)) == "Grade 1"
+
+
+def test_shard_teachers_are_copied_to_the_directory(client, db, north):
+    def directory_entry(email):
+        db.expire_all()
+        return db.scalar(select(models.User).where(models.User.email == email))
+
+    for email, soft in (("grace@example.com", True), ("alan@example.com", False)):
+        response = client.post("/admin/create-teacher/2", json={
+            "first_name": "Teacher", "last_name": "North", "email": email,
+            "password": "secret", "role": "teacher"
+        })
+        assert response.status_code == 200
+        teacher_id = response.json()["id"]
+        copied = directory_entry(email)
+        assert (str(copied.id), copied.branch_id) == (teacher_id, 2)
+
+        # Deletes are bulk statements, outside the flush
+        response = client.delete(f"/admin/delete-teacher/{teacher_id}", params={"branch_id": 2, "soft": soft})
+        assert response.status_code == 200
+        if soft:
+            assert directory_entry(email).deleted_at is not None
+        else:
+            assert directory_entry(email) is None
+
+
+def test_batch_rejects_operations_on_another_shard(client, school, north, auth_headers):
+    headers = auth_headers(school["teacher_id"], "super_admin")
+    response = client.post("/admin/batch", params={"branch_id": 1}, headers=headers, json={"operations": [
+        {"op": "create_class", "args": {"name": "Grade 9", "branch_id": 2}}
+    ]})
+    assert response.status_code == 400
+    assert response.json()["detail"]["index"] == 0
@@ -0,0 +1,98 @@
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from core.sql import month_start
+from crud.student_trends import trend_cache
+from models.attendance_record import AttendanceRecord, AttendanceStatusEnum
+from models.exam import Exam
+from models.grade import Grade
+
+
+def test_month_start_compiles_per_dialect():
+    query = select(month_start(AttendanceRecord.date))
+    assert "date_trunc('month', attendance_records.date)" in str(query.compile(dialect=postgresql.dialect()))
+
+
+def test_trends_bucket_attendance_by_month(db, school, auth_headers):
+    import main
+
+    student = school["student_ids"][0]
+    db.add_all([
+        AttendanceRecord(class_id=school["class_id"], student_id=student, date=day, status=status)
+        for day, status in (
+            (date(2026, 3, 2), AttendanceStatusEnum.PRESENT),
+            (date(2026, 3, 31), AttendanceStatusEnum.ABSENT),
+            (date(2026, 4, 1), AttendanceStatusEnum.PRESENT),
+        )
+    ])
+    exam = Exam(course_id=school["course_id"], session_id=1, name="Quiz", max_marks=50, exam_date=date(2026, 3, 10))
+    db.add(exam)
+    db.flush()
+    db.add(Grade(exam_id=exam.id, student_id=student, marks_obtained=40))
+    db.commit()
+
+    response = TestClient(main.app).get(
+        f"/admin/students/{student}/trends", headers=auth_headers(school["teacher_id"], "teacher")
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert [(m["month"], m["present"], m["absent"]) for m in body["attendance"]] == [
+        ("2026-03", 1, 1), ("2026-04", 1, 0)
+    ]
+    assert body["courses"][0]["exams"][0]["percent"] == 80.0
+
+
+@pytest.fixture
+def client(db):
+    import main
+    trend_cache.clear()
+    yield TestClient(main.app)
+    trend_cache.clear()
+
+
+def course_names(client, student, headers):
+    body = client.get(f"/admin/students/{student}/trends", headers=headers).json()
+    return [course["course_name"] for course in body["courses"]]
+
+
+def graded_student(db, school):
+    student = school["student_ids"][0]
+    exam = Exam(course_id=school["course_id"], session_id=1, name="Quiz", max_marks=50, exam_date=date(2026, 3, 10))
+    db.add(exam)
+    db.flush()
+    db.add(Grade(exam_id=exam.id, student_id=student, marks_obtained=40))
+    db.commit()
+    return student
+
+
+def test_deleting_a_course_drops_it_from_cached_trends(db, school, auth_headers, client):
+    headers = auth_headers(school["teacher_id"], "admin")
+    student = graded_student(db, school)
+    assert course_names(client, student, headers) == ["Math"]
+
+    assert client.delete(f"/admin/delete-course/{school['course_id']}", headers=headers).status_code == 200
+    assert course_names(client, student, headers) == []
+
+
+def test_deleting_a_course_in_a_batch_drops_it_once_committed(db, school, auth_headers, client):
+    headers = auth_headers(school["teacher_id"], "admin")
+    student = graded_student(db, school)
+    assert course_names(client, student, headers) == ["Math"]
+
+    # The second operation fails: the batch rolls back and the cached trends still hold
+    failing = client.post("/admin/batch", headers=headers, json={"operations": [
+        {"op": "delete_course", "args": {"course_id": school["course_id"]}},
+        {"op": "delete_course", "args": {"course_id": 999999}},
+    ]})
+    assert failing.status_code == 404
+    assert course_names(client, student, headers) == ["Math"]
+
+    response = client.post("/admin/batch", headers=headers, json={"operations": [
+        {"op": "delete_course", "args": {"course_id": school["course_id"]}},
+    ]})
+    assert response.status_code == 200
+    assert course_names(client, student, headers) == []
@@ -0,0 +1,42 @@
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client(db):
+    import main
+    return TestClient(main.app)
+
+
+def test_malformed_teacher_ids_are_not_server_errors(client, school):
+    assert client.delete("/admin/delete-teacher/not-a-uuid").status_code == 404
+    assert client.post("/admin/assign-teacher", params={
+        "class_id": school["class_id"], "teacher_id": "not-a-uuid"
+    }).status_code == 404
+    response = client.post(f"/admin/assign_course/{school['course_id']}", json=[
+        {"class_id": school["class_id"], "teacher_id": "not-a-uuid"}
+    ])
+    assert response.status_code == 422
+
+
+def test_soft_deleted_teacher_loses_access_and_frees_the_email(client, school, auth_headers):
+    headers = auth_headers(school["teacher_id"], "teacher")
+    assert client.get("/teacher/dashboard", headers=headers).status_code == 200
+
+    response = client.delete(f"/admin/delete-teacher/{school['teacher_id']}", params={"soft": True})
+    assert response.status_code == 200
+
+    # The still-valid token of the deleted teacher is refused everywhere
+    assert client.get("/teacher/dashboard", headers=headers).status_code == 401
+    response = client.post(f"/teacher/attendance/{school['class_id']}", headers=headers, json={
+        "records": [{"student_id": school["student_ids"][0], "status": "present"}]
+    })
+    assert response.status_code == 401
+
+    # ...and the email can be given to a new account
+    response = client.post("/admin/create-teacher/1", json={
+        "first_name": "Ada", "last_name": "Lovelace", "email": "teacher@example.com",
+        "password": "secret", "role": "teacher"
+    })
+    assert response.status_code == 200
+    assert response.json()["id"] != str(school["teacher_id"])
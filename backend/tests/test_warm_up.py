@@ -0,0 +1,77 @@
+import os
+import statistics
+import subprocess
+import sys
+import textwrap
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine.default import CACHE_HIT
+
+import main  # noqa: F401  (registers the routes' hot statements)
+from core.db import Base, hot_statements, warm_up
+
+
+def test_warm_up_compiles_hot_statements_on_every_engine(tmp_path):
+    # Two shard databases: each engine keeps its own compiled cache
+    engines = [create_engine(f"sqlite:///{tmp_path / f'shard{i}.sqlite'}") for i in range(2)]
+    for engine in engines:
+        Base.metadata.create_all(engine)
+
+    warm_up(2, engines)
+
+    for engine in engines:
+        hits = []
+        event.listen(engine, "after_cursor_execute", lambda *args: hits.append(args[4].cache_hit == CACHE_HIT))
+        with engine.connect() as conn:
+            for builder in hot_statements:
+                conn.execute(builder()).all()
+        assert len(hits) == len(hot_statements) and all(hits)
+
+
+def test_warm_up_skips_a_database_that_is_down(tmp_path):
+    up = create_engine(f"sqlite:///{tmp_path / 'up.sqlite'}")
+    Base.metadata.create_all(up)
+    down = create_engine(f"sqlite:///{tmp_path / 'missing' / 'down.sqlite'}")
+
+    warm_up(1, [down, up])
+
+    assert up.pool.checkedin() == 1
+
+
+# BENCH_COLD_START_RUNS=10 pytest -s tests/test_warm_up.py starts the app in
+# fresh processes and prints the p50 latency of the first request, with and
+# without the startup warm-up
+COLD_START_RUNS = int(os.environ.get("BENCH_COLD_START_RUNS", "0"))
+
+FIRST_REQUEST = textwrap.dedent("""
+    import time
+    from fastapi.testclient import TestClient
+    import main
+    from core.db import Base, engine
+    Base.metadata.create_all(engine)
+    client = TestClient(main.app)
+    if {warm}:
+        client.__enter__()  # runs the lifespan, warm-up included
+    started = time.perf_counter()
+    assert client.get("/admin/classes/1").status_code == 200
+    print(time.perf_counter() - started)
+""")
+
+
+@pytest.mark.skipif(not COLD_START_RUNS, reason="set BENCH_COLD_START_RUNS to measure")
+def test_cold_start_first_request_p50(tmp_path):
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path / 'cold.sqlite'}"}
+
+    def first_request(warm: bool) -> float:
+        out = subprocess.run(
+            [sys.executable, "-c", FIRST_REQUEST.format(warm=warm)],
+            cwd=backend, env=env, capture_output=True, text=True, check=True
+        )
+        return float(out.stdout.strip().splitlines()[-1])
+
+    cold = statistics.median(first_request(False) for _ in range(COLD_START_RUNS))
+    warm = statistics.median(first_request(True) for _ in range(COLD_START_RUNS))
+    print(f"\nfirst request p50 over {COLD_START_RUNS} starts: {cold * 1000:.1f} ms cold, {warm * 1000:.1f} ms warmed")
+    assert warm < cold
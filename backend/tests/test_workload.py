@@ -0,0 +1,121 @@
+import os
+import time
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert, select
+
+import models
+from core.db import engine
+from models.attendance_record import AttendanceRecord, AttendanceStatusEnum
+
+
+def test_workload_names_and_compliance_stay_in_branch(db, school):
+    import main
+
+    teacher = db.get(models.User, school["teacher_id"])
+    teacher.last_name = None
+
+    # Attendance taken on the same day in another branch must not count
+    db.add(models.Branch(id=2, name="North"))
+    db.add(models.Session(id=2, name="2026", branch_id=2))
+    db.flush()
+    other = models.Class(name="Grade 8", branch_id=2, session_id=2)
+    db.add(other)
+    db.flush()
+
+    today = date.today()
+    school_day = today - timedelta(days=max(0, today.weekday() - 4))
+    student = school["student_ids"][0]
+    db.add(AttendanceRecord(class_id=school["class_id"], student_id=student, date=school_day,
+                            status=AttendanceStatusEnum.PRESENT))
+    db.add(AttendanceRecord(class_id=other.id, student_id=student, date=school_day,
+                            status=AttendanceStatusEnum.PRESENT))
+    db.commit()
+
+    response = TestClient(main.app).get("/admin/workload/1")
+    assert response.status_code == 200
+    (row,) = response.json()["teachers"]
+    assert row["name"] == "Ada"
+    assert row["attendance_days_taken"] == 1
+
+    assert TestClient(main.app).get("/admin/workload/1", params={"q": "ada"}).json()["total"] == 1
+
+
+def add_teacher(db, email, first_name="T", last_name=None):
+    teacher = models.User(email=email, password="x", first_name=first_name, last_name=last_name, role="teacher", branch_id=1)
+    db.add(teacher)
+    return teacher
+
+
+def test_search_text_is_matched_literally(db, school):
+    import main
+
+    add_teacher(db, "a_b@example.com")
+    add_teacher(db, "axb@example.com")
+    db.commit()
+    client = TestClient(main.app)
+
+    emails = [t["email"] for t in client.get("/admin/workload/1", params={"q": "a_b"}).json()["teachers"]]
+    assert emails == ["a_b@example.com"]
+    assert client.get("/admin/workload/1", params={"q": "%"}).json()["total"] == 0
+
+
+def test_total_is_counted_for_a_page_past_the_end(db, school):
+    import main
+
+    response = TestClient(main.app).get("/admin/workload/1", params={"offset": 10})
+    assert response.json()["teachers"] == []
+    assert response.json()["total"] == 1
+
+
+# BENCH_WORKLOAD_TEACHERS=500 pytest -s tests/test_workload.py prints the
+# time for a branch of that many teachers with a homeroom class each
+BENCH_TEACHERS = int(os.environ.get("BENCH_WORKLOAD_TEACHERS", "0"))
+
+
+@pytest.mark.parametrize("teachers", sorted({20, BENCH_TEACHERS} - {0}))
+def test_workload_is_one_statement_regardless_of_size(db, school, teachers):
+    import main
+
+    students_per_class = 20
+    weeks = 4
+    today = date.today()
+    days = [today - timedelta(days=d) for d in range(weeks * 7)]
+    for i in range(teachers):
+        teacher = add_teacher(db, f"t{i}@example.com", f"Teacher{i}", "Bench")
+        db.flush()
+        db.add(models.Class(name=f"C{i}", branch_id=1, session_id=1, class_teacher_id=teacher.id))
+    db.flush()
+    class_ids = db.execute(select(models.Class.id).where(models.Class.name.like("C%"))).scalars().all()
+    db.execute(insert(models.Student), [{"name": f"Bench {i}", "branch_id": 1} for i in range(students_per_class)])
+    student_ids = db.execute(select(models.Student.id).where(models.Student.name.like("Bench %"))).scalars().all()
+    db.execute(insert(models.StudentClass), [
+        {"student_id": s, "class_id": c} for c in class_ids for s in student_ids
+    ])
+    db.execute(insert(AttendanceRecord), [
+        {"class_id": c, "student_id": s, "date": day, "status": AttendanceStatusEnum.PRESENT}
+        for c in class_ids for s in student_ids for day in days if day.weekday() < 5
+    ])
+    db.commit()
+
+    statements = []
+    record = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        started = time.perf_counter()
+        response = TestClient(main.app).get("/admin/workload/1", params={
+            "weeks": weeks, "sort": "students", "order": "desc", "limit": 50
+        })
+        elapsed = time.perf_counter() - started
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == teachers + 1
+    assert body["teachers"][0]["students"] == students_per_class
+    assert len(statements) == 1
+    if BENCH_TEACHERS:
+        print(f"\nworkload for {teachers} teachers: {elapsed * 1000:.1f} ms")
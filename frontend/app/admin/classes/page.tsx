@@ -3,6 +3,7 @@
 import { useEffect, useState } from "react"
 import Link from "next/link"
 import { useBranch } from "@/contexts/branch-context"
+import { useBackendFetch } from "@/lib/backendFetch"
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card"
 import { Avatar, AvatarFallback, AvatarImage } from "@/components/ui/avatar"
 import { Button } from "@/components/ui/button"
@@ -65,6 +66,7 @@ export default function ClassesPage() {
   const [dialogOpen, setDialogOpen] = useState(false)
   const [newClassName, setNewClassName] = useState("")
   const backend_url = process.env.NEXT_PUBLIC_BACKEND_URL;
+  const backendFetch = useBackendFetch();
 
   // Fetch classes and teachers
   useEffect(() => {
@@ -107,7 +109,7 @@ export default function ClassesPage() {
 
     try {
       setCreating(true)
-      const response = await fetch(`${backend_url}/admin/create-class?name=${newClassName.trim()}&branch_id=${currentBranchId}`, {
+      const response = await backendFetch(`${backend_url}/admin/create-class?name=${newClassName.trim()}&branch_id=${currentBranchId}`, {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
@@ -136,7 +138,7 @@ export default function ClassesPage() {
   const handleAssignTeacher = async (classId: number, teacherId: string | null) => {
     try {
       setAssigning(classId)
-      const response = await fetch(`${backend_url}/admin/assign-teacher?class_id=${classId}&teacher_id=${teacherId}`, {
+      const response = await backendFetch(`${backend_url}/admin/assign-teacher?class_id=${classId}&teacher_id=${teacherId}&branch_id=${currentBranchId}`, {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
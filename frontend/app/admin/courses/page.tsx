@@ -2,6 +2,7 @@
 
 import { useEffect, useState } from "react"
 import { useBranch } from "@/contexts/branch-context"
+import { useBackendFetch } from "@/lib/backendFetch"
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card"
 import { Button } from "@/components/ui/button"
 import {
@@ -47,6 +48,7 @@ export default function CoursesPage() {
   const [selectedCourse, setSelectedCourse] = useState<Course | null>(null)
   const [newCourseName, setNewCourseName] = useState("")
   const backend_url = process.env.NEXT_PUBLIC_BACKEND_URL
+  const backendFetch = useBackendFetch()
 
   // Fetch courses
   useEffect(() => {
@@ -89,7 +91,7 @@ export default function CoursesPage() {
 
     try {
       setCreating(true)
-      const response = await fetch(`${backend_url}/admin/add-course/${currentBranchId}`, {
+      const response = await backendFetch(`${backend_url}/admin/add-course/${currentBranchId}`, {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
@@ -121,7 +123,7 @@ export default function CoursesPage() {
   const handleDeleteCourse = async (courseId: number) => {
     try {
       setDeleting(courseId)
-      const response = await fetch(`${backend_url}/admin/delete-course/${courseId}`, {
+      const response = await backendFetch(`${backend_url}/admin/delete-course/${courseId}?branch_id=${currentBranchId}`, {
         method: "DELETE",
         headers: {
           "Content-Type": "application/json",
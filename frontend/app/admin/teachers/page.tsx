@@ -3,6 +3,7 @@
 import { useEffect, useState } from "react"
 import { useSession } from "next-auth/react"
 import { useBranch } from "@/contexts/branch-context"
+import { useBackendFetch } from "@/lib/backendFetch"
 import { DataTable } from "@/components/tables/data-table"
 import { createTeacherColumns, type TeacherData } from "@/components/tables/columns/teacher-columns"
 import { Button } from "@/components/ui/button"
@@ -52,6 +53,7 @@ export default function TeachersPage() {
     password: "",
   })
   const backend_url = process.env.NEXT_PUBLIC_BACKEND_URL
+  const backendFetch = useBackendFetch()
 
   // Fetch teachers
   useEffect(() => {
@@ -109,7 +111,7 @@ export default function TeachersPage() {
 
     try {
       setCreating(true)
-      const response = await fetch(
+      const response = await backendFetch(
         `${backend_url}/admin/create-teacher/${currentBranchId}`,
         {
           method: "POST",
@@ -169,8 +171,8 @@ export default function TeachersPage() {
   const handleDeleteTeacher = async (teacherId: string) => {
     try {
       setDeleting(teacherId)
-      const response = await fetch(
-        `${backend_url}/admin/delete-teacher/${teacherId}`,
+      const response = await backendFetch(
+        `${backend_url}/admin/delete-teacher/${teacherId}?branch_id=${currentBranchId}`,
         {
           method: "DELETE",
           headers: {
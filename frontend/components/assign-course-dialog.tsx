@@ -20,6 +20,7 @@ import {
 } from "@/components/ui/popover"
 import { Badge } from "@/components/ui/badge"
 import { cn } from "@/lib/utils"
+import { useBackendFetch } from "@/lib/backendFetch"
 
 interface Class {
   id: number
@@ -74,6 +75,7 @@ export function AssignCourseDialog({
     Record<number, boolean>
   >({})
   const backend_url = process.env.NEXT_PUBLIC_BACKEND_URL
+  const backendFetch = useBackendFetch()
 
   // Fetch classes, teachers, and existing assignments when dialog opens
   useEffect(() => {
@@ -96,7 +98,7 @@ export function AssignCourseDialog({
                 "ngrok-skip-browser-warning": "true",
               },
             }),
-            fetch(`${backend_url}/admin/assign_course/${courseId}`, {
+            fetch(`${backend_url}/admin/assign_course/${courseId}?branch_id=${currentBranchId}`, {
               method: "GET",
               headers: {
                 "Content-Type": "application/json",
@@ -233,8 +235,8 @@ export function AssignCourseDialog({
       // Log all assignments before sending
       console.log("All assignments to send:", assignments)
 
-      const response = await fetch(
-        `${backend_url}/admin/assign_course/${courseId}`,
+      const response = await backendFetch(
+        `${backend_url}/admin/assign_course/${courseId}?branch_id=${currentBranchId}`,
         {
           method: "POST",
           headers: {
@@ -14,6 +14,7 @@ import {
   DialogTitle,
 } from "@/components/ui/dialog"
 import { ScrollArea } from "@/components/ui/scroll-area"
+import { useBranch } from "@/contexts/branch-context"
 import jsPDF from "jspdf"
 
 interface Exam {
@@ -54,6 +55,7 @@ export function GenerateReportDialog({
   const [selectedExamIds, setSelectedExamIds] = useState<number[]>([])
   const [loadingExams, setLoadingExams] = useState(false)
   const [generating, setGenerating] = useState(false)
+  const { currentBranchId } = useBranch()
   const backend_url = process.env.NEXT_PUBLIC_BACKEND_URL
 
   // Fetch exams when dialog opens
@@ -63,7 +65,7 @@ export function GenerateReportDialog({
         try {
           setLoadingExams(true)
           const response = await fetch(
-            `${backend_url}/admin/get_all_exams/${classId}`
+            `${backend_url}/admin/get_all_exams/${classId}?branch_id=${currentBranchId}`
           )
 
           if (response.ok) {
@@ -83,7 +85,7 @@ export function GenerateReportDialog({
     } else {
       setSelectedExamIds([])
     }
-  }, [open, classId, backend_url])
+  }, [open, classId, currentBranchId, backend_url])
 
   const handleExamToggle = (examId: number) => {
     setSelectedExamIds((prev) =>
@@ -3,6 +3,7 @@ import CredentialsProvider from "next-auth/providers/credentials";
 import { sql } from "@/lib/db";
 import bcrypt from "bcryptjs";
 import { getServerSession } from "next-auth";
+import { signBackendToken } from "@/lib/backendToken";
 
 export interface AuthenticatedUser {
   id: string;
@@ -31,7 +32,7 @@ export async function authenticateUser(email: string, password: string): Promise
       role,
       branch_id
     FROM "User"
-    WHERE email = ${email}
+    WHERE email = ${email} AND deleted_at IS NULL
     LIMIT 1
   `;
 
@@ -128,6 +129,14 @@ export const authOptions: NextAuthOptions = {
         (session.user as any).first_name = token.first_name;
         (session.user as any).last_name = token.last_name;
         (session.user as any).branch_id = token.branch_id;
+        // Bearer token for backend calls (see lib/backendFetch.ts)
+        session.accessToken = await signBackendToken({
+          id: token.id,
+          role: token.role,
+          first_name: token.first_name,
+          last_name: token.last_name,
+          branch_id: token.branch_id,
+        });
       }
       return session;
     },
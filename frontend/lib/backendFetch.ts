@@ -0,0 +1,25 @@
+"use client"
+
+import { useCallback } from "react"
+import { useSession } from "next-auth/react"
+
+/**
+ * fetch bound to the signed-in user: adds the session's backend token as a
+ * Bearer Authorization header so the backend knows who made the request
+ * (audit trail actor, role checks).
+ */
+export function useBackendFetch() {
+  const { data: session } = useSession()
+  const accessToken = session?.accessToken
+
+  return useCallback(
+    (input: RequestInfo, init: RequestInit = {}) => {
+      const headers = new Headers(init.headers)
+      if (accessToken) {
+        headers.set("Authorization", `Bearer ${accessToken}`)
+      }
+      return fetch(input, { ...init, headers })
+    },
+    [accessToken]
+  )
+}
@@ -0,0 +1,30 @@
+import { SignJWT } from "jose";
+
+// The NextAuth session cookie is encrypted, so the backend can't read it.
+// The backend verifies HS256 tokens signed with the same NEXTAUTH_SECRET
+// (core/auth.py verify_token); this mints one from the session's user.
+const BACKEND_TOKEN_TTL_SECONDS = 60 * 60;
+
+export interface BackendTokenClaims {
+  id: string;
+  role?: string;
+  first_name?: string | null;
+  last_name?: string | null;
+  branch_id?: number | null;
+}
+
+/**
+ * Sign a short-lived HS256 JWT the backend accepts as a Bearer token
+ */
+export async function signBackendToken(claims: BackendTokenClaims): Promise<string> {
+  const secret = process.env.NEXTAUTH_SECRET;
+  if (!secret) {
+    throw new Error("NEXTAUTH_SECRET is not configured");
+  }
+  const iat = Math.floor(Date.now() / 1000);
+  return new SignJWT({ ...claims })
+    .setProtectedHeader({ alg: "HS256", typ: "JWT" })
+    .setIssuedAt(iat)
+    .setExpirationTime(iat + BACKEND_TOKEN_TTL_SECONDS)
+    .sign(new TextEncoder().encode(secret));
+}